@@ -0,0 +1,78 @@
+"""
+Fixed-rate pacing vs the header-driven adaptive limiter.
+
+Pages several FakeReddit listings in parallel through paced_listing,
+once with a fixed-rate bucket that ignores the rate-limit headers and
+once with the bucket synced from them, under three server budgets:
+
+- spare: far more budget than the fixed rate uses
+- tight: less budget than the fixed rate spends (429 once spent)
+- flaky: spare budget, but 15% of page fetches answer 503
+
+    python scripts/benchmarks/bench_adaptive_limiter.py
+"""
+import asyncio
+import time
+
+from fake_reddit import FakeReddit
+
+from common.rate_limit import RateLimitBucket, paced_listing
+
+LISTINGS = 6
+PAGES_PER_LISTING = 10
+
+SCENARIOS = {
+    "spare": {"budget": 600, "window": 10.0},
+    "tight": {"budget": 20, "window": 2.0},
+    "flaky": {"budget": 600, "window": 10.0, "error_rate": 0.15},
+}
+# Fixed pacing: bursts of 10, then 5 requests/s (20/s in the tight scenario)
+FIXED_RATE = {"spare": (10, 2.0), "tight": (10, 0.5), "flaky": (10, 2.0)}
+
+
+async def drain(listing):
+    async for _ in listing:
+        pass
+
+
+async def timed_run(scenario, adaptive):
+    reddit = FakeReddit(
+        latency=0.02,
+        posts_per_listing=PAGES_PER_LISTING * 100,
+        strict=True,
+        seed=1,
+        **SCENARIOS[scenario],
+    )
+    bucket = RateLimitBucket(*FIXED_RATE[scenario])
+    limits = (lambda: reddit.auth.limits) if adaptive else None
+
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(
+            drain(paced_listing(reddit.listing(f"sub{i}", "new", PAGES_PER_LISTING * 100), bucket, limits))
+            for i in range(LISTINGS)
+        ),
+        return_exceptions=True,
+    )
+    elapsed = time.perf_counter() - start
+    failed = sum(isinstance(result, Exception) for result in results)
+    return elapsed, reddit, bucket, failed
+
+
+async def main():
+    print("========== ADAPTIVE LIMITER BENCHMARK ==========")
+    print(f"{LISTINGS} listings x {PAGES_PER_LISTING} pages per run")
+    for scenario in SCENARIOS:
+        for adaptive in (False, True):
+            elapsed, reddit, bucket, failed = await timed_run(scenario, adaptive)
+            mode = "adaptive" if adaptive else "fixed"
+            print(
+                f"{scenario:<6} {mode:<9} {elapsed:6.2f}s | 429s {reddit.throttled:>3} | "
+                f"5xx {reddit.errors:>3} | pacing {bucket.waited:5.1f}s | "
+                f"backoff {bucket.backoff_waited:5.1f}s | failed listings {failed}"
+            )
+    print("================================================")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,93 @@
+"""
+Backfilling a list of post IDs: one request per ID vs `backfill_ids`.
+
+The ID file lists IDS posts, as bare IDs and fullnames with some repeats.
+KNOWN of them are already in the corpus. A naive script fetches the rest
+one request at a time. `backfill_ids` skips the known IDs, fetches 100
+per /api/info request with a few batches in flight, and writes through
+the scrapers' pipeline. A second run of the same file shows that only
+the IDs Reddit did not return are asked for again:
+
+    python scripts/benchmarks/bench_backfill.py
+"""
+import asyncio
+import contextlib
+import functools
+import io
+import os
+import time
+
+from fake_reddit import SCRATCH_DIR, FakePost, FakeReddit
+
+from common.io_helpers import CorpusWriter
+from common.post import Post
+from common.rate_limit import RateLimitBucket, paced_call
+from common.reddit_scraper import _fetch_info, backfill_ids
+
+IDS = 3000
+KNOWN = 600
+CONCURRENCY = 4
+
+
+def write_id_file(path):
+    post_ids = [f"dump{i:05d}" for i in range(IDS)]
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("# exported post IDs\n")
+        for i, post_id in enumerate(post_ids):
+            f.write(f"t3_{post_id}\n" if i % 3 == 0 else f"{post_id}\n")
+        # A few repeats
+        f.writelines(f"{post_id}\n" for post_id in post_ids[:30])
+    return post_ids
+
+
+async def naive(post_ids):
+    """One /api/info request per ID, one after another."""
+    reddit = FakeReddit(latency=0.02, budget=1_000_000)
+    bucket = RateLimitBucket(1_000_000)
+    start = time.perf_counter()
+    for post_id in post_ids:
+        await paced_call(functools.partial(_fetch_info, reddit, [f"t3_{post_id}"]), bucket)
+    return time.perf_counter() - start, reddit.requests
+
+
+async def batched(ids_path):
+    reddit = FakeReddit(latency=0.02, budget=1_000_000)
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        stats = await backfill_ids(
+            ids_path=ids_path,
+            merged_filename="backfill_merged.csv",
+            max_concurrency=CONCURRENCY,
+            reddit=reddit,
+        )
+    return time.perf_counter() - start, reddit.requests, stats
+
+
+async def main():
+    ids_path = os.path.join(SCRATCH_DIR, "post_ids.txt")
+    post_ids = write_id_file(ids_path)
+    CorpusWriter("backfill_merged.csv").write_posts([
+        Post.from_submission(FakePost(post_id, "fake", 1_700_000_000, f"Body of {post_id}"))
+        for post_id in post_ids[:KNOWN]
+    ])
+
+    naive_secs, naive_requests = await naive(post_ids[KNOWN:])
+    first_secs, first_requests, first = await batched(ids_path)
+    second_secs, second_requests, second = await batched(ids_path)
+
+    print("========== ID BACKFILL BENCHMARK ==========")
+    print(f"{IDS} IDs in the file, {KNOWN} already in the corpus")
+    print(f"One request per ID:  {naive_secs:6.2f}s | {naive_requests:>5} requests")
+    print(
+        f"backfill_ids:        {first_secs:6.2f}s | {first_requests:>5} requests | "
+        f"{first['new_posts']} added, {first['skipped_known']} skipped, {first['not_found']} not returned"
+    )
+    print(
+        f"backfill_ids again:  {second_secs:6.2f}s | {second_requests:>5} requests | "
+        f"{second['new_posts']} added, {second['skipped_known']} skipped"
+    )
+    print("===========================================")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
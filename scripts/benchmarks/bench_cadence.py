@@ -0,0 +1,129 @@
+"""
+Simulated API calls and ingestion latency: hourly cycles vs adaptive cadence.
+
+Posts arrive at each source as a Poisson stream (assumed rates below,
+busy to near-silent). The fixed schedule polls every source every hour,
+as `scheduler()` does; the daemon's CadenceScheduler polls each keyword
+and community at an interval that follows its observed rate. Every poll
+costs one request per 100 new posts (at least one); posts beyond a
+listing's limit are missed. Latency (post created -> fetched) is reported
+for busy sources (100+ posts/hour) and quiet ones separately:
+
+    python scripts/benchmarks/bench_cadence.py [hours]
+"""
+import math
+import sys
+
+import fake_reddit  # noqa: F401  (makes `common` importable)
+import numpy as np
+
+from common.cadence import CadenceScheduler
+
+HOURS = float(sys.argv[1]) if len(sys.argv) > 1 else 48.0
+
+# name -> (posts per hour, posts per listing)
+SOURCES = {
+    "GENAI::chatgpt": (100, 1000),
+    "GENAI::ai tools": (20, 1000),
+    "GENAI::gen ai": (10, 1000),
+    "GENAI::genai": (10, 1000),
+    "GENAI::generative ai": (8, 1000),
+    "GENAI::ai chat": (4, 1000),
+    "GENAI::ai bot": (2, 1000),
+    "GENAI::generative artificial intelligence": (1, 1000),
+    "CONSULTING::consulting": (20, 1000),
+    "CONSULTING::consultant": (8, 1000),
+    "CONSULTING::consultancy": (2, 1000),
+    "r/ChatGPT": (300, 250),
+    "r/consulting": (8, 250),
+    "r/AiAssisted": (1, 250),
+    "r/antiai": (10, 250),
+    "r/GeminiAI": (15, 250),
+    "r/GenAI4all": (0.5, 250),
+    "r/SideProject": (12, 250),
+    "r/ChatGPTcomplaints": (3, 250),
+    "r/ChatGPTPro": (20, 250),
+    "r/AI_Agents": (15, 250),
+    "r/generativeAI": (5, 250),
+}
+
+
+def arrivals(rng, per_hour, horizon):
+    count = rng.poisson(per_hour * horizon / 3600)
+    return np.sort(rng.uniform(0, horizon, count))
+
+
+def poll_cost(name, new_posts):
+    """(requests, posts fetched) for one poll that finds `new_posts`."""
+    limit = SOURCES[name][1]
+    fetched = min(new_posts, limit)
+    return max(1, math.ceil(fetched / 100)), fetched
+
+
+BUSY_PER_HOUR = 100
+
+
+class Tally:
+    def __init__(self):
+        self.requests = 0
+        self.latencies = {"busy": [], "quiet": []}
+        self.missed = 0
+
+    def poll(self, name, times, now, last):
+        new = times[(times > last) & (times <= now)]
+        requests, fetched = poll_cost(name, len(new))
+        self.requests += requests
+        # Listings are newest first: the oldest posts are the ones cut off
+        tier = "busy" if SOURCES[name][0] >= BUSY_PER_HOUR else "quiet"
+        self.latencies[tier].extend(now - new[len(new) - fetched:])
+        self.missed += len(new) - fetched
+        return len(new)
+
+
+def simulate_fixed(streams, horizon):
+    tally = Tally()
+    for name, times in streams.items():
+        last = 0.0
+        for now in np.arange(3600.0, horizon + 1, 3600.0):
+            tally.poll(name, times, now, last)
+            last = now
+    return tally
+
+
+def simulate_adaptive(streams, horizon):
+    tally = Tally()
+    cadence = CadenceScheduler(streams, now=0.0)
+    last = dict.fromkeys(streams, 0.0)
+    while cadence.next_due() <= horizon:
+        now = cadence.next_due()
+        for name in cadence.pop_due(now):
+            new_posts = tally.poll(name, streams[name], now, last[name])
+            last[name] = now
+            cadence.record(name, new_posts, now)
+    return tally
+
+
+def main():
+    horizon = HOURS * 3600
+    rng = np.random.default_rng(0)
+    streams = {name: arrivals(rng, rate, horizon) for name, (rate, _) in SOURCES.items()}
+    total = sum(len(times) for times in streams.values())
+
+    print("========== CADENCE BENCHMARK ==========")
+    print(f"{HOURS:.0f} simulated hours, {len(SOURCES)} sources, {total:,} posts")
+    for label, tally in (
+        ("Hourly cycles", simulate_fixed(streams, horizon)),
+        ("Adaptive daemon", simulate_adaptive(streams, horizon)),
+    ):
+        print(f"{label:<16} {tally.requests:>5} requests | missed {tally.missed:,} posts")
+        for tier, latencies in tally.latencies.items():
+            minutes = np.array(latencies) / 60
+            print(
+                f"  {tier:<5} sources: latency median {np.median(minutes):5.1f} min, "
+                f"p95 {np.percentile(minutes, 95):5.1f} min"
+            )
+    print("=======================================")
+
+
+if __name__ == "__main__":
+    main()
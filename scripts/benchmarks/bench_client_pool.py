@@ -0,0 +1,69 @@
+"""
+Subreddit scrape throughput with 1, 2 and 4 clients in the credential pool.
+
+Every FakeReddit client stands for one OAuth app with a tight server-side
+budget (429 once spent), so a single client is budget-bound and each
+added client should add roughly its budget in throughput:
+
+    python scripts/benchmarks/bench_client_pool.py
+"""
+import asyncio
+import contextlib
+import io
+import time
+
+from fake_reddit import FakeReddit
+
+from common.client_pool import ClientPool
+from common.reddit_scraper import run_subreddit_scraper
+
+COMMUNITIES = 12
+PAGES_PER_COMMUNITY = 10
+# Per-client budget: 10 requests per one-second window
+BUDGET = 10
+WINDOW = 1.0
+
+
+async def timed_run(clients):
+    fakes = [
+        FakeReddit(
+            latency=0.02,
+            posts_per_listing=PAGES_PER_COMMUNITY * 100,
+            budget=BUDGET,
+            window=WINDOW,
+            strict=True,
+        )
+        for _ in range(clients)
+    ]
+    pool = ClientPool(fakes)
+    # Fresh corpora per run so earlier runs don't change the write volume
+    communities = [f"pool{clients}_{i}" for i in range(COMMUNITIES)]
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        await run_subreddit_scraper(
+            communities=communities,
+            per_subreddit_limit=PAGES_PER_COMMUNITY * 100,
+            max_concurrency=COMMUNITIES,
+            pool=pool,
+        )
+    elapsed = time.perf_counter() - start
+    pages = sum(fake.requests - fake.throttled for fake in fakes)
+    return elapsed, pages, [fake.throttled for fake in fakes]
+
+
+async def main():
+    results = {clients: await timed_run(clients) for clients in (1, 2, 4)}
+    base = results[1][0]
+
+    print("========== CLIENT POOL BENCHMARK ==========")
+    for clients, (elapsed, pages, throttled) in results.items():
+        print(
+            f"{clients} client(s): {elapsed:5.2f}s, {pages / elapsed:5.1f} pages/s, "
+            f"speed-up {base / elapsed:.1f}x, 429s per client {throttled}"
+        )
+    print("===========================================")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,89 @@
+"""
+Comment ingestion: naive replace_more vs the bounded CommentFetcher.
+
+Fetches the threads of a batch of FakeReddit posts, most with a few dozen
+comments and a few with thousands (every "load more" request returns up
+to 100). The naive way expands each thread completely, one request at a
+time, keeps every tree until the end and writes once; the comment stage
+expands in parallel and streams rows out in batches, with and without
+its per-post budget. Peak memory is traced Python allocations (in a
+second, untimed run):
+
+    python scripts/benchmarks/bench_comments.py
+"""
+import asyncio
+import time
+import tracemalloc
+
+from fake_reddit import FakeReddit
+
+from asyncpraw.models import MoreComments
+
+from common.io_helpers import CommentWriter
+from common.reddit_scraper import MORE_COMMENTS_BUDGET, CommentFetcher, _flatten_comments
+
+POSTS = [f"bench{i:03d}" for i in range(60)]
+BUSY_EVERY = 15
+BUSY_COMMENTS = 3000
+
+
+def thread_size(post_id):
+    index = int(post_id[-3:])
+    return BUSY_COMMENTS if index % BUSY_EVERY == 0 else 40 + index % 7 * 20
+
+
+async def naive(reddit, writer):
+    """`replace_more(limit=None)` per post, one after another; one write at the end."""
+    rows = []
+    for post_id in POSTS:
+        submission = await reddit.submission(post_id)
+        tree = [item for item in submission.comments if not isinstance(item, MoreComments)]
+        more = [item for item in submission.comments if isinstance(item, MoreComments)]
+        while more:
+            for item in await more.pop().comments():
+                (more if isinstance(item, MoreComments) else tree).append(item)
+        rows.extend(_flatten_comments(tree, post_id, "bench", [], submission))
+    writer.write(rows)
+
+
+async def staged(reddit, writer, more_budget):
+    fetcher = CommentFetcher(writer, more_budget=more_budget)
+    await fetcher.fetch(((post_id, "bench") for post_id in POSTS), reddit=reddit)
+    await fetcher.close()
+    return fetcher
+
+
+async def timed_run(label, run):
+    """Wall-clock from a plain run, peak memory from a second, traced one."""
+    for traced in (False, True):
+        reddit = FakeReddit(latency=0.02, budget=100_000, comments_per_post=thread_size)
+        writer = CommentWriter(f"{label}_{traced}_merged.csv")
+        if traced:
+            tracemalloc.start()
+        start = time.perf_counter()
+        fetcher = await run(reddit, writer)
+        if traced:
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        else:
+            elapsed = time.perf_counter() - start
+
+    skipped = f", {fetcher.skipped} left unexpanded" if fetcher is not None else ""
+    print(
+        f"{label:<22} {elapsed:6.2f}s | {reddit.requests:>4} requests | "
+        f"{writer.total:>6} comments{skipped} | peak {peak / 2**20:6.1f} MiB"
+    )
+
+
+async def main():
+    total = sum(thread_size(post_id) for post_id in POSTS)
+    print("========== COMMENT STAGE BENCHMARK ==========")
+    print(f"{len(POSTS)} posts, {total:,} comments")
+    await timed_run("naive_replace_more", naive)
+    await timed_run("stage_unbudgeted", lambda reddit, writer: staged(reddit, writer, None))
+    await timed_run("stage_budgeted", lambda reddit, writer: staged(reddit, writer, MORE_COMMENTS_BUDGET))
+    print("=============================================")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,102 @@
+"""
+Historical backfill: one capped search vs time-windowed `run_keyword_backfill`.
+
+FakeReddit serves DAYS of history for a busy keyword (BUSY_RATE posts an
+hour) and a quiet one, with searches capped at 1000 results like
+Reddit's. A plain search per keyword stops at the cap; the windowed
+backfill refines saturated windows until every post of the range is
+reached. The last run crashes one window request and then reruns, to
+show that only the windows left unfinished are searched again:
+
+    python scripts/benchmarks/bench_history.py
+"""
+import asyncio
+import contextlib
+import io
+import time
+
+from fake_reddit import HISTORY_END, SCRATCH_DIR, FakeReddit
+
+from common.reddit_scraper import SEARCH_LIMIT, run_keyword_backfill
+from common.storage import get_storage
+
+DAYS = 14
+BUSY_RATE = 300
+QUIET_RATE = 2
+KEYWORDS = ["busy topic", "quiet topic"]
+CONCURRENCY = 4
+SINCE = HISTORY_END - DAYS * 24 * 3600 + 1
+
+
+def posts_per_hour(keyword):
+    return BUSY_RATE if keyword.startswith("busy") else QUIET_RATE
+
+
+def expected_posts():
+    return sum(
+        (HISTORY_END - SINCE) // (3600 // posts_per_hour(kw)) + 1 for kw in KEYWORDS
+    )
+
+
+async def plain():
+    """One search per keyword, paged to the cap."""
+    reddit = FakeReddit(latency=0.02, budget=1_000_000, posts_per_hour=posts_per_hour)
+    start = time.perf_counter()
+    posts = 0
+    for kw in KEYWORDS:
+        subreddit = await reddit.subreddit("all")
+        async for post in subreddit.search(kw, sort="new", limit=SEARCH_LIMIT):
+            posts += post.created_utc >= SINCE
+    return time.perf_counter() - start, reddit.requests, posts
+
+
+async def windowed(merged_filename, crash_at=None):
+    reddit = FakeReddit(
+        latency=0.02, budget=1_000_000, posts_per_hour=posts_per_hour, crash_at=crash_at
+    )
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        stats = await run_keyword_backfill(
+            label=merged_filename.split("_")[0],
+            community="all",
+            keywords=KEYWORDS,
+            merged_filename=merged_filename,
+            since_utc=SINCE,
+            until_utc=HISTORY_END,
+            max_concurrency=CONCURRENCY,
+            reddit=reddit,
+        )
+    return time.perf_counter() - start, reddit.requests, stats
+
+
+def row(label, secs, requests, posts):
+    return f"{label:<22} {secs:6.2f}s | {requests:>5} requests | {posts:>6} posts"
+
+
+async def main():
+    plain_secs, plain_requests, plain_posts = await plain()
+    full_secs, full_requests, full = await windowed("FULL_merged.csv")
+    crash_secs, crash_requests, crashed = await windowed("RESUME_merged.csv", crash_at=40)
+    resume_secs, resume_requests, resumed = await windowed("RESUME_merged.csv")
+    corpus_rows = len(get_storage(SCRATCH_DIR).read("RESUME_merged"))
+
+    print("========== HISTORICAL BACKFILL BENCHMARK ==========")
+    print(f"{DAYS} days of {BUSY_RATE}/h and {QUIET_RATE}/h keywords: {expected_posts()} posts")
+    print(row("capped search", plain_secs, plain_requests, plain_posts))
+    print(
+        row("windowed backfill", full_secs, full_requests, full["new_posts"])
+        + f" | {full['windows']} windows, {full['truncated_windows']} truncated"
+    )
+    print(
+        row("crashed mid-backfill", crash_secs, crash_requests, crashed["new_posts"])
+        + f" | {crashed['failed_windows']} window failed"
+    )
+    print(
+        row("resumed", resume_secs, resume_requests, resumed["new_posts"])
+        + f" | {resumed['windows']} windows left, corpus now {corpus_rows} posts"
+    )
+    print("===================================================")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,150 @@
+"""
+End-to-end `run_all_once` cycles over HTTP, against fake_reddit_server.
+
+Every scenario starts a fresh fake Reddit API server in its own process
+and runs CYCLES full scheduler cycles in a fresh child process (clean
+data folder, own peak RSS), through the real asyncpraw/aiohttp stack:
+OAuth tokens, paging, rate-limit headers and 429s included. The first
+cycle is cold, the next ones are incremental. Per cycle it reports
+wall-clock, API requests, 429 answers, posts fetched per second and new
+posts, then the posts fetched and added per job; per scenario the
+child's peak RSS. A job that fails, has failed keywords or subreddits,
+or fetches nothing is flagged, and the benchmark then exits non-zero:
+
+    python scripts/benchmarks/bench_http_cycle.py
+"""
+import asyncio
+import concurrent.futures
+import contextlib
+import io
+import multiprocessing
+import os
+import resource
+import signal
+import subprocess
+import sys
+import time
+
+import aiohttp
+
+from fake_reddit import SCRIPTS_DIR
+
+import scheduler
+from common.client_pool import ClientPool
+from common.reddit_client import RedditClient
+
+SERVER = os.path.join(SCRIPTS_DIR, "benchmarks", "fake_reddit_server.py")
+CYCLES = 2
+
+# name -> (OAuth apps, server options)
+SCENARIOS = {
+    "1 app": (1, {"latency": 0.05, "budget": 1000, "window": 60}),
+    "1 app, tight budget": (1, {"latency": 0.05, "budget": 30, "window": 10}),
+    "3 apps, tight budget": (3, {"latency": 0.05, "budget": 30, "window": 10}),
+}
+
+
+def start_server(options):
+    """Start fake_reddit_server on a free port; returns (process, base URL)."""
+    args = [sys.executable, SERVER, "--port", "0", "--posts-per-listing", "250"]
+    for option, value in options.items():
+        args += [f"--{option.replace('_', '-')}", str(value)]
+    process = subprocess.Popen(args, stdout=subprocess.PIPE, text=True)
+    url = process.stdout.readline().strip()
+    if not url:
+        process.kill()
+        raise RuntimeError("fake_reddit_server did not start")
+    return process, url
+
+
+async def server_stats(url):
+    async with aiohttp.ClientSession() as session:
+        async with session.get(f"{url}/__fake/stats") as response:
+            return await response.json()
+
+
+async def run_cycles(url, cycles):
+    results = []
+    async with RedditClient() as client:
+        pool = ClientPool(client.clients)
+        for _ in range(cycles):
+            before, served = client.stats.snapshot(), await server_stats(url)
+            start = time.perf_counter()
+            # Scraper progress output would drown the results
+            with contextlib.redirect_stdout(io.StringIO()):
+                stats = await scheduler.run_all_once(pool=pool)
+            wall = time.perf_counter() - start
+            http = client.stats.since(before)
+            after = await server_stats(url)
+            results.append({
+                "wall": wall,
+                "requests": http["requests"] - http["token_fetches"],
+                "throttled": after["throttled"] - served["throttled"],
+                "posts": sum(job["raw_total"] for job in stats),
+                "new_posts": sum(job["new_posts"] for job in stats),
+                "jobs": [(job["label"], job["raw_total"], job["new_posts"], job_problems(job)) for job in stats],
+            })
+    return results
+
+
+def job_problems(job):
+    """What went wrong in one job: an error, failed listings, or nothing fetched at all."""
+    if job.get("error"):
+        return [f"failed: {job['error']}"]
+    problems = []
+    for key, kind in (("failed_keywords", "keywords"), ("failed_communities", "subreddits")):
+        if job.get(key):
+            problems.append(f"failed {kind}: {', '.join(job[key])}")
+    if job["raw_total"] == 0:
+        # Every job's listings have posts on the fake server, warm cycles included
+        problems.append("fetched nothing")
+    return problems
+
+
+def run_scenario(url, apps):
+    """Child process: point the scrapers at the server and run the cycles."""
+    os.environ["REDDIT_URL"] = os.environ["REDDIT_OAUTH_URL"] = url
+    os.environ["REDDIT_CREDENTIALS"] = " ".join(f"bench{i}:secret" for i in range(apps))
+    results = asyncio.run(run_cycles(url, CYCLES))
+    # ru_maxrss is in KiB on Linux
+    return results, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    problems = 0
+    print("========== HTTP CYCLE BENCHMARK ==========")
+    print(f"{'scenario':<22} {'cycle':<6} {'wall':>7} {'requests':>9} {'429s':>5} "
+          f"{'posts':>6} {'posts/s':>8} {'new':>6}")
+    for name, (apps, options) in SCENARIOS.items():
+        server, url = start_server(options)
+        try:
+            # A fresh interpreter per scenario: clean data folder and own peak RSS
+            with concurrent.futures.ProcessPoolExecutor(
+                max_workers=1, mp_context=multiprocessing.get_context("spawn")
+            ) as executor:
+                results, peak_rss = executor.submit(run_scenario, url, apps).result()
+        finally:
+            # Interrupted rather than killed, so it removes its scratch folder
+            server.send_signal(signal.SIGINT)
+            server.wait()
+
+        for cycle, result in enumerate(results, 1):
+            label = "cold" if cycle == 1 else f"warm{cycle - 1}"
+            print(
+                f"{name if cycle == 1 else '':<22} {label:<6} {result['wall']:6.2f}s "
+                f"{result['requests']:>9} {result['throttled']:>5} {result['posts']:>6} "
+                f"{result['posts'] / result['wall']:>8.0f} {result['new_posts']:>6}"
+            )
+            for job, posts, new_posts, job_issues in result["jobs"]:
+                issues = f"  {'; '.join(job_issues)}" if job_issues else ""
+                print(f"{'':<22}   {job:<28} {posts:>6} {'':>8} {new_posts:>6}{issues}")
+                problems += len(job_issues)
+        print(f"{'':<22} peak RSS {peak_rss:.0f} MiB")
+    print("==========================================")
+    if problems:
+        # The figures above don't cover every job; don't let them pass for a clean run
+        sys.exit(f"{problems} job problem(s): see above")
+
+
+if __name__ == "__main__":
+    main()
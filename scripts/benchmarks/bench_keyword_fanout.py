@@ -0,0 +1,44 @@
+"""
+Compare sequential vs concurrent keyword search in run_keyword_scraper.
+
+Runs against the in-process FakeReddit in a scratch data folder:
+
+    python scripts/benchmarks/bench_keyword_fanout.py
+"""
+import asyncio
+import time
+
+from fake_reddit import FakeReddit
+
+from common.reddit_scraper import run_keyword_scraper
+
+KEYWORDS = [f"keyword {i}" for i in range(8)]
+
+
+async def timed_run(**kwargs):
+    reddit = FakeReddit(latency=0.2, posts_per_listing=300)
+    start = time.perf_counter()
+    await run_keyword_scraper(
+        label="BENCH",
+        community="all",
+        keywords=KEYWORDS,
+        merged_filename="BENCH_merged.csv",
+        reddit=reddit,
+        **kwargs,
+    )
+    return time.perf_counter() - start, reddit
+
+
+async def main():
+    sequential, _ = await timed_run()
+    concurrent, reddit = await timed_run(max_concurrency=4)
+
+    print("========== KEYWORD FAN-OUT BENCHMARK ==========")
+    print(f"Sequential (paced):      {sequential:.2f}s")
+    print(f"Concurrent (4 tasks):    {concurrent:.2f}s")
+    print(f"Requests / throttled:    {reddit.requests} / {reddit.throttled}")
+    print("===============================================")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
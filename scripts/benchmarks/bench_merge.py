@@ -0,0 +1,68 @@
+"""
+Compare the full-rewrite merge with the append-only merge on a large corpus.
+
+Builds a synthetic merged CSV, then merges the same batch of new posts
+(half already present) with merge_clean_save and append_clean_save:
+
+    python scripts/benchmarks/bench_merge.py [corpus_rows]
+"""
+import os
+import shutil
+import sys
+import time
+
+import fake_reddit  # noqa: F401  (scratch data folder)
+import pandas as pd
+
+from common.io_helpers import TEMP_CSV_FOLDER, append_clean_save, merge_clean_save
+
+CORPUS_ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+BATCH_ROWS = 2_000
+
+
+def synthetic_posts(start, count):
+    ids = range(start, start + count)
+    return pd.DataFrame({
+        "Title": [f"Title {i}" for i in ids],
+        "Text": [f"Synthetic post body number {i} about generative ai tools" for i in ids],
+        "Username": [f"user_{i % 5000}" for i in ids],
+        "ID": [f"p{i:08x}" for i in ids],
+        "community": [f"sub{i % 40}" for i in ids],
+        "Date": ["01-01-2025"] * count,
+        "Time": ["12:00:00"] * count,
+        "Post URL": [f"https://www.reddit.com/comments/p{i:08x}/" for i in ids],
+    })
+
+
+def timed(func, **kwargs):
+    start = time.perf_counter()
+    stats = func(**kwargs)
+    return time.perf_counter() - start, stats
+
+
+def main():
+    print(f"Building synthetic corpus of {CORPUS_ROWS:,} rows ...")
+    corpus_path = os.path.join(TEMP_CSV_FOLDER, "corpus.csv")
+    synthetic_posts(0, CORPUS_ROWS).to_csv(corpus_path, index=False)
+
+    batch = synthetic_posts(CORPUS_ROWS - BATCH_ROWS // 2, BATCH_ROWS)
+
+    shutil.copy(corpus_path, os.path.join(TEMP_CSV_FOLDER, "full_merged.csv"))
+    full_secs, full_stats = timed(merge_clean_save, df=batch, merged_filename="full_merged.csv")
+
+    shutil.copy(corpus_path, os.path.join(TEMP_CSV_FOLDER, "append_merged.csv"))
+    # First call builds the persistent index once; steady-state cycles reuse it
+    first_secs, _ = timed(append_clean_save, df=batch.head(0), merged_filename="append_merged.csv")
+    append_secs, append_stats = timed(append_clean_save, df=batch, merged_filename="append_merged.csv")
+
+    print("========== MERGE BENCHMARK ==========")
+    print(f"Corpus rows:               {CORPUS_ROWS:,}")
+    print(f"Full rewrite merge:        {full_secs:.2f}s (+{full_stats['new_posts']} posts)")
+    print(f"Append-only, index build:  {first_secs:.2f}s (one-off)")
+    print(f"Append-only merge:         {append_secs:.2f}s (+{append_stats['new_posts']} posts)")
+    print(f"Speed-up:                  {full_secs / append_secs:.0f}x")
+    print("=====================================")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Near-duplicate detection on synthetic posts.
+
+Builds distinct posts plus reposts that differ by case, whitespace, an
+appended URL or a short trailing edit, then times near_duplicate_mask and
+reports how many reposts it caught and how many distinct posts it dropped:
+
+    python scripts/benchmarks/bench_near_dupes.py [distinct_posts]
+"""
+import sys
+import time
+
+import fake_reddit  # noqa: F401  (makes `common` importable)
+import numpy as np
+import pandas as pd
+
+from common.dedupe_index import normalize_text
+from common.near_dupes import NEAR_DUP_THRESHOLD, near_duplicate_mask
+
+DISTINCT_POSTS = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+REPOST_SHARE = 0.2
+WORDS_PER_POST = 40
+VOCABULARY = 20_000
+
+
+def synthetic_texts(rng):
+    vocabulary = np.array([f"w{i}" for i in range(VOCABULARY)])
+    words = vocabulary[rng.integers(0, VOCABULARY, (DISTINCT_POSTS, WORDS_PER_POST))]
+    originals = [" ".join(row) for row in words]
+
+    sources = rng.choice(DISTINCT_POSTS, int(DISTINCT_POSTS * REPOST_SHARE), replace=False)
+    edits = [
+        lambda text: text.upper(),
+        lambda text: text.replace(" ", "   "),
+        lambda text: f"{text} https://example.com/{len(text)}",
+        lambda text: f"{text} edit: fixed a typo",
+    ]
+    reposts = [edits[i % len(edits)](originals[source]) for i, source in enumerate(sources)]
+    return pd.Series(originals + reposts)
+
+
+def main():
+    rng = np.random.default_rng(0)
+    texts = synthetic_texts(rng)
+    is_repost = np.arange(len(texts)) >= DISTINCT_POSTS
+
+    start = time.perf_counter()
+    exact = normalize_text(texts).duplicated().to_numpy()
+    exact_secs = time.perf_counter() - start
+
+    start = time.perf_counter()
+    near = near_duplicate_mask(texts, NEAR_DUP_THRESHOLD)
+    near_secs = time.perf_counter() - start
+
+    print("========== NEAR-DUPLICATE BENCHMARK ==========")
+    print(f"Rows (distinct + reposts):   {len(texts):,} ({DISTINCT_POSTS:,} + {is_repost.sum():,})")
+    print(f"Exact dedupe:                {exact_secs:.2f}s, caught {exact[is_repost].sum():,} reposts")
+    print(f"MinHash-LSH (t={NEAR_DUP_THRESHOLD}):       {near_secs:.2f}s, caught {near[is_repost].sum():,} reposts")
+    print(f"Distinct posts dropped:      {near[~is_repost].sum():,}")
+    print(f"Throughput:                  {len(texts) / near_secs:,.0f} rows/s")
+    print("==============================================")
+
+
+if __name__ == "__main__":
+    main()
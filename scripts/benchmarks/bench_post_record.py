@@ -0,0 +1,84 @@
+"""
+Per-post cost of the old parallel-lists accumulator vs Post records.
+
+The old path formats Date/Time with two strftime calls per post and
+keeps eight growing lists; the new path keeps slotted Post records and
+formats dates once per batch when building the dataframe:
+
+    python scripts/benchmarks/bench_post_record.py [posts]
+"""
+import datetime
+import sys
+import time
+import tracemalloc
+
+from fake_reddit import FakePost
+
+from common.post import Post, posts_to_frame
+
+POSTS = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+
+def old_accumulator(submissions):
+    posts = {
+        "Title": [],
+        "Text": [],
+        "Username": [],
+        "ID": [],
+        "community": [],
+        "Date": [],
+        "Time": [],
+        "Post URL": [],
+    }
+    for post in submissions:
+        created_dt = datetime.datetime.fromtimestamp(post.created_utc)
+        posts["Date"].append(created_dt.strftime("%d-%m-%Y"))
+        posts["Time"].append(created_dt.strftime("%H:%M:%S"))
+        posts["Title"].append(post.title)
+        posts["Text"].append(post.selftext)
+        posts["Username"].append(str(post.author))
+        posts["ID"].append(post.id)
+        posts["Post URL"].append(post.url)
+        posts["community"].append(str(post.subreddit))
+    return posts
+
+
+def new_records(submissions):
+    return [Post.from_submission(post) for post in submissions]
+
+
+def measure(func, *args):
+    # Timed without tracing; tracemalloc overhead would dominate
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    submissions = [
+        FakePost(f"p{i:07d}", f"sub{i % 40}", 1_700_000_000 - i * 37, f"Body {i}")
+        for i in range(POSTS)
+    ]
+
+    _, old_secs, old_peak = measure(old_accumulator, submissions)
+    records, new_secs, new_peak = measure(new_records, submissions)
+    _, frame_secs, _ = measure(posts_to_frame, records)
+
+    print("========== POST RECORD BENCHMARK ==========")
+    print(f"Posts:                         {POSTS:,}")
+    print(f"Dict of lists + strftime:      {old_secs / POSTS * 1e6:.2f} us/post, "
+          f"{old_peak / POSTS:.0f} B/post")
+    print(f"Post records:                  {new_secs / POSTS * 1e6:.2f} us/post, "
+          f"{new_peak / POSTS:.0f} B/post")
+    print(f"Vectorized Date/Time at write: {frame_secs / POSTS * 1e6:.2f} us/post")
+    print("===========================================")
+
+
+if __name__ == "__main__":
+    main()
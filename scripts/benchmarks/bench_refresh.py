@@ -0,0 +1,73 @@
+"""
+Refresh queue cost over simulated days of hourly cycles.
+
+Every simulated hour ingests POSTS_PER_HOUR new posts into two corpora
+(a share of them into both), then runs `run_refresh` against FakeReddit
+at that hour. Each post is snapshotted at 1h, 6h, 24h and 7d; batched
+/api/info requests are compared with fetching every due post on its own:
+
+    python scripts/benchmarks/bench_refresh.py [hours]
+"""
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import time
+
+from fake_reddit import SCRATCH_DIR, FakeReddit
+
+import pandas as pd
+
+from common.reddit_scraper import run_refresh
+from common.refresh import enqueue_refresh
+from common.storage import companion_corpus
+
+HOURS = int(sys.argv[1]) if len(sys.argv) > 1 else 8 * 24
+POSTS_PER_HOUR = 300
+# Share of each hour's posts that both corpora ingest
+SHARED = 0.2
+CONCURRENCY = 4
+
+
+async def main():
+    reddit = FakeReddit(latency=0.02, budget=1_000_000)
+    start_time = time.time()
+    totals = {"due": 0, "requests": 0, "missing": 0}
+    busiest = 0
+    wall = 0.0
+
+    for hour in range(1, HOURS + 1):
+        now = start_time + hour * 3600
+        posts = [(f"h{hour:04d}p{i:03d}", "fake") for i in range(POSTS_PER_HOUR)]
+        shared = int(POSTS_PER_HOUR * SHARED)
+        enqueue_refresh("GENAI_merged", posts[: POSTS_PER_HOUR // 2 + shared], now=now - 1800)
+        enqueue_refresh("ChatGPT_merged", posts[POSTS_PER_HOUR // 2:], now=now - 1800)
+
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            stats = await run_refresh(max_concurrency=CONCURRENCY, reddit=reddit, now=now)
+        wall += time.perf_counter() - started
+        for key in totals:
+            totals[key] += stats[key]
+        busiest = max(busiest, stats["requests"])
+
+    rows = sum(
+        len(pd.read_csv(os.path.join(SCRATCH_DIR, f"{companion_corpus(corpus, 'snapshots')}.csv")))
+        for corpus in ("GENAI_merged", "ChatGPT_merged")
+    )
+
+    print("========== REFRESH QUEUE BENCHMARK ==========")
+    print(f"{HOURS} hourly runs, {HOURS * POSTS_PER_HOUR:,} posts ingested")
+    print(f"Posts refreshed:        {totals['due']:,} ({totals['missing']:,} gone)")
+    print(f"Snapshot rows written:  {rows:,} (posts in both corpora get one per corpus)")
+    print(f"Batched /api/info:      {totals['requests']:,} requests "
+          f"({totals['requests'] / HOURS:.1f} per run, at most {busiest})")
+    print(f"One request per post:   {totals['due']:,} requests "
+          f"({totals['due'] / HOURS:.1f} per run)")
+    print(f"Refresh wall-clock:     {wall:.1f}s in total, {wall / HOURS * 1000:.0f} ms per run")
+    print("=============================================")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,66 @@
+"""
+Resuming an interrupted keyword search from its saved cursor.
+
+Run 1 pages four keywords (10 pages each) with a FakeReddit that dies on
+page 9 of the third keyword. Run 2 uses a healthy client: the failed
+keyword continues from its cursor instead of starting over, and the
+finished ones only re-read their checkpoint overlap:
+
+    python scripts/benchmarks/bench_resume.py
+"""
+import asyncio
+import contextlib
+import io
+import os
+
+from fake_reddit import FakeReddit
+
+from common.checkpoints import CHECKPOINT_FILE, CURSOR_FILE, load_cursors
+from common.reddit_scraper import run_keyword_scraper
+
+KEYWORDS = [f"keyword {i}" for i in range(4)]
+PAGES_PER_KEYWORD = 10
+CRASH_AT = 2 * PAGES_PER_KEYWORD + 9
+
+
+async def run(reddit):
+    with contextlib.redirect_stdout(io.StringIO()):
+        stats = await run_keyword_scraper(
+            label="RESUME",
+            community="all",
+            keywords=KEYWORDS,
+            merged_filename="RESUME_merged.csv",
+            incremental=True,
+            reddit=reddit,
+        )
+    return stats
+
+
+async def main():
+    for path in (CHECKPOINT_FILE, CURSOR_FILE):
+        if os.path.exists(path):
+            os.remove(path)
+
+    posts = PAGES_PER_KEYWORD * 100
+    crashing = FakeReddit(latency=0.01, posts_per_listing=posts, budget=10_000, crash_at=CRASH_AT)
+    first = await run(crashing)
+    cursors = load_cursors()
+
+    healthy = FakeReddit(latency=0.01, posts_per_listing=posts, budget=10_000)
+    second = await run(healthy)
+
+    expected = int(posts * 0.5) + len(KEYWORDS) * (posts - int(posts * 0.5))
+    print("========== RESUME BENCHMARK ==========")
+    print(f"Run 1: {crashing.requests} page requests, failed keywords {first['failed_keywords']}")
+    for key, cursor in cursors.items():
+        print(f"       saved cursor for {key}: {cursor['fetched']} posts paged and written")
+    print(f"       rows written despite the crash: {first['final_total']}")
+    print(f"Run 2: {healthy.requests} page requests (restarting the failed keyword alone would be "
+          f"{PAGES_PER_KEYWORD} + {len(KEYWORDS) - 1} checkpoint pages)")
+    print(f"Corpus after run 2: {second['final_total']} unique posts (expected {expected})")
+    print(f"Cursors left: {len(load_cursors())}")
+    print("======================================")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
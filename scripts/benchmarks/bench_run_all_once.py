@@ -0,0 +1,52 @@
+"""
+Compare sequential vs concurrent scheduler.run_all_once cycles.
+
+Both modes share one FakeReddit client with simulated page latency, so
+the difference is pure orchestration. A final steady-state cycle reuses
+the checkpoints left by the previous one to show incremental fetching:
+
+    python scripts/benchmarks/bench_run_all_once.py
+"""
+import asyncio
+import contextlib
+import io
+import os
+import time
+
+from fake_reddit import FakeReddit
+
+import scheduler
+from common.checkpoints import CHECKPOINT_FILE
+
+
+def clear_checkpoints():
+    if os.path.exists(CHECKPOINT_FILE):
+        os.remove(CHECKPOINT_FILE)
+
+
+async def timed_cycle(concurrent):
+    reddit = FakeReddit(latency=0.2, posts_per_listing=250)
+    start = time.perf_counter()
+    # Scraper progress output would drown the results
+    with contextlib.redirect_stdout(io.StringIO()):
+        await scheduler.run_all_once(concurrent=concurrent, reddit=reddit)
+    return time.perf_counter() - start, reddit.requests
+
+
+async def main():
+    clear_checkpoints()
+    sequential, seq_requests = await timed_cycle(concurrent=False)
+    clear_checkpoints()
+    concurrent, con_requests = await timed_cycle(concurrent=True)
+    steady, steady_requests = await timed_cycle(concurrent=True)
+
+    print("========== RUN_ALL_ONCE BENCHMARK ==========")
+    print(f"Sequential cycle:   {sequential:.2f}s ({seq_requests} requests)")
+    print(f"Concurrent cycle:   {concurrent:.2f}s ({con_requests} requests)")
+    print(f"Speed-up:           {sequential / concurrent:.1f}x")
+    print(f"Steady-state cycle: {steady:.2f}s ({steady_requests} requests)")
+    print("============================================")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
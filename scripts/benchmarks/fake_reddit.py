@@ -0,0 +1,349 @@
+import asyncio
+import atexit
+import copy
+import os
+import random
+import re
+import shutil
+import sys
+import tempfile
+import time
+import zlib
+from types import SimpleNamespace
+
+# Make `common` importable when benchmarks are run as scripts
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if SCRIPTS_DIR not in sys.path:
+    sys.path.insert(0, SCRIPTS_DIR)
+
+# Benchmarks write to a scratch folder, never to the real corpus in data_tmp/
+SCRATCH_DIR = tempfile.mkdtemp(prefix="reddit_bench_")
+os.environ["REDDIT_DATA_DIR"] = SCRATCH_DIR
+atexit.register(shutil.rmtree, SCRATCH_DIR, ignore_errors=True)
+
+from asyncpraw.models import MoreComments  # noqa: E402
+from asyncprawcore.exceptions import ServerError, TooManyRequests  # noqa: E402
+
+# Comments Reddit returns with a submission, and per "load more" request
+FIRST_PAGE_COMMENTS = 200
+MORE_CHILDREN = 100
+
+# Newest post of the keyword histories; searches never return more than SEARCH_CAP
+HISTORY_END = 1_700_000_000
+SEARCH_CAP = 1000
+WINDOW_QUERY = re.compile(r"\(and timestamp:(\d+)\.\.(\d+) '(.*)'\)$")
+
+
+class FakePost:
+    """Just the submission attributes the scrapers read."""
+
+    def __init__(self, post_id, community, created_utc, text):
+        self.id = post_id
+        self.title = f"Post {post_id}"
+        self.selftext = text
+        self.author = f"user_{post_id[-3:]}"
+        self.url = f"https://www.reddit.com/r/{community}/comments/{post_id}/"
+        self.subreddit = community
+        self.created_utc = created_utc
+        self.score = zlib.crc32(post_id.encode()) % 500
+        self.num_comments = self.score // 5
+        self.upvote_ratio = 0.9
+        self.removed_by_category = None
+        self.edited = False
+
+
+class FakeComment:
+    """Just the comment attributes the comment stage reads."""
+
+    def __init__(self, post_id, index):
+        self.id = f"{post_id}c{index:05d}"
+        # Every fifth comment is top-level, the next four reply to it
+        top = index - index % 5
+        self.parent_id = f"t3_{post_id}" if index == top else f"t1_{post_id}c{top:05d}"
+        self.author = f"user_{index % 1000:03d}"
+        self.body = f"Comment {index} on {post_id}"
+        self.score = index % 50
+        self.created_utc = 1_700_000_000 + index
+        self.replies = []
+
+
+class FakeMoreComments(MoreComments):
+    """
+    A "load more comments" placeholder; expanding it costs one request.
+
+    Like asyncpraw's, it needs its `submission` set to expand, and some
+    expansions end in another MoreComments for the rest of their
+    children (a "continue this thread").
+    """
+
+    def __init__(self, reddit, post_id, indices):
+        super().__init__(reddit, {
+            "count": len(indices),
+            "children": [f"{post_id}c{i:05d}" for i in indices],
+            "parent_id": f"t3_{post_id}",
+            "name": f"t1__{post_id}_{indices[0]}",
+        })
+        self.post_id = post_id
+        self.indices = indices
+
+    async def comments(self, *, update=True):
+        # asyncpraw builds the request from the submission; unset, this raises AttributeError
+        if self.submission.id != self.post_id:
+            raise ValueError(f"MoreComments of {self.post_id} attached to {self.submission.id}")
+        await self._reddit.fetch_page()
+        indices = self.indices
+        # Every third group leaves its second half for another request
+        nested = len(indices) > 1 and indices[0] % (3 * MORE_CHILDREN) == 0
+        split = len(indices) // 2 if nested else len(indices)
+        comments = [FakeComment(self.post_id, i) for i in indices[:split]]
+        if nested:
+            comments.append(FakeMoreComments(self._reddit, self.post_id, indices[split:]))
+        if update:
+            # asyncpraw attaches what it fetched to the submission
+            for comment in comments:
+                comment.submission = self.submission
+        return comments
+
+
+class FakeSubmission:
+    """
+    A submission fetched with its comments: the first FIRST_PAGE_COMMENTS
+    as a tree, the rest behind one MoreComments per MORE_CHILDREN.
+    """
+
+    def __init__(self, reddit, post_id, count):
+        self.id = post_id
+        first = min(count, FIRST_PAGE_COMMENTS)
+        comments = [FakeComment(post_id, i) for i in range(first)]
+        tops = {}
+        self.comments = []
+        for comment in comments:
+            if comment.parent_id.startswith("t3_"):
+                tops[comment.id] = comment
+                self.comments.append(comment)
+            else:
+                tops[comment.parent_id[3:]].replies.append(comment)
+        for start in range(first, count, MORE_CHILDREN):
+            more = FakeMoreComments(reddit, post_id, list(range(start, min(count, start + MORE_CHILDREN))))
+            # asyncpraw's CommentForest sets it on the MoreComments of the first page
+            more.submission = self
+            self.comments.append(more)
+
+
+class FakeAuth:
+    def __init__(self, reddit):
+        self._reddit = reddit
+
+    @property
+    def limits(self):
+        # What RateLimitRequestor parses from the X-Ratelimit-* headers
+        return {
+            "remaining": self._reddit.remaining,
+            "used": self._reddit.used,
+            "reset_at": self._reddit.window_start + self._reddit.window,
+        }
+
+
+class FakeSubreddit:
+    def __init__(self, reddit, name):
+        self._reddit = reddit
+        self.display_name = name
+
+    def search(self, query, sort="new", limit=100, syntax=None, **generator_kwargs):
+        # Like asyncpraw's, adds the query to a copy of `params`: None fails
+        params = copy.deepcopy(generator_kwargs["params"]) if "params" in generator_kwargs else {}
+        params.update(q=query, sort=sort, syntax=syntax)
+        if self._reddit.posts_per_hour is not None:
+            return self._reddit.history(self.display_name, query, limit)
+        return self._reddit.listing(self.display_name, f"search:{query}", limit, params.get("after"))
+
+    def new(self, limit=100, params=None, **kwargs):
+        return self._reddit.listing(self.display_name, "new", limit, (params or {}).get("after"))
+
+
+class FakeReddit:
+    """
+    In-process stand-in for `asyncpraw.Reddit`.
+
+    - every listing page (100 items) sleeps `latency` seconds
+    - keeps a Reddit-style budget of `budget` requests per `window` seconds,
+      exposed through `auth.limits`; pages fetched with no budget left are
+      counted in `throttled` (what Reddit would answer with a 429), and
+      with `strict` they raise TooManyRequests instead of being served
+    - `error_rate` is the share of page fetches that fail with a 5xx
+    - `crash_at` makes that page fetch (1-based, across all listings) raise
+      a non-retryable error, like a run that dies mid-listing
+    - `overlap` is the share of each listing's posts that also appear in
+      every other listing of the same subreddit
+    - `comments_per_post(post_id)` sizes each post's comment thread
+    - with `posts_per_hour(keyword)`, searches serve a keyword history
+      instead: one post every 3600 // rate seconds back from HISTORY_END,
+      newest first, at most SEARCH_CAP per query, and restricted to the
+      window of a cloudsearch `(and timestamp:START..END 'keyword')` query
+    - `info()` serves 100 fullnames per request; about 1 in 40 posts is
+      gone, 1 in 25 removed by moderators and 1 in 10 edited
+    """
+
+    def __init__(self, *, latency=0.05, posts_per_listing=300, overlap=0.5,
+                 budget=100, window=60.0, strict=False, error_rate=0.0, seed=0,
+                 crash_at=None, comments_per_post=lambda post_id: 0, posts_per_hour=None):
+        self.latency = latency
+        self.posts_per_listing = posts_per_listing
+        self.overlap = overlap
+        self.budget = budget
+        self.window = window
+        self.strict = strict
+        self.error_rate = error_rate
+        self.crash_at = crash_at
+        self.comments_per_post = comments_per_post
+        self.posts_per_hour = posts_per_hour
+        self.random = random.Random(seed)
+        self.remaining = budget
+        self.used = 0
+        self.window_start = time.monotonic()
+        self.requests = 0
+        self.throttled = 0
+        self.errors = 0
+        self.closed = False
+        self.auth = FakeAuth(self)
+
+    async def subreddit(self, name):
+        return FakeSubreddit(self, name)
+
+    async def submission(self, id=None, fetch=True):
+        if not fetch:
+            # Lazy, like asyncpraw's: just the ID, no request and no comments
+            return FakeSubmission(self, id, 0)
+        await self.fetch_page()
+        return FakeSubmission(self, id, self.comments_per_post(id))
+
+    async def info(self, fullnames=None):
+        for start in range(0, len(fullnames), 100):
+            await self.fetch_page()
+            for fullname in fullnames[start:start + 100]:
+                post_id = fullname[3:]
+                checksum = zlib.crc32(post_id.encode())
+                if checksum % 40 == 0:
+                    continue
+                post = FakePost(post_id, "fake", 1_700_000_000, f"Body of {post_id}")
+                if checksum % 25 == 0:
+                    post.removed_by_category = "moderator"
+                    post.selftext = "[removed]"
+                if checksum % 10 == 0:
+                    post.edited = 1_700_000_600.0
+                yield post
+
+    async def close(self):
+        self.closed = True
+
+    async def fetch_page(self):
+        now = time.monotonic()
+        if now - self.window_start >= self.window:
+            self.window_start = now
+            self.remaining = self.budget
+            self.used = 0
+
+        self.requests += 1
+        # Concurrent fetches bump the counter while this one sleeps
+        request = self.requests
+        await asyncio.sleep(self.latency)
+        if request == self.crash_at:
+            raise RuntimeError(f"simulated crash on page request {request}")
+
+        if self.remaining <= 0:
+            self.throttled += 1
+            if self.strict:
+                retry_after = self.window_start + self.window - now
+                raise TooManyRequests(_response(429, {"retry-after": f"{retry_after:.1f}"}))
+        else:
+            self.remaining -= 1
+            self.used += 1
+
+        if self.random.random() < self.error_rate:
+            self.errors += 1
+            raise ServerError(_response(503))
+
+    def listing(self, community, source, limit, after=None):
+        return FakeListing(self, community, source, limit, after)
+
+    def history(self, community, query, limit):
+        match = WINDOW_QUERY.match(query)
+        if match is None:
+            return FakeHistoryListing(self, community, query, 0, HISTORY_END, limit)
+        start, end, keyword = match.groups()
+        return FakeHistoryListing(self, community, keyword, int(start), int(end), limit)
+
+
+class FakeHistoryListing:
+    """One keyword's history between `start` and `end`, newest first."""
+
+    def __init__(self, reddit, community, keyword, start, end, limit):
+        self._reddit = reddit
+        self.community = community
+        self.tag = zlib.crc32(keyword.encode()) % 10_000
+        self.spacing = max(1, 3600 // reddit.posts_per_hour(keyword))
+        # Post i was created at HISTORY_END - i * spacing
+        self.index = self.fetched = max(0, -(-(HISTORY_END - end) // self.spacing))
+        last = (HISTORY_END - start) // self.spacing
+        self.end = min(last + 1, self.index + min(limit or SEARCH_CAP, SEARCH_CAP))
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.index >= self.end:
+            raise StopAsyncIteration
+        if self.index == self.fetched:
+            await self._reddit.fetch_page()
+            self.fetched = min(self.end, self.fetched + 100)
+
+        index = self.index
+        self.index += 1
+        post_id = f"{self.community}{self.tag:04d}h{index:06d}"
+        created_utc = HISTORY_END - index * self.spacing
+        return FakePost(post_id, self.community, created_utc, f"Body of {post_id}")
+
+
+def _response(status, headers=None):
+    return SimpleNamespace(status=status, headers=headers or {}, text="")
+
+
+class FakeListing:
+    """
+    Async iterator over one listing. Like asyncpraw's ListingGenerator, a
+    page fetch that raises leaves the position unchanged, so the next
+    `__anext__` fetches the same page again.
+    """
+
+    def __init__(self, reddit, community, source, limit, after=None):
+        self._reddit = reddit
+        self.community = community
+        self.source = source
+        length = reddit.posts_per_listing
+        self.shared = int(length * reddit.overlap)
+        # `after` is a post fullname ("t3_<id>"); paging resumes below it
+        start = 0
+        if after is not None:
+            start = next(i + 1 for i in range(length) if f"t3_{self._post_id(i)}" == after)
+        self.index = self.fetched = start
+        self.end = min(length, start + limit)
+
+    def _post_id(self, index):
+        if index < self.shared:
+            return f"{self.community}s{index:05d}"
+        return f"{self.community}{zlib.crc32(self.source.encode()) % 10_000:04d}u{index:05d}"
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.index >= self.end:
+            raise StopAsyncIteration
+        if self.index == self.fetched:
+            await self._reddit.fetch_page()
+            self.fetched = min(self.end, self.fetched + 100)
+
+        index = self.index
+        self.index += 1
+        post_id = self._post_id(index)
+        return FakePost(post_id, self.community, 1_700_000_000 - index * 60, f"Body of {post_id}")
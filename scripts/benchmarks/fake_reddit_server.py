@@ -0,0 +1,230 @@
+"""
+Local HTTP stand-in for the Reddit API, serving FakeReddit's data.
+
+Speaks just enough of Reddit's API for asyncpraw: the OAuth token
+endpoint, subreddit search and new listings (paged with `after`) and
+/api/info. Every OAuth app (client ID) gets its own FakeReddit, so its
+own simulated latency, error rate and rate-limit budget; responses carry
+Reddit's X-Ratelimit-* headers and a request past the budget gets a 429
+with Retry-After. GET /__fake/stats returns the API request, 429 and
+error counts.
+
+    python scripts/benchmarks/fake_reddit_server.py --port 8765 --latency 0.05
+
+prints its base URL and serves until interrupted. Point the scrapers at
+it with fake credentials and a scratch data folder:
+
+    REDDIT_URL=http://127.0.0.1:8765 REDDIT_OAUTH_URL=http://127.0.0.1:8765 \\
+    REDDIT_CREDENTIALS="app1:secret app2:secret" REDDIT_DATA_DIR=/tmp/fake_data \\
+    python scripts/scheduler.py
+"""
+import argparse
+import asyncio
+import itertools
+import time
+
+from aiohttp import BasicAuth, web
+
+from fake_reddit import FakeReddit, FakeSubreddit
+
+from asyncprawcore.exceptions import ServerError, TooManyRequests
+
+# Reddit pages listings 25 items at a time unless asked for up to 100
+DEFAULT_LIMIT = 25
+MAX_LIMIT = 100
+
+
+def _thing(post):
+    """A FakePost as a t3 listing child."""
+    return {
+        "kind": "t3",
+        "data": {
+            "id": post.id,
+            "name": f"t3_{post.id}",
+            "title": post.title,
+            "selftext": post.selftext,
+            "author": post.author,
+            "subreddit": post.subreddit,
+            "created_utc": float(post.created_utc),
+            "url": post.url,
+            "permalink": f"/r/{post.subreddit}/comments/{post.id}/",
+            "score": post.score,
+            "num_comments": post.num_comments,
+            "upvote_ratio": post.upvote_ratio,
+            "removed_by_category": post.removed_by_category,
+            "edited": post.edited,
+        },
+    }
+
+
+def _listing(posts, after=None):
+    return {
+        "kind": "Listing",
+        "data": {
+            "after": after,
+            "before": None,
+            "dist": len(posts),
+            "children": [_thing(post) for post in posts],
+        },
+    }
+
+
+class FakeRedditServer:
+    """
+    aiohttp application over one FakeReddit per OAuth app; `options` are
+    FakeReddit keyword arguments (`strict` is always on, so a request past
+    the budget is answered with a 429 instead of being served).
+    """
+
+    def __init__(self, **options):
+        self.options = {**options, "strict": True}
+        self.backends = {}
+        self.tokens = {}
+        self.token_fetches = 0
+        self.requests = 0
+        self._token_ids = itertools.count(1)
+        self.app = web.Application()
+        self.app.add_routes([
+            web.post("/api/v1/access_token", self.access_token),
+            web.get(r"/r/{community}/search{slash:/?}", self.search),
+            web.get(r"/r/{community}/new{slash:/?}", self.new),
+            web.get(r"/api/info{slash:/?}", self.info),
+            web.get("/__fake/stats", self.stats),
+        ])
+
+    async def access_token(self, request):
+        try:
+            client_id = BasicAuth.decode(request.headers.get("Authorization", "")).login
+        except ValueError:
+            return web.json_response({"error": "invalid_client"}, status=401)
+
+        self.token_fetches += 1
+        if client_id not in self.backends:
+            self.backends[client_id] = FakeReddit(**self.options)
+        token = f"{client_id}-{next(self._token_ids)}"
+        self.tokens[token] = client_id
+        return web.json_response(
+            {"access_token": token, "token_type": "bearer", "expires_in": 86400, "scope": "*"}
+        )
+
+    async def search(self, request):
+        query = request.query
+        return await self._page(
+            request,
+            lambda reddit, limit, params: FakeSubreddit(reddit, request.match_info["community"]).search(
+                query.get("q", ""), sort=query.get("sort", "new"), limit=limit,
+                params=params, syntax=query.get("syntax"),
+            ),
+        )
+
+    async def new(self, request):
+        return await self._page(
+            request,
+            lambda reddit, limit, params: FakeSubreddit(reddit, request.match_info["community"]).new(
+                limit=limit, params=params
+            ),
+        )
+
+    async def info(self, request):
+        fullnames = [name for name in request.query.get("id", "").split(",") if name]
+
+        async def fetch(reddit):
+            return _listing([post async for post in reddit.info(fullnames=fullnames[:MAX_LIMIT])])
+
+        return await self._serve(request, fetch)
+
+    async def stats(self, request):
+        backends = self.backends.values()
+        return web.json_response({
+            "apps": len(self.backends),
+            "token_fetches": self.token_fetches,
+            "requests": self.requests,
+            "throttled": sum(reddit.throttled for reddit in backends),
+            "errors": sum(reddit.errors for reddit in backends),
+        })
+
+    async def _page(self, request, open_listing):
+        """One listing page: up to `limit` posts after the `after` fullname."""
+        limit = min(int(request.query.get("limit", DEFAULT_LIMIT)), MAX_LIMIT)
+        after = request.query.get("after")
+
+        async def fetch(reddit):
+            listing = open_listing(reddit, limit, {"after": after} if after else {})
+            posts = [post async for post in listing]
+            # Like Reddit, a full page points at the next one
+            return _listing(posts, f"t3_{posts[-1].id}" if len(posts) == limit else None)
+
+        return await self._serve(request, fetch)
+
+    async def _serve(self, request, fetch):
+        """Run `fetch` on the caller's FakeReddit and map its outcome to HTTP."""
+        token = request.headers.get("Authorization", "").removeprefix("bearer ")
+        client_id = self.tokens.get(token)
+        if client_id is None:
+            return web.json_response({"message": "Unauthorized", "error": 401}, status=401)
+
+        self.requests += 1
+        reddit = self.backends[client_id]
+        try:
+            payload = await fetch(reddit)
+        except TooManyRequests as e:
+            return web.json_response(
+                {"message": "Too Many Requests", "error": 429},
+                status=429,
+                headers={**self._limit_headers(reddit), **e.response.headers},
+            )
+        except ServerError:
+            return web.json_response({"message": "Service Unavailable", "error": 503}, status=503)
+        except RuntimeError as e:
+            return web.json_response({"message": str(e), "error": 500}, status=500)
+        return web.json_response(payload, headers=self._limit_headers(reddit))
+
+    @staticmethod
+    def _limit_headers(reddit):
+        limits = reddit.auth.limits
+        reset = max(0.0, limits["reset_at"] - time.monotonic())
+        return {
+            "x-ratelimit-remaining": str(float(max(limits["remaining"], 0))),
+            "x-ratelimit-used": str(limits["used"]),
+            "x-ratelimit-reset": str(int(reset)),
+        }
+
+
+async def serve(server, host="127.0.0.1", port=0):
+    """Serve until cancelled, after printing the base URL (`port` 0 picks a free one)."""
+    runner = web.AppRunner(server.app, access_log=None)
+    await runner.setup()
+    try:
+        site = web.TCPSite(runner, host, port)
+        await site.start()
+        bound_host, bound_port = runner.addresses[0][:2]
+        print(f"http://{bound_host}:{bound_port}", flush=True)
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve a fake Reddit API locally.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0, help="0 picks a free port")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds per request")
+    parser.add_argument("--posts-per-listing", type=int, default=300)
+    parser.add_argument("--overlap", type=float, default=0.5)
+    parser.add_argument("--budget", type=int, default=100, help="requests per window, per app")
+    parser.add_argument("--window", type=float, default=60.0, help="rate-limit window in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered 503")
+    args = parser.parse_args()
+
+    server = FakeRedditServer(
+        latency=args.latency,
+        posts_per_listing=args.posts_per_listing,
+        overlap=args.overlap,
+        budget=args.budget,
+        window=args.window,
+        error_rate=args.error_rate,
+    )
+    try:
+        asyncio.run(serve(server, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
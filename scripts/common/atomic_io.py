@@ -0,0 +1,192 @@
+import os
+import shutil
+import sys
+import threading
+from contextlib import contextmanager
+
+if sys.platform == "win32":
+    import msvcrt
+else:
+    import fcntl
+
+LOCK_NAME = ".lock"
+
+
+def fsync_dir(path):
+    """Persist a directory entry change (rename, new file). No-op on Windows."""
+    if sys.platform == "win32":
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def fsync_path(path):
+    """fsync a file, or every file and directory under a directory."""
+    if not os.path.isdir(path):
+        with open(path, "rb+") as f:
+            os.fsync(f.fileno())
+        return
+
+    for folder, _, filenames in os.walk(path):
+        for filename in filenames:
+            fsync_path(os.path.join(folder, filename))
+        fsync_dir(folder)
+
+
+def remove_path(path):
+    if os.path.isdir(path):
+        shutil.rmtree(path, ignore_errors=True)
+    elif os.path.exists(path):
+        os.remove(path)
+
+
+@contextmanager
+def atomic_path(path):
+    """
+    Yield a temporary path to write `path`'s new content to.
+
+    On success the temporary file is fsynced and renamed over `path`, so
+    readers (and a crash at any point) see either the old or the new
+    content, never a partial write. On error it is removed.
+    """
+    tmp_path = f"{path}.tmp"
+    remove_path(tmp_path)
+    try:
+        yield tmp_path
+        fsync_path(tmp_path)
+        os.replace(tmp_path, path)
+        fsync_dir(os.path.dirname(os.path.abspath(path)))
+    except BaseException:
+        remove_path(tmp_path)
+        raise
+
+
+def replace_dir(tmp_path, path):
+    """
+    Swap a fully written directory in for `path`.
+
+    Directories can't be renamed over non-empty ones, so the old one is
+    first moved to `<path>.old`; `recover_path` restores it if a crash
+    lands between the two renames.
+    """
+    fsync_path(tmp_path)
+    old_path = f"{path}.old"
+    remove_path(old_path)
+    if os.path.exists(path):
+        os.replace(path, old_path)
+    os.replace(tmp_path, path)
+    fsync_dir(os.path.dirname(os.path.abspath(path)))
+    remove_path(old_path)
+
+
+def recover_path(path):
+    """Undo a `replace_dir` or `atomic_path` interrupted by a crash."""
+    old_path = f"{path}.old"
+    if os.path.exists(old_path) and not os.path.exists(path):
+        os.replace(old_path, path)
+    remove_path(old_path)
+    remove_path(f"{path}.tmp")
+
+
+# Data folder -> [open lock file, hold count] for locks this process holds
+_held = {}
+# Data folder -> RLock keeping this process' threads apart
+_thread_locks = {}
+_held_guard = threading.Lock()
+
+
+def _try_lock(f):
+    try:
+        if sys.platform == "win32":
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        return False
+    return True
+
+
+def _lock(f):
+    if sys.platform == "win32":
+        # LK_LOCK itself gives up after ~10s; keep retrying
+        while True:
+            try:
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                continue
+    fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+
+def _unlock(f):
+    if sys.platform == "win32":
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def _hold(key):
+    """Take the cross-process lock on data folder `key`, once per process."""
+    with _held_guard:
+        held = _held.get(key)
+        if held is not None:
+            held[1] += 1
+            return
+        f = open(os.path.join(key, LOCK_NAME), "a+")
+        f.seek(0)
+        if not _try_lock(f):
+            print(f"Waiting for another run to release {os.path.join(key, LOCK_NAME)} ...")
+            _lock(f)
+        _held[key] = [f, 1]
+
+
+def _release(key):
+    with _held_guard:
+        held = _held[key]
+        held[1] -= 1
+        if held[1] == 0:
+            del _held[key]
+            _unlock(held[0])
+            held[0].close()
+
+
+@contextmanager
+def run_lock(folder):
+    """
+    Keep other processes (e.g. a cron run and a local scheduler loop) out
+    of a data folder for a whole run, across awaits.
+
+    Only the cross-process half of `data_lock`: the run's own reads and
+    writes, from the event loop or worker threads, still take data_lock.
+    """
+    key = os.path.abspath(folder)
+    _hold(key)
+    try:
+        yield
+    finally:
+        _release(key)
+
+
+@contextmanager
+def data_lock(folder):
+    """
+    Exclusive lock on a data folder, across processes and across the
+    threads of this one, so read-merge-writes can't interleave.
+
+    Re-entrant within a thread. It is held by the thread that took it,
+    so never keep it across an await: use `run_lock` for that.
+    """
+    key = os.path.abspath(folder)
+    with _held_guard:
+        thread_lock = _thread_locks.setdefault(key, threading.RLock())
+
+    with thread_lock:
+        _hold(key)
+        try:
+            yield
+        finally:
+            _release(key)
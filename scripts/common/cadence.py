@@ -0,0 +1,125 @@
+import heapq
+import json
+import os
+import time
+
+from common.atomic_io import atomic_path, data_lock
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+TEMP_CSV_FOLDER = os.environ.get("REDDIT_DATA_DIR", os.path.join(BASE_DIR, "data_tmp"))
+CADENCE_FILE = os.path.join(TEMP_CSV_FOLDER, "cadence.json")
+
+os.makedirs(TEMP_CSV_FOLDER, exist_ok=True)
+
+# Polling intervals stay within these bounds whatever the post rate
+MIN_INTERVAL_SECS = 5 * 60
+MAX_INTERVAL_SECS = 6 * 60 * 60
+# Interval of a source whose post rate is not known yet
+DEFAULT_INTERVAL_SECS = 60 * 60
+
+# A poll should find about one full listing page (100 posts) of new
+# posts: busy sources are polled as soon as a request is worth it, quiet
+# ones rarely, since every poll costs at least one request
+TARGET_POSTS_PER_POLL = 100
+
+# Weight of the latest poll in the smoothed post rate
+RATE_SMOOTHING = 0.5
+
+
+class SourceCadence:
+    """Smoothed post rate (posts per second) of one source, and its last poll."""
+
+    def __init__(self, name, rate=None, polled_at=None):
+        self.name = name
+        self.rate = rate
+        self.polled_at = polled_at
+
+    def interval(self):
+        """Seconds until the source is expected to have TARGET_POSTS_PER_POLL new posts."""
+        if self.rate is None:
+            return DEFAULT_INTERVAL_SECS
+        if self.rate <= 0:
+            return MAX_INTERVAL_SECS
+        return min(MAX_INTERVAL_SECS, max(MIN_INTERVAL_SECS, TARGET_POSTS_PER_POLL / self.rate))
+
+    def observe(self, new_posts, now):
+        """Fold one poll's new posts (since the previous poll) into the rate."""
+        if self.polled_at is not None and now > self.polled_at:
+            rate = new_posts / (now - self.polled_at)
+            if self.rate is None:
+                self.rate = rate
+            else:
+                self.rate = RATE_SMOOTHING * rate + (1 - RATE_SMOOTHING) * self.rate
+        self.polled_at = now
+
+
+class CadenceScheduler:
+    """
+    Priority queue of sources (keywords, communities) by next poll time.
+
+    Each source's interval follows its observed post rate, so busy sources
+    are polled often and quiet ones rarely. Times are wall-clock seconds so
+    the learned cadence (see `load_cadence`) survives restarts: a source
+    polled recently is not polled again just because the daemon restarted.
+    """
+
+    def __init__(self, names, state=None, now=None):
+        now = time.time() if now is None else now
+        state = state or {}
+        self.sources = {}
+        self._heap = []
+        for name in names:
+            saved = state.get(name, {})
+            source = SourceCadence(name, saved.get("rate"), saved.get("polled_at"))
+            self.sources[name] = source
+            due = now if source.polled_at is None else source.polled_at + source.interval()
+            heapq.heappush(self._heap, (due, name))
+
+    def next_due(self):
+        """Wall time the next source is due."""
+        return self._heap[0][0]
+
+    def pop_due(self, now=None):
+        """Remove and return every source due by `now`, most overdue first."""
+        now = time.time() if now is None else now
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            due.append(heapq.heappop(self._heap)[1])
+        return due
+
+    def record(self, name, new_posts, now=None):
+        """Record a finished poll and queue the source's next one; returns its interval."""
+        now = time.time() if now is None else now
+        source = self.sources[name]
+        source.observe(new_posts, now)
+        interval = source.interval()
+        heapq.heappush(self._heap, (now + interval, name))
+        return interval
+
+    def retry(self, name, now=None):
+        """Queue a failed poll again after MIN_INTERVAL_SECS, leaving its rate as is."""
+        now = time.time() if now is None else now
+        heapq.heappush(self._heap, (now + MIN_INTERVAL_SECS, name))
+        return MIN_INTERVAL_SECS
+
+    def state(self):
+        return {
+            name: {"rate": source.rate, "polled_at": source.polled_at}
+            for name, source in self.sources.items()
+        }
+
+
+def load_cadence(path=CADENCE_FILE):
+    """Load the saved per-source post rates and poll times (empty if none)."""
+    if not os.path.exists(path):
+        return {}
+
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_cadence(state, path=CADENCE_FILE):
+    with data_lock(os.path.dirname(path)):
+        with atomic_path(path) as tmp_path:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(state, f, indent=2, sort_keys=True)
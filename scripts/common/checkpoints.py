@@ -0,0 +1,144 @@
+import json
+import os
+
+from common.atomic_io import atomic_path, data_lock
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+TEMP_CSV_FOLDER = os.environ.get("REDDIT_DATA_DIR", os.path.join(BASE_DIR, "data_tmp"))
+CHECKPOINT_FILE = os.path.join(TEMP_CSV_FOLDER, "checkpoints.json")
+CURSOR_FILE = os.path.join(TEMP_CSV_FOLDER, "cursors.json")
+WINDOW_FILE = os.path.join(TEMP_CSV_FOLDER, "windows.json")
+
+os.makedirs(TEMP_CSV_FOLDER, exist_ok=True)
+
+# Paging stops at posts older than (newest seen - overlap); the overlap
+# re-reads a little so posts indexed late by Reddit search are not missed.
+INCREMENTAL_OVERLAP_SECS = 60 * 60
+
+
+def keyword_key(label: str, keyword: str):
+    return f"{label}::{keyword}"
+
+
+def community_key(community: str):
+    return f"r/{community}"
+
+
+def load_checkpoints(path=CHECKPOINT_FILE):
+    """
+    Load the per-source high-water marks.
+
+    Returns a dict of key -> {"id": newest post ID, "created_utc": its timestamp};
+    an empty dict if nothing has been recorded yet.
+    """
+    if not os.path.exists(path):
+        return {}
+
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def update_checkpoints(updates, path=CHECKPOINT_FILE):
+    """
+    Merge new high-water marks into the checkpoint file.
+
+    A mark only ever moves forward. The read-merge-write holds the data
+    folder lock, so neither other threads (async callers run it in a
+    worker thread) nor other processes can clobber it.
+    """
+    if not updates:
+        return
+
+    with data_lock(os.path.dirname(path)):
+        checkpoints = load_checkpoints(path)
+        for key, mark in updates.items():
+            current = checkpoints.get(key)
+            if current is None or mark["created_utc"] > current["created_utc"]:
+                checkpoints[key] = mark
+
+        with atomic_path(path) as tmp_path:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(checkpoints, f, indent=2, sort_keys=True)
+
+
+def stop_before(mark):
+    """Return the created_utc below which paging can stop, or None to fetch everything."""
+    if not mark:
+        return None
+    return mark["created_utc"] - INCREMENTAL_OVERLAP_SECS
+
+
+def load_cursors(path=CURSOR_FILE):
+    """
+    Load the cursors of listings whose last run was interrupted.
+
+    Returns a dict of key (as for checkpoints) -> {"after": fullname of the
+    last written post, "fetched": posts paged so far, "newest": the
+    interrupted run's high-water mark}.
+    """
+    if not os.path.exists(path):
+        return {}
+
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_cursor(key, cursor, path=CURSOR_FILE):
+    """Record one listing's cursor, or clear it with `cursor=None`."""
+    with data_lock(os.path.dirname(path)):
+        cursors = load_cursors(path)
+        if cursor is None:
+            if key not in cursors:
+                return
+            del cursors[key]
+        else:
+            cursors[key] = cursor
+
+        with atomic_path(path) as tmp_path:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(cursors, f, indent=2, sort_keys=True)
+
+
+def load_windows(path=WINDOW_FILE):
+    """
+    Load the completed windows of historical keyword backfills.
+
+    Returns a dict of key (as for checkpoints) -> sorted, non-overlapping
+    [start, end] created_utc ranges (inclusive) that were fully searched.
+    """
+    if not os.path.exists(path):
+        return {}
+
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def mark_window_done(key, start, end, path=WINDOW_FILE):
+    """Record [start, end] as searched for `key`, merged with adjacent windows."""
+    with data_lock(os.path.dirname(path)):
+        windows = load_windows(path)
+        merged = []
+        for done_start, done_end in sorted(windows.get(key, []) + [[start, end]]):
+            if merged and done_start <= merged[-1][1] + 1:
+                merged[-1][1] = max(merged[-1][1], done_end)
+            else:
+                merged.append([done_start, done_end])
+        windows[key] = merged
+
+        with atomic_path(path) as tmp_path:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(windows, f, indent=2, sort_keys=True)
+
+
+def pending_windows(done, start, end):
+    """The gaps in [start, end] not covered by the `done` windows."""
+    gaps = []
+    for done_start, done_end in done:
+        if done_end < start or done_start > end:
+            continue
+        if done_start > start:
+            gaps.append((start, done_start - 1))
+        start = max(start, done_end + 1)
+    if start <= end:
+        gaps.append((start, end))
+    return gaps
@@ -1,21 +1,43 @@
+import multiprocessing
 import os
-import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from common.atomic_io import data_lock
+from common.dedupe_index import DedupeIndex, row_digests
+from common.dedupe_manifest import covers, is_unchanged, load_manifest, manifest_key, save_manifest
+from common.near_dupes import (
+    append_signatures,
+    load_signatures,
+    near_duplicate_mask,
+    remove_signatures,
+    save_signatures,
+    signature_mask,
+    signatures_of_chunks,
+    tail_mask,
+)
+from common.storage import CHUNK_ROWS, get_storage
 
 # Go from /scripts/common/ → /scripts/ → /Reddit_scraper/
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
 
-TEMP_CSV_FOLDER = os.path.join(BASE_DIR, "data_tmp")
+TEMP_CSV_FOLDER = os.environ.get("REDDIT_DATA_DIR", os.path.join(BASE_DIR, "data_tmp"))
 os.makedirs(TEMP_CSV_FOLDER, exist_ok=True)
 
-def clean_dataframe(df, text_column="Text"):
+def clean_dataframe(df, text_column="Text", index=None, near_dup_threshold=None):
     """
     Clean a dataframe of Reddit posts.
 
     Operations:
     - remove rows where text is NaN
     - remove rows where text is empty/whitespace
-    - remove duplicate texts
-    - return cleaned df + removal stats
+    - optionally (`near_dup_threshold`, e.g. 0.8) remove rows whose text is
+      a near-duplicate of an earlier row in `df` (MinHash-LSH over word
+      shingles, ignoring case, URLs and punctuation)
+    - remove duplicate IDs and duplicate (normalized) texts, including rows
+      already recorded in `index` if a DedupeIndex is given
+    - return cleaned df + removal stats (near-duplicates count as duplicates)
     """
 
     before = len(df)
@@ -33,51 +55,230 @@ def clean_dataframe(df, text_column="Text"):
     after_text_filter = len(df)
     removed_empty = before - after_text_filter
 
-    # Deduplicate by text
     before_dedupe = len(df)
-    df = df.drop_duplicates(subset=[text_column])
+    if near_dup_threshold is not None:
+        df = df.loc[~near_duplicate_mask(df[text_column], near_dup_threshold)]
+
+    # Deduplicate by ID and text digests
+    if index is None:
+        index = DedupeIndex()
+    df = df.loc[index.add_new(*row_digests(df, text_column))]
     after_dedupe = len(df)
     removed_duplicate = before_dedupe - after_dedupe
 
     return df, removed_empty, removed_duplicate
 
 
-def deduplicate_merged_csvs(csv_folder, quiet=False):
+def _corpus_filename(storage, corpus):
+    return corpus if storage.name == "sqlite" else os.path.basename(storage.path(corpus))
+
+
+def _signatures_base(storage, corpus):
+    """Path the corpus' signature sidecar is named after; None for SQLite (never checked by tail)."""
+    return None if storage.name == "sqlite" else storage.path(corpus)
+
+
+def _dedupe_tail(storage, corpus, entry, near_dup_threshold, chunk_rows):
+    """
+    Dedupe only the rows appended since the pass recorded in `entry`: by
+    ID and text against the first `rows` rows of the index and, with
+    `near_dup_threshold`, by MinHash against the signatures that pass
+    saved. Appended rows that turn out to be duplicates are dropped by
+    rewriting just the tail.
+
+    Returns (rows now in the corpus, index, signatures of the kept
+    appended rows or None), or None when a full pass is needed: the corpus
+    was rewritten, or its index or signatures no longer match the
+    recorded rows.
+    """
+    tail = storage.tail_chunks(corpus, entry, chunk_rows=chunk_rows)
+    if tail is None:
+        return None
+    index = storage.prefix_index(corpus, entry["rows"], entry["pairs_hash"])
+    if index is None:
+        return None
+    kept_signatures = None
+    if near_dup_threshold is not None:
+        kept_signatures = load_signatures(_signatures_base(storage, corpus), entry["rows"])
+        if kept_signatures is None:
+            return None
+
+    # The rows of one cycle or so; the near-duplicate check needs them all
+    chunks = list(tail)
+    signatures = None
+    if kept_signatures is not None:
+        signatures, has_words = signatures_of_chunks(chunk["Text"] for chunk in chunks)
+        keep = ~tail_mask(kept_signatures, signatures, has_words, near_dup_threshold)
+    else:
+        keep = np.ones(sum(len(chunk) for chunk in chunks), dtype=bool)
+
+    kept_chunks = []
+    start = 0
+    for chunk in chunks:
+        # A view: rows dropped here are dropped from `keep` too
+        chunk_keep = keep[start:start + len(chunk)]
+        start += len(chunk)
+        candidates = np.flatnonzero(chunk_keep)
+        unique = np.array(index.add_new(*row_digests(chunk.iloc[candidates])), dtype=bool)
+        chunk_keep[candidates[~unique]] = False
+        kept_chunks.append(chunk.loc[chunk_keep])
+
+    if not keep.all():
+        storage.replace_tail(corpus, entry, kept_chunks)
+    return entry["rows"] + int(keep.sum()), index, None if signatures is None else signatures[keep]
+
+
+def _dedupe_corpus(csv_folder, backend, corpus, near_dup_threshold=None, entry=None, chunk_rows=CHUNK_ROWS):
     """
-    Deduplicate all *_merged.csv files in a folder.
+    Deduplicate one corpus; returns its result dict, including the new
+    `manifest` entry.
 
-    Operations per file:
-    - drop duplicates by ID
-    - drop duplicates by Text
-    - overwrite the CSV in place
+    If `entry` shows the corpus was only appended to since a pass that
+    covers this one (same near-duplicate threshold), only the appended
+    rows are checked and, if some are duplicates, rewritten. Otherwise the
+    whole corpus is streamed once: only one chunk of rows and the digest
+    sets of the kept rows (plus, for a near-duplicate pass, their MinHash
+    signatures) are in memory at a time, and kept chunks go to a temporary
+    copy that replaces the corpus at the end, so an interrupted run leaves
+    the old corpus intact.
 
-    Returns a list of dicts with filename, old_total, and new_total.
+    Near-duplicate passes save the signatures of the kept rows next to
+    file-based corpora, for the next pass's tail check.
     """
-    results = []
+    storage = get_storage(csv_folder, backend)
+    signatures_base = _signatures_base(storage, corpus)
+
+    tail = None
+    if entry is not None:
+        tail = _dedupe_tail(storage, corpus, entry, near_dup_threshold, chunk_rows)
 
-    for filename in os.listdir(csv_folder):
-        if not filename.endswith("_merged.csv"):
+    if tail is not None:
+        rows, index, signatures = tail
+        totals = {"old_total": entry["rows"], "new_total": rows}
+        index.save()
+        if signatures is not None:
+            append_signatures(signatures_base, signatures)
+    else:
+        near = signatures = None
+        if near_dup_threshold is not None:
+            texts = (
+                chunk["Text"]
+                for chunk in storage.iter_chunks(corpus, columns=["Text"], chunk_rows=chunk_rows)
+            )
+            signatures, has_words = signatures_of_chunks(texts)
+            near = signature_mask(signatures, has_words, near_dup_threshold)
+
+        index = storage.empty_index(corpus)
+        totals = {"old_total": 0, "new_total": 0}
+        kept_rows = []
+
+        def kept_chunks():
+            for chunk in storage.iter_chunks(corpus, chunk_rows=chunk_rows):
+                start = totals["old_total"]
+                totals["old_total"] += len(chunk)
+                positions = np.arange(start, start + len(chunk))
+                if near is not None:
+                    keep = ~near[start:start + len(chunk)]
+                    chunk, positions = chunk.loc[keep], positions[keep]
+                keep = np.array(index.add_new(*row_digests(chunk)), dtype=bool)
+                chunk = chunk.loc[keep]
+                kept_rows.append(positions[keep])
+                totals["new_total"] += len(chunk)
+                yield chunk
+
+        storage.write_chunks(corpus, kept_chunks())
+        index.save()
+        if signatures is not None and signatures_base is not None:
+            save_signatures(signatures_base, signatures[np.concatenate(kept_rows or [np.empty(0, dtype=int)])])
+
+    if near_dup_threshold is None and signatures_base is not None:
+        # Only trusted for the threshold the manifest records
+        remove_signatures(signatures_base)
+
+    manifest = {
+        **storage.fingerprint(corpus),
+        "hash": storage.content_hash(corpus),
+        "rows": totals["new_total"],
+        "pairs_hash": index.pairs_hash(),
+        "near_dup_threshold": near_dup_threshold,
+    }
+    return {"filename": _corpus_filename(storage, corpus), **totals, "incremental": tail is not None, "manifest": manifest}
+
+
+def _dedupe_changed_corpora(storage, csv_folder, near_dup_threshold, max_workers):
+    """Run `_dedupe_corpus` on every corpus changed since the manifest; returns corpus -> result."""
+    manifest = load_manifest(csv_folder)
+
+    results = {}
+    jobs = []
+    for corpus in storage.corpora():
+        storage.recover(corpus)
+        entry = manifest.get(manifest_key(storage.name, corpus))
+        if entry is not None and not covers(entry, near_dup_threshold):
+            entry = None
+        if entry is not None and is_unchanged(entry, storage.fingerprint(corpus)):
+            results[corpus] = {
+                "filename": _corpus_filename(storage, corpus),
+                "old_total": entry["rows"],
+                "new_total": entry["rows"],
+                "incremental": False,
+                "skipped": True,
+            }
             continue
+        jobs.append((csv_folder, storage.name, corpus, near_dup_threshold, entry))
 
-        file_path = os.path.join(csv_folder, filename)
-        df = pd.read_csv(file_path)
+    workers = min(len(jobs), max_workers or os.cpu_count() or 1)
+    if storage.name == "sqlite":
+        workers = 1
 
-        old_total = len(df)
-        df.drop_duplicates(subset=["ID"], inplace=True)
-        df.drop_duplicates(subset=["Text"], inplace=True)
-        new_total = len(df)
+    if workers > 1:
+        # Spawned, not forked: callers may have event-loop and worker threads running
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            done = list(pool.map(_dedupe_corpus, *zip(*jobs)))
+    else:
+        done = [_dedupe_corpus(*job) for job in jobs]
 
-        df.to_csv(file_path, index=False)
+    for job, result in zip(jobs, done):
+        corpus = job[2]
+        manifest[manifest_key(storage.name, corpus)] = result.pop("manifest")
+        results[corpus] = {**result, "skipped": False}
+    if jobs:
+        save_manifest(csv_folder, manifest)
+    return results
+
+
+def deduplicate_merged_csvs(csv_folder, quiet=False, near_dup_threshold=None, max_workers=None):
+    """
+    Deduplicate all merged corpora in a folder (*_merged.csv files, or
+    their equivalent in the configured storage backend).
 
-        result = {
-            "filename": filename,
-            "old_total": old_total,
-            "new_total": new_total,
-        }
-        results.append(result)
+    Operations per corpus:
+    - skip it if it is unchanged since its last pass (per the dedupe
+      manifest in the folder); if rows were only appended, check just those
+    - with `near_dup_threshold`, drop near-duplicate texts (keeping the
+      earliest row of each)
+    - drop duplicates by ID and by normalized Text (digest-based),
+      streaming the corpus in chunks
+    - atomically replace the corpus with the deduplicated copy
+    - rewrite its dedupe index to match, and record it in the manifest
+
+    The whole pass holds the data folder lock.
+
+    File-based corpora are processed in parallel in up to `max_workers`
+    processes (default: one per CPU); SQLite corpora share one database
+    file and run one after another.
+
+    Returns a list of dicts with filename, old_total, new_total and how
+    the corpus was handled (`skipped` / `incremental`).
+    """
+    storage = get_storage(csv_folder)
+    with data_lock(csv_folder):
+        results = _dedupe_changed_corpora(storage, csv_folder, near_dup_threshold, max_workers)
 
-        if not quiet:
-            print(f"Old total posts in {filename}: {old_total}")
-            print(f"New total posts after deduplication in {filename}: {new_total}")
+    results = [results[corpus] for corpus in sorted(results)]
+    if not quiet:
+        for result in results:
+            print(f"Old total posts in {result['filename']}: {result['old_total']}")
+            print(f"New total posts after deduplication in {result['filename']}: {result['new_total']}")
 
     return results
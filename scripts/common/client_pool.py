@@ -0,0 +1,81 @@
+from contextlib import asynccontextmanager
+
+from common.rate_limit import RateLimitBucket
+from common.reddit_client import RedditClient, rate_limits
+
+
+class PooledClient:
+    """One Reddit client with its own rate-limit bucket (one OAuth app's budget)."""
+
+    def __init__(self, reddit, bucket):
+        self.reddit = reddit
+        self.bucket = bucket
+        self.active = 0
+        self.listings = 0
+
+    def limits(self):
+        return rate_limits(self.reddit)
+
+
+class ClientPool:
+    """
+    Reddit clients (one per credential) that listings are spread over.
+
+    Every keyword search or subreddit listing leases one client for its
+    whole run; `lease()` picks the client with the most rate-limit budget
+    left per listing it is already serving, so adding credentials adds
+    throughput instead of queueing on one app's limit.
+    """
+
+    def __init__(self, clients, buckets=None):
+        buckets = buckets or [RateLimitBucket() for _ in clients]
+        self.members = [PooledClient(reddit, bucket) for reddit, bucket in zip(clients, buckets)]
+
+    def __len__(self):
+        return len(self.members)
+
+    @property
+    def reddit(self):
+        """The first client, for callers that do not spread their requests."""
+        return self.members[0].reddit
+
+    @asynccontextmanager
+    async def lease(self):
+        member = max(self.members, key=lambda m: m.bucket.available() / (m.active + 1))
+        member.active += 1
+        member.listings += 1
+        try:
+            yield member
+        finally:
+            member.active -= 1
+
+    def summary(self):
+        """
+        Per client: listings served, seconds spent waiting for budget and
+        backing off after 429/5xx answers, and the number of such retries.
+        """
+        return [
+            {
+                "listings": member.listings,
+                "waited": member.bucket.waited,
+                "backoff": member.bucket.backoff_waited,
+                "retries": member.bucket.retries,
+            }
+            for member in self.members
+        ]
+
+
+@asynccontextmanager
+async def borrowed_pool(pool=None, reddit=None, bucket=None):
+    """
+    Yield `pool` as-is, a one-client pool over `reddit` (paced by `bucket`
+    if given), or a pool over every configured credential that is closed
+    on exit even if the body raises.
+    """
+    if pool is not None:
+        yield pool
+    elif reddit is not None:
+        yield ClientPool([reddit], [bucket or RateLimitBucket()])
+    else:
+        async with RedditClient() as client:
+            yield ClientPool(client.clients)
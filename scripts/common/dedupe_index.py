@@ -0,0 +1,225 @@
+import hashlib
+import os
+from array import array
+
+import pandas as pd
+
+from common.atomic_io import atomic_path, fsync_path
+
+# Index file layout: 8-byte size of the data it describes, then one
+# (ID digest, text digest) pair of unsigned 64-bit ints per unique row.
+# If the data no longer has the recorded size it was rewritten by someone
+# else and the index is rebuilt from it.
+INDEX_SUFFIX = ".idx"
+
+REBUILD_CHUNK_ROWS = 100_000
+
+
+def digest(value):
+    """64-bit blake2b digest of a string."""
+    return int.from_bytes(
+        hashlib.blake2b(str(value).encode("utf-8"), digest_size=8).digest(), "little"
+    )
+
+
+def normalize_text(texts):
+    """Vectorized normalization used for text dedupe: lowercase, collapse whitespace."""
+    return (
+        texts.fillna("")
+        .astype(str)
+        .str.lower()
+        .str.replace(r"\s+", " ", regex=True)
+        .str.strip()
+    )
+
+
+def row_digests(df, text_column="Text"):
+    """Return (ID digests, normalized text digests) for a dataframe, as lists of ints."""
+    ids = [digest(value) for value in df["ID"].astype(str)]
+    texts = [digest(value) for value in normalize_text(df[text_column])]
+    return ids, texts
+
+
+def index_path(csv_path):
+    return csv_path + INDEX_SUFFIX
+
+
+def _data_size(path):
+    """Size of a CSV file, or total size of a dataset directory (e.g. Parquet)."""
+    if not os.path.exists(path):
+        return 0
+    if not os.path.isdir(path):
+        return os.path.getsize(path)
+
+    return sum(
+        os.path.getsize(os.path.join(root, filename))
+        for root, _, filenames in os.walk(path)
+        for filename in filenames
+    )
+
+
+class DedupeIndex:
+    """
+    Persistent set of seen post IDs and normalized texts for one merged corpus
+    (a CSV file, or a dataset directory for other storage backends).
+
+    Only 64-bit digests are held in memory, so membership checks are O(1)
+    and memory scales with row count, not text volume. With no `csv_path`
+    the index is in-memory only (used for one-off batch dedupe).
+    """
+
+    def __init__(self, csv_path=None):
+        self.csv_path = csv_path
+        self.ids = set()
+        self.texts = set()
+        # Flat (ID, text) digest pairs in insertion order; the tail from
+        # `_flushed` on hasn't been written to the sidecar yet
+        self._pairs = array("Q")
+        self._flushed = 0
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def load(cls, csv_path, chunks=None):
+        """
+        Load a corpus index from its sidecar, rebuilding it if missing or stale.
+
+        `chunks` is passed on to `rebuild` for non-CSV data.
+        """
+        index = cls(csv_path)
+        if not os.path.exists(csv_path):
+            return index
+
+        path = index_path(csv_path)
+        if not os.path.exists(path):
+            return cls.rebuild(csv_path, chunks=chunks)
+
+        stored = array("Q")
+        with open(path, "rb") as f:
+            stored.frombytes(f.read())
+
+        if not stored or stored[0] != _data_size(csv_path):
+            return cls.rebuild(csv_path, chunks=chunks)
+
+        index._pairs = stored[1:]
+        index._flushed = len(index._pairs)
+        index.ids = set(index._pairs[0::2])
+        index.texts = set(index._pairs[1::2])
+        return index
+
+    @classmethod
+    def load_prefix(cls, csv_path, rows, pairs_hash):
+        """
+        Index of only the first `rows` rows recorded in the sidecar, or None
+        if the sidecar is stale or no longer starts with the rows whose
+        `pairs_hash` was taken.
+        """
+        path = index_path(csv_path)
+        if not os.path.exists(path):
+            return None
+
+        stored = array("Q")
+        with open(path, "rb") as f:
+            stored.frombytes(f.read())
+        if not stored or stored[0] != _data_size(csv_path) or len(stored) < 1 + 2 * rows:
+            return None
+
+        index = cls(csv_path)
+        index._pairs = stored[1:1 + 2 * rows]
+        if index.pairs_hash() != pairs_hash:
+            return None
+        index._flushed = len(index._pairs)
+        index.ids = set(index._pairs[0::2])
+        index.texts = set(index._pairs[1::2])
+        return index
+
+    @classmethod
+    def rebuild(cls, csv_path, text_column="Text", chunks=None):
+        """
+        Rebuild an index, reading only the ID and text columns in chunks.
+
+        `chunks` is an iterable of dataframes for data that isn't a CSV file.
+        """
+        index = cls(csv_path)
+        if os.path.exists(csv_path):
+            if chunks is None:
+                chunks = pd.read_csv(
+                    csv_path, usecols=["ID", text_column], chunksize=REBUILD_CHUNK_ROWS
+                )
+            for chunk in chunks:
+                index.add_new(*row_digests(chunk, text_column))
+
+        index.save()
+        return index
+
+    def add_new(self, ids, texts):
+        """
+        Return a keep-mask for rows whose ID and text are both unseen.
+
+        Rows are checked in order, so a later duplicate within the same
+        batch is dropped too. Kept rows are recorded (see `flush`).
+        """
+        keep = []
+        for id_digest, text_digest in zip(ids, texts):
+            if id_digest in self.ids or text_digest in self.texts:
+                keep.append(False)
+                continue
+
+            self.ids.add(id_digest)
+            self.texts.add(text_digest)
+            self._pairs.extend((id_digest, text_digest))
+            keep.append(True)
+
+        return keep
+
+    def mark(self):
+        """Position to `rollback` to, e.g. if the rows checked after it never get written."""
+        return len(self._pairs)
+
+    def rollback(self, mark):
+        """Forget the rows recorded since `mark`, so they count as unseen again."""
+        if mark < self._flushed:
+            raise ValueError("Can't roll back rows that were already flushed.")
+        # add_new only records digests that were unseen, so dropping them is exact
+        self.ids.difference_update(self._pairs[mark::2])
+        self.texts.difference_update(self._pairs[mark + 1::2])
+        del self._pairs[mark:]
+
+    def known_ids(self, post_ids):
+        """The IDs out of `post_ids` that the corpus already holds."""
+        return {post_id for post_id in post_ids if digest(post_id) in self.ids}
+
+    def pairs_hash(self):
+        """Hex digest of the recorded rows, in order; identifies a prefix for `load_prefix`."""
+        return hashlib.blake2b(self._pairs.tobytes(), digest_size=16).hexdigest()
+
+    def save(self):
+        """Rewrite the whole sidecar (after the CSV itself was rewritten)."""
+        self._flushed = len(self._pairs)
+        if self.csv_path is None:
+            return
+
+        with atomic_path(index_path(self.csv_path)) as tmp_path:
+            with open(tmp_path, "wb") as f:
+                array("Q", [_data_size(self.csv_path)]).tofile(f)
+                self._pairs.tofile(f)
+
+    def flush(self):
+        """Append pairs recorded since the last save/flush (after appending to the CSV)."""
+        path = index_path(self.csv_path) if self.csv_path else None
+        if path is None or not os.path.exists(path):
+            self.save()
+            return
+
+        # Pairs first, size header last: a crash in between leaves a header
+        # that doesn't match the data, so the index is rebuilt, not trusted
+        with open(path, "r+b") as f:
+            f.seek(0, os.SEEK_END)
+            self._pairs[self._flushed:].tofile(f)
+            f.flush()
+            os.fsync(f.fileno())
+            f.seek(0)
+            array("Q", [_data_size(self.csv_path)]).tofile(f)
+        fsync_path(path)
+        self._flushed = len(self._pairs)
@@ -0,0 +1,41 @@
+import json
+import os
+
+from common.atomic_io import atomic_path
+
+# Per data folder: what each corpus looked like right after its last dedupe pass
+MANIFEST_NAME = "dedupe_manifest.json"
+
+
+def manifest_key(backend, corpus):
+    return f"{backend}:{corpus}"
+
+
+def load_manifest(folder):
+    """Return key -> entry (fingerprint, content hash, rows, pairs hash, threshold); {} if none."""
+    path = os.path.join(folder, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(folder, manifest):
+    with atomic_path(os.path.join(folder, MANIFEST_NAME)) as tmp_path:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+
+
+def is_unchanged(entry, fingerprint):
+    """True if every field of the current fingerprint matches the recorded entry."""
+    return all(entry.get(key) == value for key, value in fingerprint.items())
+
+
+def covers(entry, near_dup_threshold):
+    """
+    Whether the pass recorded in `entry` already did what this pass asks
+    for: any pass covers an exact-only one, a near-duplicate pass only
+    one at the same threshold.
+    """
+    return near_dup_threshold is None or entry.get("near_dup_threshold") == near_dup_threshold
@@ -1,9 +1,16 @@
+import asyncio
 import os
 import pandas as pd
 import datetime
 
+from common.atomic_io import data_lock
+from common.cleaning import clean_dataframe
+from common.pipeline import ROW_BATCH_SIZE
+from common.post import comments_to_frame, posts_to_frame, snapshots_to_frame
+from common.storage import corpus_name, get_storage
+
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-TEMP_CSV_FOLDER = os.path.join(BASE_DIR, "data_tmp")
+TEMP_CSV_FOLDER = os.environ.get("REDDIT_DATA_DIR", os.path.join(BASE_DIR, "data_tmp"))
 
 os.makedirs(TEMP_CSV_FOLDER, exist_ok=True)
 
@@ -14,9 +21,10 @@ def merge_clean_save(
     """
     Simplified version:
 
-    - If merged file exists, append new rows and dedupe by Text
+    - If merged file exists, append new rows and dedupe by ID and Text
     - If not, just use current df
-    - Save back to merged file
+    - Save back to merged file (through the configured storage backend),
+      atomically and under the data folder lock
     - Return simple stats:
         raw_total   = len(df) passed in
         old_total   = rows in existing merged file (0 if none)
@@ -24,25 +32,30 @@ def merge_clean_save(
         new_posts   = final_total - old_total
     """
 
-    merged_path = os.path.join(TEMP_CSV_FOLDER, merged_filename)
+    storage = get_storage(TEMP_CSV_FOLDER)
+    corpus = corpus_name(merged_filename)
 
     raw_total = len(df)
 
-    if os.path.exists(merged_path):
-        old_df = pd.read_csv(merged_path)
-        combined = pd.concat([old_df, df], ignore_index=True)
-    else:
-        old_df = pd.DataFrame()
-        combined = df.copy()
+    with data_lock(TEMP_CSV_FOLDER):
+        storage.recover(corpus)
+        if storage.exists(corpus):
+            old_df = storage.read(corpus)
+            combined = pd.concat([old_df, df], ignore_index=True)
+        else:
+            old_df = pd.DataFrame()
+            combined = df.copy()
 
-    old_total = len(old_df)
+        old_total = len(old_df)
 
-    combined.drop_duplicates(subset=["Text"], inplace=True)
-    final_total = len(combined)
+        index = storage.empty_index(corpus)
+        combined, _, _ = clean_dataframe(combined, index=index)
+        final_total = len(combined)
 
-    new_posts = final_total - old_total
+        new_posts = final_total - old_total
 
-    combined.to_csv(merged_path, index=False)
+        storage.write(corpus, combined)
+        index.save()
 
     return {
         "raw_total": raw_total,
@@ -50,3 +63,162 @@ def merge_clean_save(
         "final_total": final_total,
         "new_posts": new_posts,
     }
+
+
+class CorpusWriter:
+    """
+    Appends batches of rows to one merged corpus.
+
+    The corpus' dedupe index is loaded once and kept open, so each batch
+    only costs its own rows. Concurrent producers share one writer and go
+    through `write_async`, which serializes batches and runs the blocking
+    pandas/disk work in a worker thread.
+
+    Every disk write holds the data folder lock, so another process can't
+    write the same corpus in between.
+    """
+
+    def __init__(self, merged_filename):
+        self.storage = get_storage(TEMP_CSV_FOLDER)
+        self.corpus = corpus_name(merged_filename)
+        with data_lock(self.storage.folder):
+            self.index = self.storage.corpus_index(self.corpus)
+        self.old_total = len(self.index)
+        self.raw_total = 0
+        self.removed_empty = 0
+        self.removed_duplicates = 0
+        self.new_posts = 0
+        # (post ID, community) of every appended row, for the refresh queue
+        self.added = []
+        self._lock = asyncio.Lock()
+
+    def write(self, df, matches=None):
+        """Clean a batch against the index, append the new rows; returns them."""
+        self.raw_total += len(df)
+
+        mark = self.index.mark()
+        new_rows, removed_empty, removed_duplicates = clean_dataframe(df, index=self.index)
+        with data_lock(self.storage.folder):
+            try:
+                self.storage.append(self.corpus, new_rows, matches=matches)
+            except BaseException:
+                # The rows never reached the corpus: don't let a later flush
+                # record them, or they would be skipped as duplicates forever
+                self.index.rollback(mark)
+                raise
+            self.index.flush()
+
+        self.removed_empty += removed_empty
+        self.removed_duplicates += removed_duplicates
+        self.new_posts += len(new_rows)
+        self.added.extend(zip(new_rows["ID"], new_rows["community"]))
+        return new_rows
+
+    def write_posts(self, posts, matches=None):
+        """Write Post records; Date/Time strings are only formatted here, vectorized."""
+        return self.write(posts_to_frame(posts), matches=matches)
+
+    async def write_async(self, posts, matches=None):
+        """Write a batch of Post records from the event loop."""
+        async with self._lock:
+            return await asyncio.to_thread(self.write_posts, posts, matches)
+
+    def record_matches(self, matches):
+        """Record keywords of posts that were skipped in flight instead of rewritten."""
+        if matches:
+            with data_lock(self.storage.folder):
+                self.storage.record_matches(self.corpus, matches)
+
+    async def record_matches_async(self, matches):
+        async with self._lock:
+            await asyncio.to_thread(self.record_matches, matches)
+
+    def stats(self):
+        return {
+            "raw_total": self.raw_total,
+            "old_total": self.old_total,
+            "final_total": self.old_total + self.new_posts,
+            "new_posts": self.new_posts,
+        }
+
+
+class CommentWriter:
+    """
+    Streams flattened comment rows of one merged corpus to its comments
+    table (`<corpus>_comments` on the file backends).
+
+    Rows are buffered and appended `batch_size` at a time, so a busy
+    thread never sits in memory as a whole. Comments are not cleaned or
+    deduplicated against the corpus: they are only fetched for posts the
+    corpus did not have yet.
+    """
+
+    def __init__(self, merged_filename, batch_size=ROW_BATCH_SIZE):
+        self.storage = get_storage(TEMP_CSV_FOLDER)
+        self.corpus = corpus_name(merged_filename)
+        self.batch_size = batch_size
+        self.total = 0
+        self._buffer = []
+        self._lock = asyncio.Lock()
+
+    def write(self, comments):
+        """Append a batch of Comment records."""
+        with data_lock(self.storage.folder):
+            self.storage.append_comments(self.corpus, comments_to_frame(comments))
+        self.total += len(comments)
+
+    async def add_async(self, comments):
+        """Buffer Comment records, writing full batches from a worker thread."""
+        self._buffer.extend(comments)
+        async with self._lock:
+            while len(self._buffer) >= self.batch_size:
+                batch = self._buffer[:self.batch_size]
+                del self._buffer[:self.batch_size]
+                await asyncio.to_thread(self.write, batch)
+
+    async def flush_async(self):
+        """Write whatever is still buffered."""
+        async with self._lock:
+            if self._buffer:
+                batch, self._buffer = self._buffer, []
+                await asyncio.to_thread(self.write, batch)
+
+
+def append_snapshots(corpus, snapshots):
+    """Append Snapshot records to a corpus' snapshots table, under the data folder lock."""
+    storage = get_storage(TEMP_CSV_FOLDER)
+    with data_lock(storage.folder):
+        storage.append_snapshots(corpus, snapshots_to_frame(snapshots))
+
+
+def append_clean_save(
+    df,
+    merged_filename,
+    matches=None,
+):
+    """
+    Append-only version of merge_clean_save:
+
+    - Clean the rows against the corpus' persistent dedupe index
+      (ID and normalized Text digests)
+    - Append only rows not already present; `matches` optionally lists
+      (post ID, keyword) pairs for backends that record them
+    - Record the appended digests in the index
+    - Return the same stats as merge_clean_save, without re-reading the corpus
+    """
+
+    writer = CorpusWriter(merged_filename)
+    writer.write(df, matches=matches)
+    return writer.stats()
+
+
+def export_csvs(csv_folder=TEMP_CSV_FOLDER):
+    """
+    Make sure every merged corpus is also available as `<corpus>.csv`.
+
+    A no-op for the CSV backend; other backends write a full CSV copy.
+    Returns the exported paths.
+    """
+    storage = get_storage(csv_folder)
+    with data_lock(csv_folder):
+        return [storage.export_csv(corpus) for corpus in storage.corpora()]
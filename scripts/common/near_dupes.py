@@ -0,0 +1,242 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from common.atomic_io import atomic_path, remove_path
+
+# Default Jaccard similarity (of word shingles) above which two texts are
+# treated as the same post
+NEAR_DUP_THRESHOLD = 0.8
+
+NUM_PERM = 64
+SHINGLE_WORDS = 3
+
+# Shingles hashed per step; bounds the (shingles x NUM_PERM) scratch array
+SHINGLE_CHUNK = 250_000
+PAIR_CHUNK = 100_000
+
+# Sidecar with the MinHash signatures of a corpus' rows, in row order,
+# written by near-duplicate dedupe passes so the next one only hashes
+# appended rows
+SIGNATURES_SUFFIX = ".minhash"
+
+_URL_PATTERN = r"(?:https?://|www\.)\S+"
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+
+def normalize_for_similarity(texts):
+    """
+    Vectorized normalization for near-duplicate detection: lowercase,
+    drop URLs and punctuation, collapse whitespace.
+    """
+    return (
+        texts.fillna("")
+        .astype(str)
+        .str.lower()
+        .str.replace(_URL_PATTERN, " ", regex=True)
+        .str.replace(r"[^\w\s]+", " ", regex=True)
+        .str.replace(r"\s+", " ", regex=True)
+        .str.strip()
+    )
+
+
+def _hash_strings(values):
+    return pd.util.hash_pandas_object(pd.Series(values, dtype=object), index=False).to_numpy()
+
+
+def _shingles(normalized, size=SHINGLE_WORDS):
+    """
+    Hashes of every `size`-word shingle, as (row positions, hashes) sorted
+    by row. A text shorter than `size` words is one shingle; texts with no
+    words get none.
+    """
+    tokens = normalized.str.split()
+    lengths = tokens.str.len().to_numpy()
+    token_hashes = _hash_strings(tokens.explode().dropna())
+    token_rows = np.repeat(np.arange(len(lengths)), lengths)
+
+    # Position of each token within its text
+    starts = np.cumsum(lengths) - lengths
+    offsets = np.arange(len(token_hashes)) - np.repeat(starts, lengths)
+
+    valid = offsets <= np.repeat(lengths, lengths) - size
+    last = len(token_hashes) - size + 1
+    combined = np.zeros(max(last, 0), dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for shift in range(size):
+            combined = combined * _MIX + token_hashes[shift:shift + last]
+    valid = valid[:max(last, 0)]
+
+    short = np.flatnonzero((lengths > 0) & (lengths < size))
+    rows = np.concatenate([token_rows[:max(last, 0)][valid], short])
+    hashes = np.concatenate([combined[valid], _hash_strings(normalized.to_numpy()[short])])
+    order = np.argsort(rows, kind="stable")
+    return rows[order], hashes[order]
+
+
+def minhash_signatures(normalized, num_perm=NUM_PERM, seed=1):
+    """
+    MinHash signature (uint32 x `num_perm`) per text. Rows without any
+    words keep an all-ones signature and `has_words` False.
+    """
+    rows, hashes = _shingles(normalized)
+    rng = np.random.default_rng(seed)
+    # Odd multipliers make each (a * h + b) mod 2**64 a permutation
+    a = rng.integers(1, 2**63, num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+    b = rng.integers(0, 2**63, num_perm, dtype=np.uint64)
+
+    signatures = np.full((len(normalized), num_perm), np.iinfo(np.uint32).max, dtype=np.uint32)
+    has_words = np.zeros(len(normalized), dtype=bool)
+    has_words[rows] = True
+
+    # Chunk on row boundaries so every row is reduced in one step
+    row_starts = np.flatnonzero(np.concatenate([[True], rows[1:] != rows[:-1]]))
+    cuts = np.unique(row_starts[np.searchsorted(row_starts, np.arange(0, len(rows), SHINGLE_CHUNK))])
+    for lo, hi in zip(cuts, np.append(cuts[1:], len(rows))):
+        chunk_rows = rows[lo:hi]
+        # Permutations x shingles: reducing along the contiguous axis is far faster
+        with np.errstate(over="ignore"):
+            values = ((a[:, None] * hashes[None, lo:hi] + b[:, None]) >> np.uint64(32)).astype(np.uint32)
+        chunk_starts = np.concatenate([[0], np.flatnonzero(np.diff(chunk_rows)) + 1])
+        signatures[chunk_rows[chunk_starts]] = np.minimum.reduceat(values, chunk_starts, axis=1).T
+
+    return signatures, has_words
+
+
+def lsh_params(threshold, num_perm=NUM_PERM):
+    """(bands, rows per band) whose S-curve midpoint is closest to `threshold`."""
+    return min(
+        ((num_perm // r, r) for r in range(1, num_perm + 1)),
+        key=lambda params: abs((1 / params[0]) ** (1 / params[1]) - threshold),
+    )
+
+
+def _candidate_pairs(signatures, candidates, bands, rows_per_band):
+    """
+    Per band, pair each row with the first (lowest-position) row sharing its
+    band key. O(rows x bands) pairs instead of every pair in a bucket.
+    """
+    pairs = []
+    for band in range(bands):
+        block = signatures[candidates, band * rows_per_band:(band + 1) * rows_per_band]
+        keys = np.zeros(len(candidates), dtype=np.uint64)
+        with np.errstate(over="ignore"):
+            for column in block.T:
+                keys = keys * _MIX + column.astype(np.uint64)
+
+        order = np.lexsort((candidates, keys))
+        sorted_keys = keys[order]
+        new_bucket = np.concatenate([[True], sorted_keys[1:] != sorted_keys[:-1]])
+        firsts = candidates[order][np.maximum.accumulate(np.where(new_bucket, np.arange(len(order)), 0))]
+        members = candidates[order]
+        keep = ~new_bucket
+        pairs.append(np.stack([firsts[keep], members[keep]], axis=1))
+
+    if not pairs:
+        return np.empty((0, 2), dtype=np.int64)
+    return np.unique(np.concatenate(pairs), axis=0)
+
+
+def near_duplicate_mask(texts, threshold=NEAR_DUP_THRESHOLD, num_perm=NUM_PERM):
+    """
+    Boolean numpy mask of texts that are near-duplicates of an earlier text.
+
+    Texts are normalized, MinHashed over word shingles and bucketed with
+    LSH; candidate pairs are kept when their estimated Jaccard similarity
+    is at least `threshold`. Runs in roughly linear time in the number of
+    texts.
+    """
+    return near_duplicate_mask_chunks([texts], threshold, num_perm)
+
+
+def near_duplicate_mask_chunks(text_chunks, threshold=NEAR_DUP_THRESHOLD, num_perm=NUM_PERM):
+    """
+    `near_duplicate_mask` over texts read in chunks (e.g. the Text column of
+    a large corpus). Only the signatures, `num_perm` * 4 bytes per row, are
+    kept for the whole corpus.
+    """
+    signatures, has_words = signatures_of_chunks(text_chunks, num_perm)
+    return signature_mask(signatures, has_words, threshold, num_perm)
+
+
+def signatures_of_chunks(text_chunks, num_perm=NUM_PERM):
+    """(signatures, has_words) of texts read in chunks, as for `minhash_signatures`."""
+    signatures, has_words = [np.empty((0, num_perm), dtype=np.uint32)], [np.empty(0, dtype=bool)]
+    for texts in text_chunks:
+        chunk_signatures, chunk_has_words = minhash_signatures(normalize_for_similarity(texts), num_perm)
+        signatures.append(chunk_signatures)
+        has_words.append(chunk_has_words)
+    return np.concatenate(signatures), np.concatenate(has_words)
+
+
+def signature_mask(signatures, has_words, threshold=NEAR_DUP_THRESHOLD, num_perm=NUM_PERM):
+    """Near-duplicate mask of rows by their MinHash signatures (see `near_duplicate_mask`)."""
+    mask = np.zeros(len(signatures), dtype=bool)
+    if len(signatures) < 2:
+        return mask
+
+    bands, rows_per_band = lsh_params(threshold, num_perm)
+    pairs = _candidate_pairs(signatures, np.flatnonzero(has_words), bands, rows_per_band)
+
+    for lo in range(0, len(pairs), PAIR_CHUNK):
+        first, later = pairs[lo:lo + PAIR_CHUNK].T
+        similarity = (signatures[first] == signatures[later]).mean(axis=1)
+        mask[later[similarity >= threshold]] = True
+
+    return mask
+
+
+def tail_mask(kept_signatures, signatures, has_words, threshold=NEAR_DUP_THRESHOLD, num_perm=NUM_PERM):
+    """
+    Near-duplicate mask of appended rows (`signatures`, `has_words`)
+    against the rows a corpus already kept (`kept_signatures`) and each
+    other, without hashing the kept rows' texts again.
+    """
+    # Rows without words keep the all-ones signature
+    kept_has_words = (kept_signatures != np.iinfo(np.uint32).max).any(axis=1)
+    mask = signature_mask(
+        np.concatenate([kept_signatures, signatures]),
+        np.concatenate([kept_has_words, has_words]),
+        threshold,
+        num_perm,
+    )
+    return mask[len(kept_signatures):]
+
+
+def signatures_path(data_path):
+    return data_path + SIGNATURES_SUFFIX
+
+
+def load_signatures(data_path, rows, num_perm=NUM_PERM):
+    """
+    The signature sidecar of a corpus, memory-mapped, if it holds exactly
+    `rows` signatures; None if it is missing or describes other rows.
+    """
+    path = signatures_path(data_path)
+    if not os.path.exists(path) or os.path.getsize(path) != rows * num_perm * 4:
+        return None
+    if rows == 0:
+        return np.empty((0, num_perm), dtype=np.uint32)
+    return np.memmap(path, dtype=np.uint32, mode="r", shape=(rows, num_perm))
+
+
+def save_signatures(data_path, signatures):
+    """Rewrite the signature sidecar (after the corpus itself was rewritten)."""
+    with atomic_path(signatures_path(data_path)) as tmp_path:
+        np.ascontiguousarray(signatures, dtype=np.uint32).tofile(tmp_path)
+
+
+def append_signatures(data_path, signatures):
+    """
+    Add the signatures of appended rows. A crash midway leaves a size that
+    matches no row count, so the next pass rebuilds instead of trusting it.
+    """
+    with open(signatures_path(data_path), "ab") as f:
+        np.ascontiguousarray(signatures, dtype=np.uint32).tofile(f)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def remove_signatures(data_path):
+    remove_path(signatures_path(data_path))
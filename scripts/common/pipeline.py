@@ -0,0 +1,147 @@
+import datetime
+
+from common.post import Post
+
+# Posts handed to the writer at a time; bounds memory per fetch stream
+ROW_BATCH_SIZE = 250
+
+
+class ListingStats:
+    """Running counts for one listing stream (a keyword search or a subreddit)."""
+
+    def __init__(self):
+        self.raw = 0
+        self.empty = 0
+        # Posts the corpus did not have yet (rows actually appended)
+        self.new = 0
+        self.newest = None
+        self.earliest_utc = None
+        self.reached_checkpoint = False
+        # IDs skipped because another source already claimed them for this corpus
+        self.skipped_ids = []
+
+    def merge(self, other):
+        """Add the counts of another pass over the same listing."""
+        self.raw += other.raw
+        self.empty += other.empty
+        self.new += other.new
+        if other.newest is not None and (
+            self.newest is None or other.newest["created_utc"] > self.newest["created_utc"]
+        ):
+            self.newest = other.newest
+        if other.earliest_utc is not None and (
+            self.earliest_utc is None or other.earliest_utc < self.earliest_utc
+        ):
+            self.earliest_utc = other.earliest_utc
+        self.reached_checkpoint = self.reached_checkpoint or other.reached_checkpoint
+        self.skipped_ids.extend(other.skipped_ids)
+
+    def earliest_str(self):
+        if self.earliest_utc is None:
+            return "N/A"
+        return datetime.datetime.fromtimestamp(self.earliest_utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+class SeenPosts:
+    """
+    Post IDs returned during one run or cycle, and by which sources.
+
+    A source is a `(job, name)` pair such as `("GENAI", "gen ai")` or
+    `("SUBREDDITS", "ChatGPT")`. `claim` tells a stream whether its corpus
+    already has the post in flight, so duplicates are dropped before a
+    Post is built; the recorded sources drive the overlap reports.
+    """
+
+    def __init__(self):
+        # post ID -> {source: corpus}
+        self._sources = {}
+
+    def __len__(self):
+        return len(self._sources)
+
+    def claim(self, post_id, corpus, source):
+        """Record that `source` returned `post_id`; False if `corpus` already has it."""
+        sources = self._sources.setdefault(post_id, {})
+        first = corpus not in sources.values()
+        sources.setdefault(source, corpus)
+        return first
+
+    def keyword_overlap(self, job):
+        """
+        Per source name of `job`: posts it returned and how many of those
+        another source of the same job also returned. A name with no
+        exclusive posts adds nothing to the corpus.
+        """
+        overlap = {}
+        for sources in self._sources.values():
+            names = [name for source_job, name in sources if source_job == job]
+            for name in names:
+                counts = overlap.setdefault(name, {"total": 0, "shared": 0})
+                counts["total"] += 1
+                counts["shared"] += len(names) > 1
+        return overlap
+
+    def job_overlap(self):
+        """Posts returned by each pair of jobs, as {(job_a, job_b): count}."""
+        overlap = {}
+        for sources in self._sources.values():
+            jobs = sorted({job for job, _ in sources})
+            for i, job_a in enumerate(jobs):
+                for job_b in jobs[i + 1:]:
+                    overlap[job_a, job_b] = overlap.get((job_a, job_b), 0) + 1
+        return overlap
+
+
+async def normalize_posts(
+    posts, stats, community=None, stop_utc=None, seen=None, corpus=None, source=None
+):
+    """
+    Fetch + normalize stage: yield a Post record per submission.
+
+    Stops pulling from the listing (so no further pages are requested) at
+    the first post older than `stop_utc`.
+
+    With a SeenPosts registry, posts another source already claimed for
+    `corpus` are counted (and their IDs kept in `stats.skipped_ids`) but
+    not yielded.
+    """
+    async for submission in posts:
+        if stop_utc is not None and submission.created_utc < stop_utc:
+            stats.reached_checkpoint = True
+            return
+
+        post_id = submission.id
+        created_utc = int(submission.created_utc)
+        stats.raw += 1
+        if stats.newest is None or created_utc > stats.newest["created_utc"]:
+            stats.newest = {"id": post_id, "created_utc": created_utc}
+        if stats.earliest_utc is None or created_utc < stats.earliest_utc:
+            stats.earliest_utc = created_utc
+
+        if seen is not None and not seen.claim(post_id, corpus, source):
+            stats.skipped_ids.append(post_id)
+            continue
+
+        yield Post.from_submission(submission, community)
+
+
+async def drop_empty(posts, stats):
+    """Filter stage: skip posts whose text is missing or whitespace-only."""
+    async for post in posts:
+        if not isinstance(post.text, str) or not post.text.strip():
+            stats.empty += 1
+            continue
+        yield post
+
+
+async def batched(posts, size=ROW_BATCH_SIZE):
+    """Group posts into lists of at most `size`, so writes start before fetching ends."""
+    batch = []
+    async for post in posts:
+        batch.append(post)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
@@ -0,0 +1,185 @@
+import sys
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+POST_COLUMNS = ["Title", "Text", "Username", "ID", "community", "Date", "Time", "Post URL"]
+COMMENT_COLUMNS = ["ID", "Post ID", "Parent ID", "Username", "Text", "Score", "community", "Date", "Time"]
+# Date/Time of a snapshot are when it was taken
+SNAPSHOT_COLUMNS = [
+    "ID", "Stage", "Score", "Comments", "Upvote Ratio", "Removed", "Edited", "community", "Date", "Time",
+]
+
+# Local UTC offsets only change on quarter-hour boundaries, so one
+# time.localtime() call per bucket gives exact (DST-aware) local times
+_OFFSET_BUCKET_SECS = 15 * 60
+
+
+@dataclass(slots=True)
+class Post:
+    """One scraped submission, as compact as the scrapers need it."""
+
+    id: str
+    title: str
+    text: str
+    username: str
+    community: str
+    created_utc: int
+    url: str
+
+    @classmethod
+    def from_submission(cls, submission, community=None):
+        # Redditor objects already carry their name; deleted authors are None
+        author = submission.author
+        username = author.name if hasattr(author, "name") else str(author)
+        return cls(
+            id=submission.id,
+            title=submission.title,
+            text=submission.selftext,
+            username=username,
+            community=sys.intern(community or str(submission.subreddit)),
+            created_utc=int(submission.created_utc),
+            url=submission.url,
+        )
+
+
+@dataclass(slots=True)
+class Comment:
+    """One comment of a scraped submission, flattened out of its thread."""
+
+    id: str
+    post_id: str
+    # Fullname of the parent: "t3_<post ID>" for top-level comments, else "t1_<comment ID>"
+    parent_id: str
+    username: str
+    text: str
+    score: int
+    community: str
+    created_utc: int
+
+    @classmethod
+    def from_comment(cls, comment, post_id, community):
+        author = comment.author
+        username = author.name if hasattr(author, "name") else str(author)
+        return cls(
+            id=comment.id,
+            post_id=post_id,
+            parent_id=comment.parent_id,
+            username=username,
+            text=comment.body,
+            score=comment.score,
+            community=sys.intern(community),
+            created_utc=int(comment.created_utc),
+        )
+
+
+@dataclass(slots=True)
+class Snapshot:
+    """Score, comment count and removed/edited state of a post when it was re-fetched."""
+
+    id: str
+    community: str
+    # Index into the refresh schedule (see common.refresh.REFRESH_AGES_SECS)
+    stage: int
+    fetched_utc: int
+    score: int | None
+    num_comments: int | None
+    upvote_ratio: float | None
+    # removed_by_category ("moderator", "deleted", ...), "missing" if Reddit
+    # no longer returns the post at all, None while it is up
+    removed: str | None
+    # Edit time (epoch seconds), None if never edited
+    edited: int | None
+
+    @classmethod
+    def from_submission(cls, submission, community, stage, fetched_utc):
+        edited = submission.edited
+        return cls(
+            id=submission.id,
+            community=sys.intern(community),
+            stage=stage,
+            fetched_utc=fetched_utc,
+            score=submission.score,
+            num_comments=submission.num_comments,
+            upvote_ratio=submission.upvote_ratio,
+            removed=submission.removed_by_category,
+            edited=int(edited) if edited else None,
+        )
+
+    @classmethod
+    def missing(cls, post_id, community, stage, fetched_utc):
+        return cls(post_id, sys.intern(community), stage, fetched_utc, None, None, None, "missing", None)
+
+
+def local_datetimes(created_utc):
+    """Vectorized equivalent of datetime.fromtimestamp() for a Series of epoch seconds."""
+    created_utc = pd.Series(created_utc, dtype="int64")
+    buckets = created_utc // _OFFSET_BUCKET_SECS
+    offsets = {
+        bucket: time.localtime(bucket * _OFFSET_BUCKET_SECS).tm_gmtoff
+        for bucket in buckets.unique()
+    }
+    return pd.to_datetime(created_utc + buckets.map(offsets), unit="s")
+
+
+def date_time_strings(created_utc):
+    """
+    Vectorized local "%d-%m-%Y" / "%H:%M:%S" strings for epoch seconds.
+
+    Goes through numpy's ISO formatting and string slicing; pandas'
+    dt.strftime is slower than per-post strftime.
+    """
+    local = local_datetimes(created_utc).to_numpy().astype("datetime64[s]")
+    iso = pd.Series(np.datetime_as_string(local, unit="s"), dtype=object)
+    dates = iso.str[8:10] + "-" + iso.str[5:7] + "-" + iso.str[0:4]
+    return dates, iso.str[11:19]
+
+
+def posts_to_frame(posts):
+    """Build merged-corpus rows from Post records, formatting Date/Time in one pass."""
+    dates, times = date_time_strings([post.created_utc for post in posts])
+    return pd.DataFrame({
+        "Title": [post.title for post in posts],
+        "Text": [post.text for post in posts],
+        "Username": [post.username for post in posts],
+        "ID": [post.id for post in posts],
+        "community": [post.community for post in posts],
+        "Date": dates,
+        "Time": times,
+        "Post URL": [post.url for post in posts],
+    }, columns=POST_COLUMNS)
+
+
+def comments_to_frame(comments):
+    """Build comment rows from Comment records, formatting Date/Time in one pass."""
+    dates, times = date_time_strings([comment.created_utc for comment in comments])
+    return pd.DataFrame({
+        "ID": [comment.id for comment in comments],
+        "Post ID": [comment.post_id for comment in comments],
+        "Parent ID": [comment.parent_id for comment in comments],
+        "Username": [comment.username for comment in comments],
+        "Text": [comment.text for comment in comments],
+        "Score": [comment.score for comment in comments],
+        "community": [comment.community for comment in comments],
+        "Date": dates,
+        "Time": times,
+    }, columns=COMMENT_COLUMNS)
+
+
+def snapshots_to_frame(snapshots):
+    """Build snapshot rows from Snapshot records."""
+    dates, times = date_time_strings([snapshot.fetched_utc for snapshot in snapshots])
+    return pd.DataFrame({
+        "ID": [snapshot.id for snapshot in snapshots],
+        "Stage": [snapshot.stage for snapshot in snapshots],
+        "Score": pd.array([snapshot.score for snapshot in snapshots], dtype="Int64"),
+        "Comments": pd.array([snapshot.num_comments for snapshot in snapshots], dtype="Int64"),
+        "Upvote Ratio": [snapshot.upvote_ratio for snapshot in snapshots],
+        "Removed": [snapshot.removed for snapshot in snapshots],
+        "Edited": pd.array([snapshot.edited for snapshot in snapshots], dtype="Int64"),
+        "community": [snapshot.community for snapshot in snapshots],
+        "Date": dates,
+        "Time": times,
+    }, columns=SNAPSHOT_COLUMNS)
@@ -0,0 +1,254 @@
+import asyncio
+import random
+import time
+
+from asyncprawcore.exceptions import RequestException, ServerError, TooManyRequests
+
+# Reddit OAuth clients get 100 requests per minute, averaged over a 10 minute window
+DEFAULT_CAPACITY = 100
+DEFAULT_PERIOD = 60.0
+RESET_WINDOW_SECS = 600.0
+
+# Listing endpoints return at most 100 items per request
+PAGE_SIZE = 100
+
+# A page answered with 429 or 5xx, or lost to a network error, is retried
+# this many times, waiting BACKOFF_BASE * 2**attempt seconds (jittered,
+# capped at BACKOFF_CAP) in between
+TRANSIENT_ERRORS = (TooManyRequests, ServerError, RequestException)
+MAX_RETRIES = 5
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 60.0
+
+
+class RateLimitBucket:
+    """
+    Token bucket shared by every task that talks to the Reddit API.
+
+    - holds up to `capacity` tokens, refilled continuously over `period` seconds
+    - one token is spent per listing page (one HTTP request), from
+      `acquire()` until the request is answered and `release()`d
+    - until a response reports Reddit's budget, one request is sent at a
+      time; then the budget is seeded from its X-Ratelimit-Remaining
+    - `sync()` caps the local budget at what Reddit reports as remaining,
+      less the requests still in flight, and, once the X-Ratelimit-Reset
+      header is known, refills at the rate that spreads the remaining
+      requests evenly until the reset. A spent budget waits for the
+      reset; only after it passes does the full budget and the default
+      rate come back
+    - `backoff()` waits out a 429, 5xx or network error, exponentially
+      longer on every retry; a 429 pauses every task sharing the bucket
+
+    `waited` (pacing) and `backoff_waited` (errors) add up the seconds spent.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY, period: float = DEFAULT_PERIOD):
+        self.capacity = capacity
+        self.base_rate = capacity / period
+        self.rate = self.base_rate
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        # Requests acquired but not answered yet: Reddit's reported budget
+        # doesn't count them, they still spend it
+        self.in_flight = 0
+        # Requests Reddit still allows until `reset_at`, less those sent
+        # since it said so, and its budget per window; None until known
+        self.allowance = None
+        self.reset_at = None
+        self.window_budget = None
+        self.waited = 0.0
+        self.backoff_waited = 0.0
+        self.retries = 0
+        self._lock = asyncio.Lock()
+        self._seeded = asyncio.Event()
+        self._released = asyncio.Event()
+
+    def _refill(self):
+        now = time.monotonic()
+        if self.reset_at is not None and now >= self.reset_at:
+            # A new window: Reddit's full budget again, at the default pace
+            self.reset_at = None
+            self.rate = self.base_rate
+            self.allowance = self.window_budget - self.in_flight
+            self.tokens = max(self.tokens, float(self.allowance))
+        if self.reset_at is None and self.allowance is not None and self.allowance < 1 and not self.in_flight:
+            # Spent, with no answer left to report the new window: go by capacity
+            self.allowance = None
+        ceiling = self.capacity if self.allowance is None else min(self.capacity, self.allowance)
+        self.tokens = min(ceiling, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return now
+
+    def available(self):
+        """Tokens that could be spent right now (none while blocked)."""
+        now = self._refill()
+        return 0.0 if now < self.blocked_until else max(0.0, self.tokens)
+
+    async def acquire(self):
+        """Wait until a request token is available, then consume it."""
+        async with self._lock:
+            while True:
+                now = self._refill()
+                if now < self.blocked_until:
+                    wait = self.blocked_until - now
+                elif self.tokens >= 1 and (self._seeded.is_set() or not self.in_flight):
+                    self.tokens -= 1
+                    if self.allowance is not None:
+                        self.allowance -= 1
+                    self.in_flight += 1
+                    return
+                elif self.in_flight and (
+                    not self._seeded.is_set()
+                    or (self.reset_at is None and self.allowance is not None and self.allowance < 1)
+                ):
+                    # Probing, or a new window whose budget is spent: the
+                    # next answer tells what Reddit allows now
+                    self._released.clear()
+                    await self._released.wait()
+                    self.waited += time.monotonic() - now
+                    continue
+                elif self.allowance is not None and self.allowance < 1 and self.reset_at is not None:
+                    wait = self.reset_at - now
+                else:
+                    wait = (1 - self.tokens) / self.rate
+
+                self.waited += wait
+                await asyncio.sleep(wait)
+
+    def release(self, limits=None):
+        """
+        Mark an acquired request as answered (or failed), then `sync()`
+        from `limits`, the rate-limit dict read after it. Without `limits`
+        nothing tells the budget, so the bucket paces by its capacity alone.
+        """
+        self.in_flight -= 1
+        if limits is None:
+            self._seeded.set()
+        else:
+            self.sync(limits)
+        self._released.set()
+
+    def sync(self, limits):
+        """
+        Update the bucket from a rate-limit dict (`rate_limits(reddit)`).
+
+        `remaining`, less the requests still in flight, caps the local
+        budget. With `reset_at` (a `time.monotonic()` deadline) that cap
+        holds until the reset, the refill rate becomes the remaining
+        requests spread evenly until then, and a spent budget blocks until
+        the reset; without it a spent budget blocks for one reset window.
+        """
+        if not limits:
+            return
+
+        remaining = limits.get("remaining")
+        if remaining is None:
+            return
+
+        now = self._refill()
+        allowance = max(0.0, float(remaining) - self.in_flight)
+        self.tokens = min(self.tokens, allowance)
+        self._seeded.set()
+        reset_at = limits.get("reset_at")
+        if reset_at is not None:
+            self.reset_at = max(reset_at, now)
+            self.allowance = allowance
+            self.window_budget = max(self.window_budget or 0, remaining + (limits.get("used") or 0))
+            if remaining > 0:
+                self.rate = remaining / (self.reset_at - now)
+        elif remaining <= 0:
+            self.blocked_until = now + RESET_WINDOW_SECS
+
+    async def backoff(self, attempt, error):
+        """
+        Sleep before retry number `attempt` of a request that failed with
+        `error`: BACKOFF_BASE * 2**attempt seconds (capped, with jitter),
+        at least the Retry-After Reddit sent. A 429 blocks the whole bucket
+        for that long, since every task on it shares the exhausted budget.
+        """
+        delay = min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt)
+        # Jitter keeps tasks that failed together from retrying together
+        delay = random.uniform(delay / 2, delay)
+        if isinstance(error, TooManyRequests):
+            if error.retry_after:
+                delay = max(delay, float(error.retry_after))
+            self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+
+        self.retries += 1
+        self.backoff_waited += delay
+        await asyncio.sleep(delay)
+
+
+async def paced_listing(listing, bucket, limits=None, page_size: int = PAGE_SIZE):
+    """
+    Iterate an async listing, spending one bucket token per page fetched.
+
+    `limits` is an optional zero-argument callable returning the current
+    rate-limit dict; it is read after every page to keep the bucket in sync.
+
+    A page that fails with one of TRANSIENT_ERRORS is fetched again after
+    `bucket.backoff()` (asyncpraw listings keep their cursor when a fetch
+    fails), up to MAX_RETRIES times.
+    """
+    count = 0
+
+    while True:
+        page_start = count % page_size == 0
+        attempt = 0
+        while True:
+            if page_start:
+                await bucket.acquire()
+
+            try:
+                item = await listing.__anext__()
+                break
+            except StopAsyncIteration:
+                if page_start:
+                    bucket.release(limits() if limits is not None else None)
+                return
+            except TRANSIENT_ERRORS as error:
+                if page_start:
+                    bucket.release(limits() if limits is not None else None)
+                if attempt >= MAX_RETRIES:
+                    raise
+                await bucket.backoff(attempt, error)
+                attempt += 1
+            except BaseException:
+                if page_start:
+                    bucket.release(limits() if limits is not None else None)
+                raise
+
+        if page_start:
+            bucket.release(limits() if limits is not None else None)
+
+        count += 1
+        yield item
+
+
+async def paced_call(call, bucket, limits=None):
+    """
+    Make one API request, `await call()`, spending one bucket token.
+
+    Retried like a listing page (see `paced_listing`): `call` is invoked
+    again after `bucket.backoff()` when it fails with one of
+    TRANSIENT_ERRORS, up to MAX_RETRIES times.
+    """
+    attempt = 0
+    while True:
+        await bucket.acquire()
+        try:
+            result = await call()
+            break
+        except TRANSIENT_ERRORS as error:
+            bucket.release(limits() if limits is not None else None)
+            if attempt >= MAX_RETRIES:
+                raise
+            await bucket.backoff(attempt, error)
+            attempt += 1
+        except BaseException:
+            bucket.release(limits() if limits is not None else None)
+            raise
+
+    bucket.release(limits() if limits is not None else None)
+    return result
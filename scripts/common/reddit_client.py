@@ -1,19 +1,207 @@
 import asyncpraw
+import aiohttp
 import os
+import time
+from contextlib import asynccontextmanager
 
+from asyncprawcore import Requestor
+
+# Open connections kept per client; enough for every concurrent listing
+# fetch of a cycle (keyword tasks + subreddit tasks)
+POOL_SIZE = int(os.environ.get("REDDIT_POOL_SIZE", "20"))
+
+# Idle connections are kept this long for reuse by the next request
+KEEPALIVE_SECS = float(os.environ.get("REDDIT_KEEPALIVE_SECS", "60"))
+
+TOKEN_PATH = "/api/v1/access_token"
+
+
+class RateLimitRequestor(Requestor):
+    """
+    asyncprawcore Requestor that keeps the X-Ratelimit-* headers of the
+    latest response, so callers can see when the budget resets (asyncpraw's
+    `auth.limits` only has remaining/used).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.limits = None
+
+    @asynccontextmanager
+    async def request(self, *args, **kwargs):
+        async with super().request(*args, **kwargs) as response:
+            headers = response.headers
+            if "x-ratelimit-remaining" in headers:
+                self.limits = {
+                    "remaining": float(headers["x-ratelimit-remaining"]),
+                    "used": int(float(headers.get("x-ratelimit-used", 0))),
+                    # The header counts whole seconds left, rounded down
+                    "reset_at": time.monotonic() + float(headers.get("x-ratelimit-reset", 0)) + 1,
+                }
+            yield response
+
+
+def rate_limits(reddit):
+    """
+    Latest rate-limit dict of a client: `remaining`, `used` and, once a
+    response carried it, `reset_at` (a `time.monotonic()` deadline).
+    """
+    requestor = getattr(reddit, "requestor", None)
+    return getattr(requestor, "limits", None) or reddit.auth.limits
+
+
+def load_credentials():
+    """
+    (client_id, client_secret) pairs to scrape with.
+
+    REDDIT_CREDENTIALS holds several OAuth apps as `id:secret` pairs
+    separated by commas or whitespace; each app has its own rate limit.
+    Without it, the single REDDIT_CLIENT_ID / REDDIT_CLIENT_SECRET pair
+    is used.
+    """
+    pool = os.environ.get("REDDIT_CREDENTIALS", "").replace(",", " ").split()
+    if pool:
+        credentials = [tuple(entry.split(":", 1)) for entry in pool]
+        if any(len(pair) != 2 or not all(pair) for pair in credentials):
+            raise RuntimeError(
+                "REDDIT_CREDENTIALS must be a list of client_id:client_secret pairs."
+            )
+        return credentials
 
-def get_reddit():
     client_id = os.environ.get("REDDIT_CLIENT_ID")
     client_secret = os.environ.get("REDDIT_CLIENT_SECRET")
 
     if not client_id or not client_secret:
         raise RuntimeError(
             "Missing Reddit credentials. Please set REDDIT_CLIENT_ID and "
-            "REDDIT_CLIENT_SECRET in your environment."
+            "REDDIT_CLIENT_SECRET (or REDDIT_CREDENTIALS) in your environment."
         )
+    return [(client_id, client_secret)]
+
+
+def get_reddit(session=None, credentials=None):
+    """
+    Build an asyncpraw client for `credentials` (a client_id, client_secret
+    pair; default the first configured one). With an aiohttp `session`,
+    all its requests (token fetches included) go through that session's
+    connection pool.
+    """
+    client_id, client_secret = credentials or load_credentials()[0]
 
     return asyncpraw.Reddit(
         client_id=client_id,
         client_secret=client_secret,
         user_agent="genai-research-bot:v1.0 (by u:genai_research_client)",
+        requestor_class=RateLimitRequestor,
+        requestor_kwargs={"session": session} if session is not None else None,
+        **api_urls(),
     )
+
+
+def api_urls():
+    """
+    Reddit endpoints overridden through the environment, as asyncpraw
+    settings: REDDIT_OAUTH_URL serves the API, REDDIT_URL the OAuth
+    tokens. Both default to reddit.com; the benchmarks point them at
+    a local stand-in server.
+    """
+    urls = {
+        "oauth_url": os.environ.get("REDDIT_OAUTH_URL"),
+        "reddit_url": os.environ.get("REDDIT_URL"),
+    }
+    return {setting: url for setting, url in urls.items() if url}
+
+
+class HttpStats:
+    """Counters fed by an aiohttp TraceConfig; diff two `snapshot()`s for one cycle."""
+
+    FIELDS = ("requests", "token_fetches", "new_connections", "reused_connections", "dns_lookups")
+
+    def __init__(self):
+        for field in self.FIELDS:
+            setattr(self, field, 0)
+
+    def snapshot(self):
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def since(self, snapshot):
+        return {field: getattr(self, field) - snapshot[field] for field in self.FIELDS}
+
+    def trace_config(self):
+        trace = aiohttp.TraceConfig()
+
+        async def on_request_start(session, context, params):
+            self.requests += 1
+            if params.url.path == TOKEN_PATH:
+                self.token_fetches += 1
+
+        async def on_connection_create_end(session, context, params):
+            # A new connection to Reddit is a TCP + TLS handshake
+            self.new_connections += 1
+
+        async def on_connection_reuseconn(session, context, params):
+            self.reused_connections += 1
+
+        async def on_dns_resolvehost_end(session, context, params):
+            self.dns_lookups += 1
+
+        trace.on_request_start.append(on_request_start)
+        trace.on_connection_create_end.append(on_connection_create_end)
+        trace.on_connection_reuseconn.append(on_connection_reuseconn)
+        trace.on_dns_resolvehost_end.append(on_dns_resolvehost_end)
+        return trace
+
+
+class RedditClient:
+    """
+    One asyncpraw client per configured credential, all over one pooled
+    aiohttp session, for a whole cycle or a whole `scheduler()` loop, so
+    OAuth tokens and open connections are reused instead of rebuilt per
+    scraper.
+
+        async with RedditClient() as client:
+            await run_all_once(reddit=client.reddit)
+            print(client.stats.snapshot())
+
+    `clients` holds every credential's client; `reddit` is the first.
+    The session is closed on exit, also when the body raises.
+    """
+
+    def __init__(self, *, credentials=None, pool_size=POOL_SIZE, keepalive_secs=KEEPALIVE_SECS):
+        self.credentials = credentials
+        self.pool_size = pool_size
+        self.keepalive_secs = keepalive_secs
+        self.stats = HttpStats()
+        self.clients = []
+        self.reddit = None
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(
+            limit=self.pool_size,
+            limit_per_host=self.pool_size,
+            keepalive_timeout=self.keepalive_secs,
+            ttl_dns_cache=300,
+        )
+        session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=None),
+            trace_configs=[self.stats.trace_config()],
+        )
+        try:
+            self.clients = [
+                get_reddit(session=session, credentials=credentials)
+                for credentials in self.credentials or load_credentials()
+            ]
+        except BaseException:
+            await session.close()
+            raise
+        self.reddit = self.clients[0]
+        return self
+
+    async def __aexit__(self, *exc_info):
+        # The clients share one session; closing any of them closes it
+        for reddit in self.clients:
+            await reddit.close()
+        self.clients = []
+        self.reddit = None
+
@@ -1,95 +1,457 @@
 import asyncio
-import datetime
+import functools
+import heapq
 import os
-import pandas as pd
-
-from common.cleaning import clean_dataframe
-from common.io_helpers import merge_clean_save
-from common.reddit_client import get_reddit
+import time
+
+from asyncpraw.models import MoreComments
+
+from common.checkpoints import (
+    community_key,
+    keyword_key,
+    load_checkpoints,
+    load_cursors,
+    load_windows,
+    mark_window_done,
+    pending_windows,
+    save_cursor,
+    stop_before,
+    update_checkpoints,
+)
+from common.io_helpers import CommentWriter, CorpusWriter, append_snapshots
+from common.pipeline import ListingStats, SeenPosts, batched, drop_empty, normalize_posts
+from common.post import Comment, Snapshot
+from common.rate_limit import RateLimitBucket, paced_call, paced_listing
+from common.refresh import (
+    INFO_BATCH_SIZE,
+    due_refreshes,
+    enqueue_refresh,
+    load_refresh_queue,
+    record_refreshes,
+)
+from common.client_pool import ClientPool, borrowed_pool
+from common.reddit_client import rate_limits
 
 # Determine repo root: common → scripts → Reddit_scraper
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-TEMP_CSV_FOLDER = os.path.join(BASE_DIR, "data_tmp")
+TEMP_CSV_FOLDER = os.environ.get("REDDIT_DATA_DIR", os.path.join(BASE_DIR, "data_tmp"))
 
 # Ensure temp folder exists
 os.makedirs(TEMP_CSV_FOLDER, exist_ok=True)
 
-async def run_keyword_scraper(
-    *,
-    label: str,
-    community: str,
-    keywords,
-    merged_filename: str,
-    sleep_secs: int = 5,
-):
+# Search results Reddit returns per keyword at most
+SEARCH_LIMIT = 1000
+
+# Historical backfill: a keyword's time range is first cut into windows
+# of INITIAL_WINDOW_SECS; a window whose search hits SEARCH_LIMIT is cut
+# into windows expected to fill WINDOW_FILL of the cap, down to
+# MIN_WINDOW_SECS
+INITIAL_WINDOW_SECS = 7 * 24 * 60 * 60
+MIN_WINDOW_SECS = 60
+WINDOW_FILL = 0.8
+
+# Comment stage: requests in flight per corpus, and "load more comments"
+# expansions (one request each, up to 100 comments) per post
+COMMENT_CONCURRENCY = 8
+MORE_COMMENTS_BUDGET = 10
+
+
+def _flatten_comments(comments, post_id, community, more, submission):
     """
-    Generic keyword-based subreddit scraper:
-    - searches each keyword
-    - collects posts into a single dataframe
-    - cleans, merges, dedupes, logs via shared helpers
+    Comment records of a (partial) comment tree, walked depth-first
+    without keeping it; MoreComments placeholders are appended to `more`,
+    attached to `submission` so they can be expanded (those returned by
+    `comments(update=False)` aren't).
+    """
+    rows = []
+    stack = list(comments)
+    while stack:
+        item = stack.pop()
+        if isinstance(item, MoreComments):
+            item.submission = submission
+            more.append(item)
+            continue
+        rows.append(Comment.from_comment(item, post_id, community))
+        stack.extend(item.replies)
+    return rows
+
+
+class CommentFetcher:
+    """
+    Opt-in comment stage: fetches the threads of newly written posts and
+    streams them, one row per comment, to a CommentWriter.
+
+    A post costs one request for its comment page plus at most
+    `more_budget` MoreComments expansions (None: all), largest first; the
+    rest of a huge thread is skipped (and counted in `skipped`). A post's
+    expansions run in parallel, with at most `max_concurrency` requests
+    of the corpus in flight. Unlike `replace_more`, expanded comments are
+    never attached to the tree: their rows are buffered for the writer
+    and the objects dropped.
     """
 
-    reddit = get_reddit()
-    subreddit = await reddit.subreddit(community)
+    def __init__(self, writer, max_concurrency=COMMENT_CONCURRENCY, more_budget=MORE_COMMENTS_BUDGET):
+        self.writer = writer
+        self.more_budget = more_budget
+        self.posts = 0
+        self.failed_posts = 0
+        self.skipped = 0
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def _request(self, call, bucket, limits):
+        async with self._semaphore:
+            if bucket is None:
+                return await call()
+            return await paced_call(call, bucket, limits)
+
+    async def fetch(self, posts, *, reddit, bucket=None, limits=None):
+        """Fetch and write the comments of `posts`, (post ID, community) pairs."""
+        await asyncio.gather(
+            *(self._fetch_post(post_id, community, reddit, bucket, limits) for post_id, community in posts)
+        )
 
-    posts = {
-        "Title": [],
-        "Text": [],
-        "Username": [],
-        "ID": [],
-        "community": [],
-        "Date": [],
-        "Time": [],
-        "Post URL": [],
-    }
+    async def _fetch_post(self, post_id, community, reddit, bucket, limits):
+        try:
+            submission = await self._request(lambda: reddit.submission(post_id), bucket, limits)
+            # Expanding MoreComments only needs the submission's ID, so they
+            # hang off a lazy copy instead of keeping the fetched tree alive
+            parent = await reddit.submission(post_id, fetch=False)
+            more = []
+            await self.writer.add_async(_flatten_comments(submission.comments, post_id, community, more, parent))
+            del submission
+
+            # MoreComments sort largest first
+            heapq.heapify(more)
+            budget = self.more_budget
+            while more and (budget is None or budget > 0):
+                size = len(more) if budget is None else min(budget, len(more))
+                wave = [heapq.heappop(more) for _ in range(size)]
+                if budget is not None:
+                    budget -= size
+                expanded = await asyncio.gather(
+                    *(self._request(functools.partial(item.comments, update=False), bucket, limits) for item in wave)
+                )
+                for comments in expanded:
+                    await self.writer.add_async(_flatten_comments(comments, post_id, community, more, parent))
+                heapq.heapify(more)
+            self.skipped += sum(item.count for item in more)
+            self.posts += 1
+        except Exception as e:
+            # The post stays in the corpus; only its comments are missing
+            print(f"Comments of post {post_id} failed: {e}")
+            self.failed_posts += 1
+
+    async def close(self):
+        """Write the comments still buffered."""
+        await self.writer.flush_async()
+
+    def summary(self):
+        return (
+            f"{self.writer.total} comments of {self.posts} new posts "
+            f"({self.skipped} left unexpanded, {self.failed_posts} posts failed)"
+        )
 
-    total_raw = 0
 
-    for kw in keywords:
-        posts_generator = subreddit.search(kw, sort="new", limit=1000)
-        kw_count = 0
-        earliest_dt = None
+async def _open_writer(merged_filename):
+    """CorpusWriter for a merged corpus, built in a worker thread: loading its dedupe index reads disk."""
+    return await asyncio.to_thread(CorpusWriter, merged_filename)
+
+
+def _comment_stage(comment_fetcher, reddit, bucket=None, limits=None):
+    """
+    `fetch_comments` callback for `_stream_listing` that fetches comments
+    on `reddit`, paced by `bucket`; None without a comment stage.
+    """
+    if comment_fetcher is None:
+        return None
+    return functools.partial(comment_fetcher.fetch, reddit=reddit, bucket=bucket, limits=limits)
+
+
+async def _stream_listing(
+    *, posts_generator, writer, stats, community=None, stop_utc=None, keyword=None,
+    seen=None, source=None, on_batch=None, fetch_comments=None,
+):
+    """
+    Run one listing through the pipeline: fetch -> normalize -> drop empty
+    -> batch -> dedupe + write. At most one batch of Posts is held at a time.
+
+    Posts that `seen` shows another source already fetched for the same
+    corpus are dropped before they are built. `on_batch` is awaited with
+    the last post of every batch once it is written. `fetch_comments`
+    (see CommentFetcher.fetch) gets the posts each batch actually added.
+    """
+    posts = drop_empty(
+        normalize_posts(
+            posts_generator,
+            stats,
+            community=community,
+            stop_utc=stop_utc,
+            seen=seen,
+            corpus=writer.corpus,
+            source=source,
+        ),
+        stats,
+    )
+    async for batch in batched(posts):
+        matches = [(post.id, keyword) for post in batch] if keyword else None
+        new_rows = await writer.write_async(batch, matches=matches)
+        stats.new += len(new_rows)
+        if on_batch is not None:
+            await on_batch(batch[-1])
+        if fetch_comments is not None and len(new_rows):
+            await fetch_comments(zip(new_rows["ID"], new_rows["community"]))
+
+
+async def _cursor_pass(
+    *, open_listing, key, stats, limit, after, stop_utc, fetched=0, newest=None, **stream_kwargs
+):
+    """
+    One pass down a listing, from the top (`after=None`) or below the post
+    fullname `after`, that saves a cursor after every written batch and
+    advances the checkpoint to the pass's newest post when it completes.
+    Both rewrite a JSON file under the data folder lock, in a worker thread.
+    """
+    async def save_progress(post):
+        await asyncio.to_thread(save_cursor, key, {
+            "after": f"t3_{post.id}",
+            "fetched": fetched + stats.raw,
+            "newest": newest or stats.newest,
+        })
+
+    if limit > 0:
+        await _stream_listing(
+            posts_generator=open_listing(limit, after),
+            stats=stats,
+            stop_utc=stop_utc,
+            on_batch=save_progress,
+            **stream_kwargs,
+        )
 
-        async for post in posts_generator:
-            created_dt = datetime.datetime.fromtimestamp(post.created_utc)
+    mark = newest or stats.newest
+    if mark is not None:
+        await asyncio.to_thread(update_checkpoints, {key: mark})
+    await asyncio.to_thread(save_cursor, key, None)
 
-            posts["Date"].append(created_dt.strftime("%d-%m-%Y"))
-            posts["Time"].append(created_dt.strftime("%H:%M:%S"))
-            posts["Title"].append(post.title)
-            posts["Text"].append(post.selftext)
-            posts["Username"].append(str(post.author))
-            posts["ID"].append(post.id)
-            posts["Post URL"].append(post.url)
-            posts["community"].append(str(post.subreddit))
 
-            kw_count += 1
-            if earliest_dt is None or created_dt < earliest_dt:
-                earliest_dt = created_dt
+async def _run_listing(*, open_listing, key, limit, incremental, mark, stats, **stream_kwargs):
+    """
+    Stream one listing (a keyword search or a subreddit) into the writer,
+    adding its counts to `stats`.
+
+    `open_listing(limit, after)` starts the listing below the post fullname
+    `after`, or at the top for None. With `incremental`, paging stops at
+    the checkpoint `mark`, and a cursor saved after every written batch
+    lets an interrupted run (retries exhausted, job timeout, crash) be
+    resumed: the next run first pages on from the cursor down to the old
+    checkpoint, then fetches the newer posts from the top. So a failure
+    costs the unwritten batch, not the listing.
+    """
+    if not incremental:
+        await _stream_listing(posts_generator=open_listing(limit, None), stats=stats, **stream_kwargs)
+        return
+
+    cursor = load_cursors().get(key)
+    if cursor is not None:
+        tail = ListingStats()
+        try:
+            await _cursor_pass(
+                open_listing=open_listing,
+                key=key,
+                stats=tail,
+                limit=limit - cursor["fetched"],
+                after=cursor["after"],
+                stop_utc=stop_before(mark),
+                fetched=cursor["fetched"],
+                newest=cursor["newest"],
+                **stream_kwargs,
+            )
+        finally:
+            stats.merge(tail)
+        mark = cursor["newest"]
+
+    head = ListingStats()
+    try:
+        await _cursor_pass(
+            open_listing=open_listing,
+            key=key,
+            stats=head,
+            limit=limit,
+            after=None,
+            stop_utc=stop_before(mark),
+            **stream_kwargs,
+        )
+    finally:
+        stats.merge(head)
 
-        earliest_str = earliest_dt.strftime("%Y-%m-%d %H:%M:%S") if earliest_dt else "N/A"
-        print(f"[{label}] Keyword '{kw}' retrieved: {kw_count} posts (earliest: {earliest_str})")
-        total_raw += kw_count
 
-        await asyncio.sleep(sleep_secs)
+async def _search_keyword(
+    *, subreddit, kw: str, label: str, writer, stats, bucket=None, limits=None,
+    incremental=False, mark=None, seen=None, fetch_comments=None,
+):
+    """
+    Stream every search result for one keyword into `writer`, adding its
+    counts to `stats`.
 
-    await reddit.close()
+    When a rate-limit bucket is given, each listing page spends one token.
+    With `incremental`, paging stops at the checkpoint `mark` and an
+    interrupted search resumes from its saved cursor. `fetch_comments`
+    fetches the comments of every post the search added.
+    """
 
-    df = pd.DataFrame(posts)
-    cleaned_df, removed_empty, removed_duplicates = clean_dataframe(df, text_column="Text")
+    def open_listing(limit, after):
+        # asyncpraw's search adds its own params to the given ones: pass a
+        # dict or nothing, never None
+        listing = subreddit.search(
+            kw, sort="new", limit=limit, **({"params": {"after": after}} if after else {})
+        )
+        if bucket is not None:
+            listing = paced_listing(listing, bucket, limits)
+        return listing
+
+    await _run_listing(
+        open_listing=open_listing,
+        key=keyword_key(label, kw),
+        limit=SEARCH_LIMIT,
+        incremental=incremental,
+        mark=mark,
+        stats=stats,
+        writer=writer,
+        keyword=kw,
+        seen=seen,
+        source=(label, kw),
+        fetch_comments=fetch_comments,
+    )
 
-    stats = merge_clean_save(
-        df=cleaned_df,
-        merged_filename=merged_filename,
+    stop_note = ", stopped at checkpoint" if stats.reached_checkpoint else ""
+    print(
+        f"[{label}] Keyword '{kw}' retrieved: {stats.raw} posts, "
+        f"{len(stats.skipped_ids)} already fetched (earliest: {stats.earliest_str()}{stop_note})"
     )
 
+    return stats
+
+
+async def run_keyword_scraper(
+    *,
+    label: str,
+    community: str,
+    keywords,
+    merged_filename: str,
+    max_concurrency: int | None = None,
+    rate_limiter: RateLimitBucket | None = None,
+    incremental: bool = False,
+    reddit=None,
+    seen: SeenPosts | None = None,
+    pool: ClientPool | None = None,
+    comments: bool = False,
+):
+    """
+    Generic keyword-based subreddit scraper:
+    - searches each keyword
+    - streams posts in bounded batches into the merged corpus
+    - cleans, dedupes, appends, logs via shared helpers
+
+    Keywords are searched one after another, or with `max_concurrency`
+    in parallel tasks (at most `max_concurrency` at once). Either way
+    every page is paced by the client's rate-limit bucket, which follows
+    Reddit's X-Ratelimit headers and backs off on 429/5xx, instead of a
+    fixed sleep between keywords.
+
+    With `incremental`, each keyword stops paging once it reaches posts
+    already covered by its checkpoint, and the checkpoint is advanced once
+    its search completes. A keyword that fails is logged (and mapped to
+    its error in `failed_keywords`) without stopping the others; its saved
+    cursor lets the next run resume where it broke off.
+
+    Posts already returned by an earlier keyword (or, with a shared `seen`
+    registry, by another job writing the same corpus) are skipped before
+    they are built; their keyword is still recorded. The summary reports
+    how much each keyword overlaps the others.
+
+    With a client `pool`, each keyword search leases the client with the
+    most rate-limit budget left. A client passed as `reddit` (or a `pool`)
+    is used as-is and left open for the caller; otherwise every configured
+    credential gets a client for this run, always closed afterwards.
+    """
+
+    if seen is None:
+        seen = SeenPosts()
+
+    checkpoints = load_checkpoints() if incremental else {}
+    writer = await _open_writer(merged_filename)
+    comment_fetcher = CommentFetcher(CommentWriter(merged_filename)) if comments else None
+
+    results = {kw: ListingStats() for kw in keywords}
+    failed = {}
+
+    async with borrowed_pool(pool, reddit, rate_limiter) as pool:
+
+        async def search(kw):
+            try:
+                async with pool.lease() as client:
+                    await _search_keyword(
+                        subreddit=await client.reddit.subreddit(community),
+                        kw=kw,
+                        label=label,
+                        writer=writer,
+                        stats=results[kw],
+                        bucket=client.bucket,
+                        limits=client.limits,
+                        incremental=incremental,
+                        mark=checkpoints.get(keyword_key(label, kw)),
+                        seen=seen,
+                        fetch_comments=_comment_stage(comment_fetcher, client.reddit, client.bucket, client.limits),
+                    )
+            except Exception as e:
+                # Rows written before the failure stay; the cursor resumes the rest
+                print(f"[{label}] Keyword '{kw}' failed after {results[kw].raw} posts: {e}")
+                failed[kw] = str(e)
+
+        if max_concurrency:
+            semaphore = asyncio.Semaphore(max_concurrency)
+
+            async def bounded_search(kw):
+                async with semaphore:
+                    await search(kw)
+
+            await asyncio.gather(*(bounded_search(kw) for kw in keywords))
+        else:
+            for kw in keywords:
+                await search(kw)
+
+    if comment_fetcher is not None:
+        await comment_fetcher.close()
+    await asyncio.to_thread(enqueue_refresh, writer.corpus, writer.added)
+
+    total_raw = sum(kw_stats.raw for kw_stats in results.values())
+    skipped = [
+        (post_id, kw)
+        for kw, kw_stats in results.items()
+        for post_id in kw_stats.skipped_ids
+    ]
+    # Every batch is written by now, so the skipped posts' rows exist
+    await writer.record_matches_async(skipped)
+    keyword_overlap = seen.keyword_overlap(label)
+
+    stats = writer.stats()
     # Override raw_total with actual collected count (pre-cleaning)
     stats["raw_total"] = total_raw
 
     print(f"========== FINAL {label} SUMMARY ==========")
     print(f"Raw collected posts:          {total_raw}")
+    print(f"Skipped in flight (overlap):  {len(skipped)}")
     print(f"After clean before dedupe:    {stats['old_total']}")
     print(f"Final unique posts:           {stats['final_total']}")
     print(f"New unique posts added:       {stats['new_posts']}")
+    if comment_fetcher is not None:
+        print(f"Comments:                     {comment_fetcher.summary()}")
+    if failed:
+        print(f"Failed keywords (resume next run): {', '.join(failed)}")
+    print("Keyword overlap (posts / shared with another keyword / exclusive):")
+    for kw in keywords:
+        counts = keyword_overlap.get(kw, {"total": 0, "shared": 0})
+        exclusive = counts["total"] - counts["shared"]
+        print(f"  {kw:<35} {counts['total']:>5} / {counts['shared']:>5} / {exclusive:>5}")
     print("=========================================\n")
 
     return {
@@ -98,33 +460,95 @@ async def run_keyword_scraper(
         "old_total": stats["old_total"],
         "final_total": stats["final_total"],
         "new_posts": stats["new_posts"],
+        "skipped_in_flight": len(skipped),
+        "keyword_overlap": keyword_overlap,
+        "failed_keywords": failed,
+        "keyword_new_posts": {kw: kw_stats.new for kw, kw_stats in results.items()},
+        "new_comments": comment_fetcher.writer.total if comment_fetcher is not None else 0,
     }
 
 async def run_subreddit_scraper(
     *,
     communities,
     per_subreddit_limit: int = 250,
+    max_concurrency: int | None = None,
+    rate_limiter: RateLimitBucket | None = None,
+    incremental: bool = False,
+    reddit=None,
+    seen: SeenPosts | None = None,
+    pool: ClientPool | None = None,
+    comments: bool = False,
 ):
     """
     Scrape newest posts for multiple subreddits (non-keyword) and merge per subreddit.
     Returns aggregated stats consistent with the orchestrator expectation.
+
+    Subreddits are fetched one after another, or with `max_concurrency`
+    up to that many at once. Either way every page is paced by the leased
+    client's rate-limit bucket, and a failing subreddit is logged (and
+    mapped to its error in `failed_communities`) instead of aborting the
+    rest.
+
+    With `incremental`, each subreddit stops paging at its checkpoint, and
+    one that fails resumes from its saved cursor on the next run.
+
+    A shared `seen` registry records which posts the subreddits returned,
+    for cross-job overlap reporting.
+
+    With a client `pool`, each subreddit leases the client with the most
+    rate-limit budget left. A client passed as `reddit` (or a `pool`) is
+    used as-is and left open for the caller; otherwise every configured
+    credential gets a client for this run, always closed afterwards.
+
+    With `comments`, the comment threads of the posts each subreddit adds
+    are fetched too, into its corpus' comments table.
     """
 
-    reddit = get_reddit()
+    checkpoints = load_checkpoints() if incremental else {}
 
     total_raw = 0
     total_new = 0
-
-    for community in communities:
-        stats = await _scrape_single_subreddit(
-            reddit=reddit,
-            community=community,
-            limit=per_subreddit_limit,
-        )
+    total_comments = 0
+    failed = {}
+
+    async with borrowed_pool(pool, reddit, rate_limiter) as pool:
+
+        async def scrape(community):
+            try:
+                async with pool.lease() as client:
+                    return await _scrape_single_subreddit(
+                        reddit=client.reddit,
+                        community=community,
+                        limit=per_subreddit_limit,
+                        bucket=client.bucket,
+                        incremental=incremental,
+                        mark=checkpoints.get(community_key(community)),
+                        seen=seen,
+                        comments=comments,
+                    )
+            except Exception as e:
+                # Rows written before the failure stay; the cursor resumes the rest
+                print(f"Failed to scrape r/{community}: {e}")
+                failed[community] = str(e)
+                return None
+
+        if max_concurrency:
+            semaphore = asyncio.Semaphore(max_concurrency)
+
+            async def bounded_scrape(community):
+                async with semaphore:
+                    return await scrape(community)
+
+            results = await asyncio.gather(*(bounded_scrape(community) for community in communities))
+        else:
+            results = [await scrape(community) for community in communities]
+
+    for stats in results:
+        if stats is None:
+            continue
         total_raw += stats["raw_count"]
         total_new += stats["new_posts_added"]
-
-    await reddit.close()
+        total_comments += stats["new_comments"]
 
     return {
         "label": "SUBREDDITS",
@@ -132,63 +556,62 @@ async def run_subreddit_scraper(
         "old_total": None,
         "final_total": None,
         "new_posts": total_new,
+        "new_comments": total_comments,
+        "failed_communities": failed,
     }
 
 
-async def _scrape_single_subreddit(*, reddit, community: str, limit: int):
-    """Scrape newest posts from a subreddit and maintain a cleaned merged CSV."""
+async def _scrape_single_subreddit(
+    *, reddit, community: str, limit: int, bucket=None, incremental=False, mark=None,
+    seen=None, comments=False,
+):
+    """
+    Stream newest posts from a subreddit into its cleaned merged corpus
+    (and, with `comments`, their comment threads into its comments table).
+    """
 
     subreddit = await reddit.subreddit(community)
 
     print(f"Scraping newest posts from r/{community} ...")
-    posts_generator = subreddit.new(limit=limit)
-
-    posts_dict = {
-        "Title": [],
-        "Text": [],
-        "Username": [],
-        "ID": [],
-        "community": [],
-        "Date": [],
-        "Time": [],
-        "Post URL": [],
-    }
-
-    timestamps = []
-    raw_count = 0
-
-    async for post in posts_generator:
-        created_dt = datetime.datetime.fromtimestamp(post.created_utc)
 
-        posts_dict["Date"].append(created_dt.strftime("%d-%m-%Y"))
-        posts_dict["Time"].append(created_dt.strftime("%H:%M:%S"))
-        posts_dict["Title"].append(post.title)
-        posts_dict["Text"].append(post.selftext)
-        posts_dict["Username"].append(str(post.author))
-        posts_dict["ID"].append(post.id)
-        posts_dict["Post URL"].append(post.url)
-        posts_dict["community"].append(community)
-
-        timestamps.append(created_dt)
-        raw_count += 1
-
-    earliest_str = min(timestamps).strftime("%Y-%m-%d %H:%M:%S") if timestamps else "N/A"
-    print(f"Retrieved {raw_count} posts from r/{community} (earliest: {earliest_str})")
-
-    merged_file = os.path.join(TEMP_CSV_FOLDER, f"{community}_merged.csv")
-
-    initial_merged_count = 0
-    if os.path.exists(merged_file):
-        existing_df = pd.read_csv(merged_file)
-        initial_merged_count = len(existing_df)
-        df = pd.concat([existing_df, pd.DataFrame(posts_dict)], ignore_index=True)
-    else:
-        df = pd.DataFrame(posts_dict)
+    def limits():
+        return rate_limits(reddit)
+
+    def open_listing(limit, after):
+        listing = subreddit.new(limit=limit, params={"after": after} if after else None)
+        if bucket is not None:
+            listing = paced_listing(listing, bucket, limits)
+        return listing
+
+    writer = await _open_writer(f"{community}_merged.csv")
+    comment_fetcher = CommentFetcher(CommentWriter(f"{community}_merged.csv")) if comments else None
+    stats = ListingStats()
+    try:
+        await _run_listing(
+            open_listing=open_listing,
+            key=community_key(community),
+            limit=limit,
+            incremental=incremental,
+            mark=mark,
+            stats=stats,
+            writer=writer,
+            community=community,
+            seen=seen,
+            source=("SUBREDDITS", community),
+            fetch_comments=_comment_stage(comment_fetcher, reddit, bucket, limits),
+        )
+    finally:
+        if comment_fetcher is not None:
+            await comment_fetcher.close()
+        await asyncio.to_thread(enqueue_refresh, writer.corpus, writer.added)
 
-    df, removed_empty, removed_duplicates = clean_dataframe(df, text_column="Text")
-    after_dedupe = len(df)
+    raw_count = stats.raw
+    print(f"Retrieved {raw_count} posts from r/{community} (earliest: {stats.earliest_str()})")
 
-    df.to_csv(merged_file, index=False)
+    removed_empty = stats.empty + writer.removed_empty
+    removed_duplicates = writer.removed_duplicates
+    initial_merged_count = writer.old_total
+    after_dedupe = writer.stats()["final_total"]
 
     new_posts_added = after_dedupe - initial_merged_count
 
@@ -199,6 +622,8 @@ async def _scrape_single_subreddit(*, reddit, community: str, limit: int):
     print(f"Posts in merged file (before update): {initial_merged_count}")
     print(f"Posts in merged file (after update):  {after_dedupe}")
     print(f"New posts added to merged file:     {new_posts_added}")
+    if comment_fetcher is not None:
+        print(f"Comments:                           {comment_fetcher.summary()}")
     print("------------------------------------\n")
 
     return {
@@ -209,4 +634,386 @@ async def _scrape_single_subreddit(*, reddit, community: str, limit: int):
         "initial_merged_count": initial_merged_count,
         "final_merged_count": after_dedupe,
         "new_posts_added": new_posts_added,
+        "new_comments": comment_fetcher.writer.total if comment_fetcher is not None else 0,
+    }
+
+
+async def _fetch_info(reddit, fullnames):
+    """One /api/info request: the submissions Reddit still returns for up to 100 fullnames."""
+    return [submission async for submission in reddit.info(fullnames=fullnames)]
+
+
+async def run_refresh(
+    *,
+    max_concurrency: int | None = None,
+    reddit=None,
+    pool: ClientPool | None = None,
+    now: float | None = None,
+):
+    """
+    Re-fetch the recently ingested posts whose refresh is due (see
+    common.refresh) and append a snapshot of each (score, comment count,
+    removed/edited state) to the snapshots table of every corpus that
+    holds it.
+
+    Due posts are fetched INFO_BATCH_SIZE fullnames per /api/info request,
+    so refreshing thousands of posts costs tens of requests. Up to
+    `max_concurrency` batches run at once, each on the pool client with
+    the most budget left and paced by its rate-limit bucket. A post Reddit
+    no longer returns is snapshotted as "missing"; a batch that fails stays
+    due for the next run.
+    """
+    now = time.time() if now is None else now
+    queue = load_refresh_queue()
+    due = due_refreshes(queue, now)
+    batches = [due[i:i + INFO_BATCH_SIZE] for i in range(0, len(due), INFO_BATCH_SIZE)]
+
+    refreshed = []
+    snapshots = {}
+    missing = 0
+    failed = 0
+
+    async with borrowed_pool(pool, reddit) as pool:
+        semaphore = asyncio.Semaphore(max_concurrency or 1)
+
+        async def refresh(batch):
+            nonlocal missing, failed
+            try:
+                async with semaphore, pool.lease() as client:
+                    submissions = await paced_call(
+                        functools.partial(_fetch_info, client.reddit, [f"t3_{post_id}" for post_id in batch]),
+                        client.bucket,
+                        client.limits,
+                    )
+            except Exception as e:
+                print(f"Refresh of {len(batch)} posts failed: {e}")
+                failed += 1
+                return
+
+            found = {submission.id: submission for submission in submissions}
+            for post_id in batch:
+                entry = queue[post_id]
+                if post_id in found:
+                    snapshot = Snapshot.from_submission(found[post_id], entry["community"], entry["stage"], int(now))
+                else:
+                    snapshot = Snapshot.missing(post_id, entry["community"], entry["stage"], int(now))
+                    missing += 1
+                for corpus in entry["corpora"]:
+                    snapshots.setdefault(corpus, []).append(snapshot)
+            refreshed.extend(batch)
+
+        await asyncio.gather(*(refresh(batch) for batch in batches))
+
+    # One append per corpus; the posts stay due until their snapshots are written
+    for corpus, corpus_snapshots in snapshots.items():
+        await asyncio.to_thread(append_snapshots, corpus, corpus_snapshots)
+    queued = await asyncio.to_thread(record_refreshes, refreshed, now) if refreshed else len(queue)
+
+    return {
+        "due": len(due),
+        "refreshed": len(refreshed),
+        "missing": missing,
+        "requests": len(batches),
+        "failed_batches": failed,
+        "queued": queued,
+    }
+
+
+def _read_post_ids(path):
+    """
+    Post IDs listed in a text file, one per line, as bare IDs ("1abcde")
+    or fullnames ("t3_1abcde"); blank lines, "#" comments and repeats are
+    skipped.
+    """
+    post_ids = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            post_id = line.split("#", 1)[0].strip()
+            if post_id.startswith("t3_"):
+                post_id = post_id[3:]
+            if post_id:
+                post_ids[post_id] = None
+    return list(post_ids)
+
+
+async def _iterate(items):
+    for item in items:
+        yield item
+
+
+async def backfill_ids(
+    *,
+    ids_path: str,
+    merged_filename: str,
+    max_concurrency: int | None = None,
+    reddit=None,
+    pool: ClientPool | None = None,
+    comments: bool = False,
+):
+    """
+    Hydrate the posts listed in `ids_path` (e.g. from an external dump or
+    a colleague's dataset) into a merged corpus.
+
+    IDs the corpus already holds are skipped before anything is fetched,
+    so running the same file again resumes an interrupted backfill. The
+    rest are fetched INFO_BATCH_SIZE per /api/info request, up to
+    `max_concurrency` batches at once on the pool's clients and paced by
+    their rate-limit buckets. Every batch goes through the scrapers'
+    pipeline (normalize -> drop empty -> clean + dedupe + append, and with
+    `comments` the comment stage), and its posts are queued for refreshes
+    like scraped ones.
+    """
+    post_ids = await asyncio.to_thread(_read_post_ids, ids_path)
+    writer = await _open_writer(merged_filename)
+    known = await asyncio.to_thread(writer.index.known_ids, post_ids)
+    todo = [post_id for post_id in post_ids if post_id not in known]
+    batches = [todo[i:i + INFO_BATCH_SIZE] for i in range(0, len(todo), INFO_BATCH_SIZE)]
+
+    comment_fetcher = CommentFetcher(CommentWriter(merged_filename)) if comments else None
+    stats = ListingStats()
+    failed_ids = 0
+
+    async with borrowed_pool(pool, reddit) as pool:
+        semaphore = asyncio.Semaphore(max_concurrency or 1)
+
+        async def backfill(batch):
+            nonlocal failed_ids
+            try:
+                async with semaphore, pool.lease() as client:
+                    submissions = await paced_call(
+                        functools.partial(_fetch_info, client.reddit, [f"t3_{post_id}" for post_id in batch]),
+                        client.bucket,
+                        client.limits,
+                    )
+                    await _stream_listing(
+                        posts_generator=_iterate(submissions),
+                        writer=writer,
+                        stats=stats,
+                        fetch_comments=_comment_stage(comment_fetcher, client.reddit, client.bucket, client.limits),
+                    )
+            except Exception as e:
+                # Written batches stay; a rerun skips them and retries the rest
+                print(f"Backfill of {len(batch)} IDs failed: {e}")
+                failed_ids += len(batch)
+
+        await asyncio.gather(*(backfill(batch) for batch in batches))
+
+    if comment_fetcher is not None:
+        await comment_fetcher.close()
+    await asyncio.to_thread(enqueue_refresh, writer.corpus, writer.added)
+
+    not_found = len(todo) - failed_ids - stats.raw
+    writer_stats = writer.stats()
+
+    print(f"========== BACKFILL {writer.corpus} ==========")
+    print(f"IDs in file:                  {len(post_ids)}")
+    print(f"Already in corpus (skipped):  {len(known)}")
+    print(f"Fetched:                      {stats.raw} ({len(batches)} requests)")
+    print(f"Not returned by Reddit:       {not_found}")
+    print(f"Removed empty text posts:     {stats.empty + writer.removed_empty}")
+    print(f"Removed duplicate-text posts: {writer.removed_duplicates}")
+    print(f"New unique posts added:       {writer_stats['new_posts']}")
+    if comment_fetcher is not None:
+        print(f"Comments:                     {comment_fetcher.summary()}")
+    if failed_ids:
+        print(f"Failed IDs (rerun to retry):  {failed_ids}")
+    print("=========================================\n")
+
+    return {
+        "label": "BACKFILL",
+        "raw_total": stats.raw,
+        "old_total": writer_stats["old_total"],
+        "final_total": writer_stats["final_total"],
+        "new_posts": writer_stats["new_posts"],
+        "skipped_known": len(known),
+        "not_found": not_found,
+        "failed_ids": failed_ids,
+        "requests": len(batches),
+        "new_comments": comment_fetcher.writer.total if comment_fetcher is not None else 0,
+    }
+
+
+class SearchWindowIgnored(RuntimeError):
+    """Reddit answered a time-window search with posts outside the window."""
+
+
+def _window_query(kw, start, end):
+    """
+    Search query for `kw` posts created in [start, end] (epoch seconds,
+    inclusive). Reddit's search only takes time ranges in cloudsearch
+    syntax, so it is sent with syntax="cloudsearch".
+    """
+    escaped = kw.replace("\\", "\\\\").replace("'", "\\'")
+    return f"(and timestamp:{start}..{end} '{escaped}')"
+
+
+async def _within_window(submissions, start, end):
+    """
+    Pass search results through, failing fast if one is outside the
+    window: then Reddit ignored the time filter, and marking windows as
+    searched would record coverage that was never fetched.
+    """
+    async for submission in submissions:
+        if not start <= submission.created_utc <= end:
+            raise SearchWindowIgnored(
+                f"post {submission.id} ({int(submission.created_utc)}) is outside the "
+                f"searched window {start}..{end}; Reddit did not apply the time filter"
+            )
+        yield submission
+
+
+def _refine_window(start, end, density):
+    """
+    Cut [start, end] into windows expected to hold WINDOW_FILL of
+    SEARCH_LIMIT posts each, at `density` posts per second.
+    """
+    size = max(MIN_WINDOW_SECS, int(SEARCH_LIMIT * WINDOW_FILL / density))
+    return [(a, min(a + size - 1, end)) for a in range(start, end + 1, size)]
+
+
+async def _gather_or_cancel(coros):
+    """
+    Run `coros` concurrently. If one raises, cancel the others and wait
+    for them to stop before re-raising, so none keeps fetching or writing
+    after the caller has moved on (unlike a bare asyncio.gather).
+    """
+    tasks = [asyncio.ensure_future(coro) for coro in coros]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+
+async def run_keyword_backfill(
+    *,
+    label: str,
+    community: str,
+    keywords,
+    merged_filename: str,
+    since_utc: int,
+    until_utc: int | None = None,
+    max_concurrency: int | None = None,
+    reddit=None,
+    pool: ClientPool | None = None,
+):
+    """
+    Historical backfill of keyword searches past Reddit's SEARCH_LIMIT.
+
+    Each keyword's range [since_utc, until_utc] is searched in time
+    windows of INITIAL_WINDOW_SECS. A window whose search returns the
+    full SEARCH_LIMIT is saturated: the part its results covered is kept,
+    and the older rest is cut into smaller windows sized from the post
+    density just seen, so busy keywords get narrow windows and quiet ones
+    stay wide. Up to `max_concurrency` windows are searched at once, on
+    the pool's clients and paced by their rate-limit buckets.
+
+    Every completed window is recorded (see `load_windows`), so an
+    interrupted or failed backfill resumes with the gaps only. Windows
+    already at MIN_WINDOW_SECS that still saturate are kept as searched
+    and reported as truncated.
+
+    Posts go through the scrapers' pipeline into the merged corpus, but
+    are not queued for refreshes: their score and comments have settled.
+    A result outside its window raises SearchWindowIgnored, after the
+    other windows in flight have been cancelled.
+    """
+    until_utc = int(time.time()) if until_utc is None else until_utc
+    seen = SeenPosts()
+    writer = await _open_writer(merged_filename)
+    done = load_windows()
+    results = {
+        kw: {"stats": ListingStats(), "windows": 0, "refined": 0, "truncated": 0, "failed": 0}
+        for kw in keywords
+    }
+
+    async with borrowed_pool(pool, reddit) as pool:
+        semaphore = asyncio.Semaphore(max_concurrency or 1)
+
+        async def search_window(kw, start, end):
+            counts = results[kw]
+            window = ListingStats()
+            try:
+                async with semaphore, pool.lease() as client:
+                    subreddit = await client.reddit.subreddit(community)
+                    listing = subreddit.search(
+                        _window_query(kw, start, end), sort="new", syntax="cloudsearch", limit=SEARCH_LIMIT
+                    )
+                    await _stream_listing(
+                        posts_generator=_within_window(
+                            paced_listing(listing, client.bucket, client.limits), start, end
+                        ),
+                        writer=writer,
+                        stats=window,
+                        keyword=kw,
+                        seen=seen,
+                        source=(label, kw),
+                    )
+            except SearchWindowIgnored:
+                raise
+            except Exception as e:
+                print(f"[{label}] Keyword '{kw}' window {start}..{end} failed (resume next run): {e}")
+                counts["failed"] += 1
+                return
+            finally:
+                counts["stats"].merge(window)
+            counts["windows"] += 1
+
+            key = keyword_key(label, kw)
+            if window.raw < SEARCH_LIMIT:
+                await asyncio.to_thread(mark_window_done, key, start, end)
+                return
+            if end - start < MIN_WINDOW_SECS:
+                await asyncio.to_thread(mark_window_done, key, start, end)
+                counts["truncated"] += 1
+                return
+
+            # Results are newest first: (oldest, end] is covered, posts from
+            # the second `oldest` itself maybe only in part
+            oldest = window.earliest_utc
+            if oldest < end:
+                await asyncio.to_thread(mark_window_done, key, oldest + 1, end)
+            counts["refined"] += 1
+            density = window.raw / (end - oldest + 1)
+            await _gather_or_cancel(
+                search_window(kw, a, b) for a, b in _refine_window(start, oldest, density)
+            )
+
+        windows = [
+            (kw, a, min(a + INITIAL_WINDOW_SECS - 1, gap_end))
+            for kw in keywords
+            for gap_start, gap_end in pending_windows(
+                done.get(keyword_key(label, kw), []), since_utc, until_utc
+            )
+            for a in range(gap_start, gap_end + 1, INITIAL_WINDOW_SECS)
+        ]
+        # Reddit ignoring the time filter aborts the whole backfill: stop
+        # the other windows before the pool and writer go away
+        await _gather_or_cancel(search_window(kw, a, b) for kw, a, b in windows)
+
+    total_raw = sum(counts["stats"].raw for counts in results.values())
+    stats = writer.stats()
+
+    print(f"========== BACKFILL {label} ==========")
+    print("Keyword (posts / windows searched / refined / truncated / failed):")
+    for kw, counts in results.items():
+        print(
+            f"  {kw:<35} {counts['stats'].raw:>7} / {counts['windows']:>4} / {counts['refined']:>4} / "
+            f"{counts['truncated']:>3} / {counts['failed']:>3}"
+        )
+    print(f"Raw collected posts:          {total_raw}")
+    print(f"New unique posts added:       {stats['new_posts']}")
+    print("=========================================\n")
+
+    return {
+        "label": label,
+        "raw_total": total_raw,
+        "old_total": stats["old_total"],
+        "final_total": stats["final_total"],
+        "new_posts": stats["new_posts"],
+        "windows": sum(counts["windows"] for counts in results.values()),
+        "truncated_windows": sum(counts["truncated"] for counts in results.values()),
+        "failed_windows": sum(counts["failed"] for counts in results.values()),
     }
@@ -0,0 +1,102 @@
+import json
+import os
+import time
+
+from common.atomic_io import atomic_path, data_lock
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+TEMP_CSV_FOLDER = os.environ.get("REDDIT_DATA_DIR", os.path.join(BASE_DIR, "data_tmp"))
+REFRESH_FILE = os.path.join(TEMP_CSV_FOLDER, "refresh.json")
+
+os.makedirs(TEMP_CSV_FOLDER, exist_ok=True)
+
+# A post is re-fetched this long after it was ingested, once per age:
+# score and comment count move fast at first, then settle
+REFRESH_AGES_SECS = (60 * 60, 6 * 60 * 60, 24 * 60 * 60, 7 * 24 * 60 * 60)
+
+# Fullnames per /api/info request (Reddit's maximum)
+INFO_BATCH_SIZE = 100
+
+
+def load_refresh_queue(path=REFRESH_FILE):
+    """
+    Load the posts waiting for a refresh.
+
+    Returns a dict of post ID -> {"corpora": corpora holding the post,
+    "community": its subreddit, "ingested_at": epoch seconds, "stage":
+    index of its next age in REFRESH_AGES_SECS}; empty if none.
+    """
+    if not os.path.exists(path):
+        return {}
+
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save(queue, path):
+    # The queue holds every post of the last week; json.dumps encodes in C,
+    # json.dump with a file does not
+    with atomic_path(path) as tmp_path:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(queue))
+
+
+def refresh_due_at(entry):
+    return entry["ingested_at"] + REFRESH_AGES_SECS[entry["stage"]]
+
+
+def enqueue_refresh(corpus, posts, now=None, path=REFRESH_FILE):
+    """
+    Queue newly ingested posts, (post ID, community) pairs of `corpus`,
+    for their refreshes. A post already queued for another corpus keeps
+    its schedule and is snapshotted for both.
+
+    Blocking (it rewrites the whole queue): async callers run it in a
+    worker thread. The read-merge-write holds the data folder lock.
+    """
+    if not posts:
+        return
+
+    now = time.time() if now is None else now
+    with data_lock(os.path.dirname(path)):
+        queue = load_refresh_queue(path)
+        for post_id, community in posts:
+            entry = queue.setdefault(
+                post_id, {"corpora": [], "community": community, "ingested_at": now, "stage": 0}
+            )
+            if corpus not in entry["corpora"]:
+                entry["corpora"].append(corpus)
+        _save(queue, path)
+
+
+def due_refreshes(queue, now=None):
+    """Post IDs of `queue` due for a refresh by `now`, most overdue first."""
+    now = time.time() if now is None else now
+    due = [post_id for post_id, entry in queue.items() if refresh_due_at(entry) <= now]
+    due.sort(key=lambda post_id: refresh_due_at(queue[post_id]))
+    return due
+
+
+def record_refreshes(post_ids, now=None, path=REFRESH_FILE):
+    """
+    Move refreshed posts on to their next age, skipping ages that already
+    passed (a refresh overdue by days is not repeated for each missed
+    age); posts past the last age leave the queue. Returns the number of
+    posts still queued.
+    """
+
+    now = time.time() if now is None else now
+    with data_lock(os.path.dirname(path)):
+        queue = load_refresh_queue(path)
+        for post_id in post_ids:
+            entry = queue.get(post_id)
+            if entry is None:
+                continue
+            entry["stage"] += 1
+            while entry["stage"] < len(REFRESH_AGES_SECS) and refresh_due_at(entry) <= now:
+                entry["stage"] += 1
+            if entry["stage"] >= len(REFRESH_AGES_SECS):
+                del queue[post_id]
+        if post_ids:
+            _save(queue, path)
+    return len(queue)
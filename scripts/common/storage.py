@@ -0,0 +1,849 @@
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import uuid
+from contextlib import contextmanager
+
+import pandas as pd
+
+from common.atomic_io import (
+    atomic_path,
+    data_lock,
+    fsync_dir,
+    fsync_path,
+    recover_path,
+    remove_path,
+    replace_dir,
+)
+from common.dedupe_index import DedupeIndex, digest, row_digests
+from common.post import POST_COLUMNS
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+TEMP_CSV_FOLDER = os.environ.get("REDDIT_DATA_DIR", os.path.join(BASE_DIR, "data_tmp"))
+
+os.makedirs(TEMP_CSV_FOLDER, exist_ok=True)
+
+# "csv" (default), "parquet" or "sqlite"
+STORAGE_BACKEND = os.environ.get("REDDIT_STORAGE_BACKEND", "csv")
+
+CHUNK_ROWS = 100_000
+
+# In a staged Parquet tail: the part files it replaces
+TAIL_REPLACES = "replaces.json"
+
+
+def corpus_name(merged_filename):
+    """'GENAI_merged.csv' -> 'GENAI_merged'."""
+    name, ext = os.path.splitext(merged_filename)
+    return name if ext == ".csv" else merged_filename
+
+
+def companion_corpus(corpus, kind):
+    """
+    'GENAI_merged', 'comments' -> 'GENAI_merged_comments': where the file
+    backends keep a corpus' comments or snapshots.
+    """
+    return f"{corpus}_{kind}"
+
+
+def _ordered(df):
+    known = [c for c in POST_COLUMNS if c in df.columns]
+    return df[known + [c for c in df.columns if c not in known]]
+
+
+def _file_hash(path, size=None, block_size=1 << 20):
+    """blake2b hex digest of the first `size` bytes of a file (all of it by default)."""
+    h = hashlib.blake2b(digest_size=16)
+    remaining = os.path.getsize(path) if size is None else size
+    with open(path, "rb") as f:
+        while remaining > 0:
+            block = f.read(min(block_size, remaining))
+            if not block:
+                break
+            h.update(block)
+            remaining -= len(block)
+    return h.hexdigest()
+
+
+class _FileStorage:
+    """Shared parts of the file-based backends: a `.idx` sidecar per corpus."""
+
+    def corpus_index(self, corpus, rebuild=False):
+        """Persistent DedupeIndex of a corpus, rebuilt if missing, stale or asked to."""
+        self.recover(corpus)
+        chunks = self.iter_chunks(corpus, columns=["ID", "Text"])
+        if rebuild:
+            return DedupeIndex.rebuild(self.path(corpus), chunks=chunks)
+        return DedupeIndex.load(self.path(corpus), chunks=chunks)
+
+    def empty_index(self, corpus):
+        """Fresh index to fill while rewriting a corpus; `save()` it afterwards."""
+        return DedupeIndex(self.path(corpus))
+
+    def prefix_index(self, corpus, rows, pairs_hash):
+        """Index of the first `rows` rows recorded for the corpus (see DedupeIndex.load_prefix)."""
+        return DedupeIndex.load_prefix(self.path(corpus), rows, pairs_hash)
+
+    def value_counts(self, corpus, column):
+        return self.read(corpus, columns=[column])[column].value_counts()
+
+    def record_matches(self, corpus, matches):
+        """File backends keep no keyword matches."""
+
+    def append_comments(self, corpus, df):
+        """Append comment rows (COMMENT_COLUMNS) to the corpus' comments companion."""
+        self.append(companion_corpus(corpus, "comments"), df)
+
+    def append_snapshots(self, corpus, df):
+        """Append refresh snapshot rows (SNAPSHOT_COLUMNS) to the corpus' snapshots companion."""
+        self.append(companion_corpus(corpus, "snapshots"), df)
+
+
+class CsvStorage(_FileStorage):
+    """One `<corpus>.csv` file per corpus in the data folder (the original layout)."""
+
+    name = "csv"
+
+    def __init__(self, folder=TEMP_CSV_FOLDER):
+        self.folder = folder
+
+    def path(self, corpus):
+        return os.path.join(self.folder, f"{corpus}.csv")
+
+    def exists(self, corpus):
+        return os.path.exists(self.path(corpus))
+
+    def corpora(self):
+        return sorted(
+            filename[: -len(".csv")]
+            for filename in os.listdir(self.folder)
+            if filename.endswith("_merged.csv")
+        )
+
+    def read(self, corpus, columns=None):
+        return pd.read_csv(self.path(corpus), usecols=columns)
+
+    def iter_chunks(self, corpus, columns=None, chunk_rows=CHUNK_ROWS):
+        yield from pd.read_csv(self.path(corpus), usecols=columns, chunksize=chunk_rows)
+
+    def write(self, corpus, df):
+        self.write_chunks(corpus, [df])
+
+    def write_chunks(self, corpus, chunks):
+        """Replace the corpus with a stream of dataframes via a temp file swapped in at the end."""
+        with atomic_path(self.path(corpus)) as tmp_path:
+            header = True
+            for chunk in chunks:
+                chunk.to_csv(tmp_path, mode="w" if header else "a", header=header, index=False)
+                header = False
+            if header:
+                pd.DataFrame(columns=POST_COLUMNS).to_csv(tmp_path, index=False)
+
+    def recover(self, corpus):
+        """
+        Roll back an append a crash interrupted (its journal still records
+        the size before it) and drop leftover temp files.
+        """
+        path = self.path(corpus)
+        journal = f"{path}.append"
+        if os.path.exists(journal):
+            with open(journal, encoding="utf-8") as f:
+                size = int(f.read())
+            if os.path.exists(path) and os.path.getsize(path) > size:
+                os.truncate(path, size)
+                fsync_path(path)
+            os.remove(journal)
+        recover_path(path)
+
+        staging = f"{path}.tail"
+        recover_path(staging)
+        if os.path.exists(staging):
+            self._finish_tail(path, staging)
+
+    def append(self, corpus, df, matches=None):
+        """Append rows in place; a journal lets `recover` undo a half-written append."""
+        self.recover(corpus)
+        path = self.path(corpus)
+        if not os.path.exists(path):
+            self.write(corpus, df)
+            return
+
+        journal = f"{path}.append"
+        with atomic_path(journal) as tmp_path:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(str(os.path.getsize(path)))
+
+        columns = pd.read_csv(path, nrows=0).columns
+        df.reindex(columns=columns).to_csv(path, mode="a", header=False, index=False)
+        fsync_path(path)
+        os.remove(journal)
+
+    def export_csv(self, corpus):
+        return self.path(corpus)
+
+    def fingerprint(self, corpus):
+        """Cheap change check: file size and modification time."""
+        stat = os.stat(self.path(corpus))
+        return {"size": stat.st_size, "mtime": stat.st_mtime_ns}
+
+    def content_hash(self, corpus):
+        return _file_hash(self.path(corpus))
+
+    def tail_chunks(self, corpus, entry, chunk_rows=CHUNK_ROWS):
+        """
+        Rows appended since `entry` (a fingerprint plus content hash), or
+        None if the file was rewritten rather than appended to.
+        """
+        path = self.path(corpus)
+        if os.path.getsize(path) < entry["size"] or _file_hash(path, entry["size"]) != entry["hash"]:
+            return None
+        columns = pd.read_csv(path, nrows=0).columns
+        return self._read_from(path, entry["size"], columns, chunk_rows)
+
+    def replace_tail(self, corpus, entry, chunks):
+        """
+        Replace the rows appended since `entry` with `chunks` (what a dedupe
+        pass kept of them). The new tail is staged in full, with the size to
+        cut the file back to, before the file is touched; `recover`
+        finishes a replacement a crash interrupted.
+        """
+        path = self.path(corpus)
+        columns = pd.read_csv(path, nrows=0).columns
+        staging = f"{path}.tail"
+        with atomic_path(staging) as tmp_path:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(f"{entry['size']}\n")
+            for chunk in chunks:
+                chunk.reindex(columns=columns).to_csv(tmp_path, mode="a", header=False, index=False)
+        self._finish_tail(path, staging)
+
+    def _finish_tail(self, path, staging):
+        with open(staging, "rb") as src:
+            size = int(src.readline())
+            os.truncate(path, size)
+            with open(path, "ab") as dst:
+                shutil.copyfileobj(src, dst)
+        fsync_path(path)
+        os.remove(staging)
+
+    def _read_from(self, path, offset, columns, chunk_rows):
+        if os.path.getsize(path) == offset:
+            return
+        with open(path, "rb") as f:
+            f.seek(offset)
+            yield from pd.read_csv(f, names=columns, header=None, chunksize=chunk_rows)
+
+
+class ParquetStorage(_FileStorage):
+    """
+    One Parquet dataset per corpus under `<folder>/parquet/<corpus>/`,
+    hive-partitioned by community and month of the post.
+
+    Reads can project single columns, and appends add new files instead
+    of rewriting old ones. Requires pyarrow.
+    """
+
+    name = "parquet"
+    partition_cols = ["community", "month"]
+
+    def __init__(self, folder=TEMP_CSV_FOLDER):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise RuntimeError(
+                "The parquet storage backend needs pyarrow. Please run "
+                "`pip install pyarrow` or set REDDIT_STORAGE_BACKEND=csv."
+            )
+
+        self.folder = folder
+        self.root = os.path.join(folder, "parquet")
+        os.makedirs(self.root, exist_ok=True)
+
+    def path(self, corpus):
+        return os.path.join(self.root, corpus)
+
+    def exists(self, corpus):
+        return os.path.isdir(self.path(corpus))
+
+    def corpora(self):
+        return sorted(
+            name for name in os.listdir(self.root)
+            if name.endswith("_merged") and os.path.isdir(os.path.join(self.root, name))
+        )
+
+    def _dataset(self, corpus):
+        import pyarrow.dataset as ds
+
+        return ds.dataset(self.path(corpus), format="parquet", partitioning="hive")
+
+    def _to_frame(self, table):
+        df = table.to_pandas()
+        if "community" in df.columns:
+            df["community"] = df["community"].astype(str)
+        return _ordered(df.drop(columns=["month"], errors="ignore"))
+
+    def read(self, corpus, columns=None):
+        return self._to_frame(self._dataset(corpus).to_table(columns=columns))
+
+    def iter_chunks(self, corpus, columns=None, chunk_rows=CHUNK_ROWS):
+        import pyarrow as pa
+
+        for batch in self._dataset(corpus).to_batches(columns=columns, batch_size=chunk_rows):
+            yield self._to_frame(pa.Table.from_batches([batch]))
+
+    def _write_dataset(self, df, root):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if df.empty:
+            os.makedirs(root, exist_ok=True)
+            return
+
+        df = df.copy()
+        # Date is stored as dd-mm-YYYY; partition by YYYY-MM
+        df["month"] = df["Date"].str[6:10] + "-" + df["Date"].str[3:5]
+        pq.write_to_dataset(
+            pa.Table.from_pandas(df.astype("string"), preserve_index=False),
+            root,
+            partition_cols=self.partition_cols,
+            basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+        )
+
+    def write(self, corpus, df):
+        self.write_chunks(corpus, [df])
+
+    def write_chunks(self, corpus, chunks):
+        """Replace the corpus with a stream of dataframes, built next to it and swapped in."""
+        path = self.path(corpus)
+        tmp_path = f"{path}.tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        try:
+            for chunk in chunks:
+                self._write_dataset(chunk, tmp_path)
+        except BaseException:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            raise
+        replace_dir(tmp_path, path)
+
+    def recover(self, corpus):
+        """Finish or undo a dataset swap a crash interrupted and drop staged appends."""
+        path = self.path(corpus)
+        recover_path(path)
+        remove_path(f"{path}.append")
+
+        staging = f"{path}.tail"
+        recover_path(staging)
+        if os.path.exists(staging):
+            self._finish_tail(path, staging)
+
+    def append(self, corpus, df, matches=None):
+        """
+        Stage the new part files next to the dataset, then move them in, so
+        the dataset never holds a half-written file.
+        """
+        self.recover(corpus)
+        path = self.path(corpus)
+        staging = f"{path}.append"
+        self._write_dataset(df, staging)
+        fsync_path(staging)
+        self._move_parts(staging, path)
+
+    def _move_parts(self, staging, path):
+        """Move the part files of a staged dataset into the corpus, then drop the staging folder."""
+        for folder, _, filenames in os.walk(staging):
+            target = os.path.join(path, os.path.relpath(folder, staging))
+            os.makedirs(target, exist_ok=True)
+            for filename in filenames:
+                os.replace(os.path.join(folder, filename), os.path.join(target, filename))
+            fsync_dir(target)
+        shutil.rmtree(staging, ignore_errors=True)
+
+    def export_csv(self, corpus):
+        """Write the corpus to `<folder>/<corpus>.csv` for downstream CSV users."""
+        csv_path = os.path.join(self.folder, f"{corpus}.csv")
+        with atomic_path(csv_path) as tmp_path:
+            pd.DataFrame(columns=POST_COLUMNS).to_csv(tmp_path, index=False)
+            for chunk in self.iter_chunks(corpus):
+                chunk.reindex(columns=POST_COLUMNS).to_csv(
+                    tmp_path, mode="a", header=False, index=False
+                )
+        return csv_path
+
+    def _part_files(self, corpus):
+        root = self.path(corpus)
+        return {
+            os.path.relpath(os.path.join(folder, filename), root): os.path.getsize(os.path.join(folder, filename))
+            for folder, _, filenames in os.walk(root)
+            for filename in filenames
+        }
+
+    def fingerprint(self, corpus):
+        """Cheap change check: dataset size, newest modification time and part files."""
+        root = self.path(corpus)
+        files = self._part_files(corpus)
+        mtime = max((os.stat(os.path.join(root, name)).st_mtime_ns for name in files), default=0)
+        return {"size": sum(files.values()), "mtime": mtime, "files": files}
+
+    def content_hash(self, corpus):
+        # Part files are never modified in place, so names and sizes identify the content
+        listing = "".join(f"{name}:{size}\n" for name, size in sorted(self._part_files(corpus).items()))
+        return hashlib.blake2b(listing.encode("utf-8"), digest_size=16).hexdigest()
+
+    def tail_chunks(self, corpus, entry, chunk_rows=CHUNK_ROWS):
+        """
+        Rows in part files added since `entry`, or None if any recorded part
+        file was removed or changed (the dataset was rewritten).
+        """
+        files = self._part_files(corpus)
+        if any(files.get(name) != size for name, size in entry["files"].items()):
+            return None
+        new_files = sorted(name for name in files if name not in entry["files"])
+        return self._read_files(corpus, new_files, chunk_rows)
+
+    def replace_tail(self, corpus, entry, chunks):
+        """
+        Replace the part files added since `entry` with new ones holding
+        `chunks` (what a dedupe pass kept of their rows). The new parts are
+        staged with the list of files they replace; `recover` finishes a
+        replacement a crash interrupted.
+        """
+        path = self.path(corpus)
+        replaced = sorted(name for name in self._part_files(corpus) if name not in entry["files"])
+        staging = f"{path}.tail"
+        with atomic_path(staging) as tmp_path:
+            os.makedirs(tmp_path)
+            for chunk in chunks:
+                self._write_dataset(chunk, tmp_path)
+            with open(os.path.join(tmp_path, TAIL_REPLACES), "w", encoding="utf-8") as f:
+                json.dump(replaced, f)
+        self._finish_tail(path, staging)
+
+    def _finish_tail(self, path, staging):
+        # The list goes once its files are gone, before the new parts move in
+        replaces = os.path.join(staging, TAIL_REPLACES)
+        if os.path.exists(replaces):
+            with open(replaces, encoding="utf-8") as f:
+                for name in json.load(f):
+                    remove_path(os.path.join(path, name))
+            os.remove(replaces)
+        self._move_parts(staging, path)
+
+    def _read_files(self, corpus, names, chunk_rows):
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        if not names:
+            return
+        root = self.path(corpus)
+        dataset = ds.dataset(
+            [os.path.join(root, name) for name in names],
+            format="parquet",
+            partitioning="hive",
+            partition_base_dir=root,
+        )
+        for batch in dataset.to_batches(batch_size=chunk_rows):
+            yield self._to_frame(pa.Table.from_batches([batch]))
+
+
+# DataFrame column -> posts table column
+SQL_COLUMNS = {
+    "Title": "title",
+    "Text": "text",
+    "Username": "username",
+    "ID": "id",
+    "community": "community",
+    "Date": "date",
+    "Time": "time",
+    "Post URL": "url",
+}
+
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    id TEXT PRIMARY KEY,
+    title TEXT,
+    text TEXT,
+    username TEXT,
+    community TEXT,
+    date TEXT,
+    time TEXT,
+    url TEXT,
+    id_digest INTEGER NOT NULL,
+    text_digest INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS posts_id_digest ON posts (id_digest);
+CREATE INDEX IF NOT EXISTS posts_text_digest ON posts (text_digest);
+CREATE INDEX IF NOT EXISTS posts_community ON posts (community);
+
+CREATE TABLE IF NOT EXISTS matches (
+    corpus TEXT NOT NULL,
+    post_id TEXT NOT NULL REFERENCES posts (id),
+    keyword TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (corpus, post_id, keyword)
+);
+CREATE INDEX IF NOT EXISTS matches_post_id ON matches (post_id);
+
+CREATE TABLE IF NOT EXISTS comments (
+    id TEXT PRIMARY KEY,
+    post_id TEXT NOT NULL,
+    parent_id TEXT,
+    username TEXT,
+    text TEXT,
+    score INTEGER,
+    community TEXT,
+    date TEXT,
+    time TEXT
+);
+CREATE INDEX IF NOT EXISTS comments_post_id ON comments (post_id);
+
+CREATE TABLE IF NOT EXISTS snapshots (
+    id TEXT NOT NULL,
+    stage INTEGER NOT NULL,
+    score INTEGER,
+    comments INTEGER,
+    upvote_ratio REAL,
+    removed TEXT,
+    edited INTEGER,
+    community TEXT,
+    date TEXT,
+    time TEXT,
+    PRIMARY KEY (id, stage)
+);
+"""
+
+# DataFrame column -> comments table column
+SQL_COMMENT_COLUMNS = {
+    "ID": "id",
+    "Post ID": "post_id",
+    "Parent ID": "parent_id",
+    "Username": "username",
+    "Text": "text",
+    "Score": "score",
+    "community": "community",
+    "Date": "date",
+    "Time": "time",
+}
+
+# DataFrame column -> snapshots table column
+SQL_SNAPSHOT_COLUMNS = {
+    "ID": "id",
+    "Stage": "stage",
+    "Score": "score",
+    "Comments": "comments",
+    "Upvote Ratio": "upvote_ratio",
+    "Removed": "removed",
+    "Edited": "edited",
+    "community": "community",
+    "Date": "date",
+    "Time": "time",
+}
+
+# Max host parameters per IN (...) lookup
+SQL_BATCH = 500
+
+
+def _signed(digest):
+    """SQLite integers are signed 64-bit."""
+    return digest - (1 << 64) if digest >= 1 << 63 else digest
+
+
+class SqliteCorpusIndex:
+    """
+    DedupeIndex stand-in answered by the SQLite indexes of one corpus.
+
+    Only the digests of the batch being checked are looked up, so nothing
+    proportional to the corpus is loaded. Rows are persisted by the
+    storage's `append`, so `flush`/`save` have nothing left to do.
+    """
+
+    def __init__(self, storage, corpus):
+        self.storage = storage
+        self.corpus = corpus
+
+    def __len__(self):
+        with self.storage.connect() as conn:
+            (count,) = conn.execute(
+                "SELECT COUNT(DISTINCT post_id) FROM matches WHERE corpus = ?", (self.corpus,)
+            ).fetchone()
+        return count
+
+    def _existing(self, conn, column, digests):
+        found = set()
+        for start in range(0, len(digests), SQL_BATCH):
+            batch = [_signed(d) for d in digests[start:start + SQL_BATCH]]
+            rows = conn.execute(
+                f"SELECT p.{column} FROM posts p JOIN matches m ON m.post_id = p.id "
+                f"WHERE m.corpus = ? AND p.{column} IN ({', '.join('?' * len(batch))})",
+                [self.corpus, *batch],
+            )
+            found.update(row[0] % (1 << 64) for row in rows)
+        return found
+
+    def known_ids(self, post_ids):
+        post_ids = list(post_ids)
+        digests = [digest(post_id) for post_id in post_ids]
+        with self.storage.connect() as conn:
+            found = self._existing(conn, "id_digest", digests)
+        return {post_id for post_id, id_digest in zip(post_ids, digests) if id_digest in found}
+
+    def add_new(self, ids, texts):
+        with self.storage.connect() as conn:
+            seen = DedupeIndex()
+            seen.ids = self._existing(conn, "id_digest", ids)
+            seen.texts = self._existing(conn, "text_digest", texts)
+        return seen.add_new(ids, texts)
+
+    def mark(self):
+        return None
+
+    def rollback(self, mark):
+        # Nothing is recorded before the storage's `append` commits
+        pass
+
+    def flush(self):
+        pass
+
+    def save(self):
+        pass
+
+
+class SqliteStorage:
+    """
+    Every corpus in one SQLite database (`<folder>/reddit_posts.sqlite`).
+
+    - `posts` holds each Reddit post once, keyed on its ID
+    - `matches` records which corpus (label or community) and keyword
+      matched it
+    - writes are `INSERT OR IGNORE` bulk upserts; dedupe lookups and the
+      leaderboard are indexed queries instead of full reads
+    """
+
+    name = "sqlite"
+
+    def __init__(self, folder=TEMP_CSV_FOLDER):
+        self.folder = folder
+        self.db_path = os.path.join(folder, "reddit_posts.sqlite")
+        with self.connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SQLITE_SCHEMA)
+
+    @contextmanager
+    def connect(self):
+        """Short-lived connection; commits on success, rolls back on error."""
+        conn = sqlite3.connect(self.db_path, timeout=60)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def path(self, corpus):
+        return self.db_path
+
+    def exists(self, corpus):
+        with self.connect() as conn:
+            row = conn.execute(
+                "SELECT 1 FROM matches WHERE corpus = ? LIMIT 1", (corpus,)
+            ).fetchone()
+        return row is not None
+
+    def corpora(self):
+        with self.connect() as conn:
+            rows = conn.execute("SELECT DISTINCT corpus FROM matches ORDER BY corpus")
+            return [row[0] for row in rows]
+
+    def _select(self, columns):
+        columns = columns or list(SQL_COLUMNS)
+        select = ", ".join(f'p.{SQL_COLUMNS[c]} AS "{c}"' for c in columns)
+        return (
+            f"SELECT {select} FROM posts p WHERE p.id IN "
+            "(SELECT post_id FROM matches WHERE corpus = ?) ORDER BY p.rowid"
+        )
+
+    def read(self, corpus, columns=None):
+        with self.connect() as conn:
+            return pd.read_sql_query(self._select(columns), conn, params=(corpus,))
+
+    def iter_chunks(self, corpus, columns=None, chunk_rows=CHUNK_ROWS):
+        with self.connect() as conn:
+            yield from pd.read_sql_query(
+                self._select(columns), conn, params=(corpus,), chunksize=chunk_rows
+            )
+
+    def corpus_index(self, corpus, rebuild=False):
+        return SqliteCorpusIndex(self, corpus)
+
+    def empty_index(self, corpus):
+        # Rewrites only dedupe within the dataframe being written
+        return DedupeIndex()
+
+    def prefix_index(self, corpus, rows, pairs_hash):
+        return None
+
+    def recover(self, corpus):
+        # SQLite transactions already roll back interrupted writes
+        pass
+
+    def fingerprint(self, corpus):
+        """Posts in the corpus and the newest post row; unchanged means nothing was added."""
+        with self.connect() as conn:
+            posts, max_rowid = conn.execute(
+                "SELECT COUNT(*), MAX(p.rowid) FROM posts p WHERE p.id IN "
+                "(SELECT post_id FROM matches WHERE corpus = ?)",
+                (corpus,),
+            ).fetchone()
+        return {"posts": posts, "max_rowid": max_rowid}
+
+    def content_hash(self, corpus):
+        return None
+
+    def tail_chunks(self, corpus, entry, chunk_rows=CHUNK_ROWS):
+        # Rows can join a corpus anywhere in the posts table; always a full pass
+        return None
+
+    def _insert(self, conn, corpus, df, matches):
+        ids, texts = row_digests(df)
+        values = df.reindex(columns=list(SQL_COLUMNS)).astype(object)
+        values = values.where(values.notna(), None)
+        rows = [
+            (*row, _signed(id_digest), _signed(text_digest))
+            for row, id_digest, text_digest in zip(values.itertuples(index=False), ids, texts)
+        ]
+        conn.executemany(
+            f"INSERT OR IGNORE INTO posts ({', '.join(SQL_COLUMNS.values())}, id_digest, text_digest) "
+            f"VALUES ({', '.join('?' * (len(SQL_COLUMNS) + 2))})",
+            rows,
+        )
+
+        # Keywords of new rows are recorded directly; keywords of posts
+        # dropped as duplicates only if the post is already in this corpus
+        new_ids = set(df["ID"])
+        matches = list(matches or ())
+        matched = {post_id for post_id, _ in matches}
+        conn.executemany(
+            "INSERT OR IGNORE INTO matches (corpus, post_id, keyword) VALUES (?, ?, ?)",
+            [(corpus, post_id, keyword) for post_id, keyword in matches if post_id in new_ids]
+            + [(corpus, post_id, "") for post_id in new_ids - matched],
+        )
+        self._insert_matches(
+            conn, corpus, [(post_id, keyword) for post_id, keyword in matches if post_id not in new_ids]
+        )
+
+    def _insert_matches(self, conn, corpus, matches):
+        conn.executemany(
+            "INSERT OR IGNORE INTO matches (corpus, post_id, keyword) SELECT ?, ?, ? "
+            "WHERE EXISTS (SELECT 1 FROM matches WHERE corpus = ? AND post_id = ?)",
+            [(corpus, post_id, keyword, corpus, post_id) for post_id, keyword in matches],
+        )
+
+    def append(self, corpus, df, matches=None):
+        """Upsert posts; `matches` is an optional list of (post ID, keyword) pairs."""
+        with self.connect() as conn:
+            self._insert(conn, corpus, df, matches)
+
+    def record_matches(self, corpus, matches):
+        """Add (post ID, keyword) pairs for posts already in the corpus; others are ignored."""
+        with self.connect() as conn:
+            self._insert_matches(conn, corpus, matches)
+
+    def _insert_rows(self, table, columns, df):
+        values = df.reindex(columns=list(columns)).astype(object)
+        values = values.where(values.notna(), None)
+        with self.connect() as conn:
+            conn.executemany(
+                f"INSERT OR IGNORE INTO {table} ({', '.join(columns.values())}) "
+                f"VALUES ({', '.join('?' * len(columns))})",
+                list(values.itertuples(index=False)),
+            )
+
+    def append_comments(self, corpus, df):
+        """
+        Insert comment rows (COMMENT_COLUMNS). Comments hang off their post,
+        which `matches` ties to its corpora, so one table serves them all.
+        """
+        self._insert_rows("comments", SQL_COMMENT_COLUMNS, df)
+
+    def append_snapshots(self, corpus, df):
+        """Insert refresh snapshot rows (SNAPSHOT_COLUMNS), one per post and stage."""
+        self._insert_rows("snapshots", SQL_SNAPSHOT_COLUMNS, df)
+
+    def write(self, corpus, df):
+        """Make the corpus contain exactly the posts in `df`, keeping their keywords."""
+        self.write_chunks(corpus, [df])
+
+    def write_chunks(self, corpus, chunks):
+        """
+        `write` for a stream of dataframes (which may be read from this
+        corpus); the corpus only changes when the transaction commits.
+        """
+        with self.connect() as conn:
+            conn.execute("CREATE TEMP TABLE keep (id TEXT PRIMARY KEY)")
+            conn.execute("CREATE TEMP TABLE chunk (id TEXT PRIMARY KEY)")
+            for df in chunks:
+                conn.execute("DELETE FROM chunk")
+                conn.executemany("INSERT OR IGNORE INTO chunk VALUES (?)", ((i,) for i in df["ID"]))
+                conn.execute("INSERT OR IGNORE INTO keep SELECT id FROM chunk")
+                new_ids = {
+                    row[0] for row in conn.execute(
+                        "SELECT id FROM chunk WHERE id NOT IN "
+                        "(SELECT post_id FROM matches WHERE corpus = ?)",
+                        (corpus,),
+                    )
+                }
+                self._insert(conn, corpus, df[df["ID"].isin(new_ids)], None)
+            conn.execute(
+                "DELETE FROM matches WHERE corpus = ? AND post_id NOT IN (SELECT id FROM keep)",
+                (corpus,),
+            )
+            conn.execute("DROP TABLE keep")
+            conn.execute("DROP TABLE chunk")
+
+    def value_counts(self, corpus, column):
+        with self.connect() as conn:
+            rows = conn.execute(
+                f"SELECT p.{SQL_COLUMNS[column]}, COUNT(*) FROM posts p WHERE p.id IN "
+                "(SELECT post_id FROM matches WHERE corpus = ?) "
+                f"GROUP BY p.{SQL_COLUMNS[column]} ORDER BY 2 DESC",
+                (corpus,),
+            ).fetchall()
+        return pd.Series(dict(rows), name="count", dtype="int64").rename_axis(column)
+
+    def export_csv(self, corpus):
+        """Write the corpus to `<folder>/<corpus>.csv` for downstream CSV users."""
+        csv_path = os.path.join(self.folder, f"{corpus}.csv")
+        with atomic_path(csv_path) as tmp_path:
+            pd.DataFrame(columns=POST_COLUMNS).to_csv(tmp_path, index=False)
+            for chunk in self.iter_chunks(corpus):
+                chunk.to_csv(tmp_path, mode="a", header=False, index=False)
+        return csv_path
+
+
+STORAGE_BACKENDS = {
+    "csv": CsvStorage,
+    "parquet": ParquetStorage,
+    "sqlite": SqliteStorage,
+}
+
+
+def get_storage(folder=TEMP_CSV_FOLDER, backend=None):
+    """Return the storage backend named by `backend` or REDDIT_STORAGE_BACKEND."""
+    backend = backend or STORAGE_BACKEND
+    if backend not in STORAGE_BACKENDS:
+        raise ValueError(
+            f"Unknown storage backend '{backend}'. "
+            f"Choose one of: {', '.join(STORAGE_BACKENDS)}."
+        )
+    return STORAGE_BACKENDS[backend](folder)
+
+
+def rebuild_indexes(folder=TEMP_CSV_FOLDER, backend=None):
+    """Rebuild the dedupe index of every merged corpus; returns corpus -> unique rows."""
+    storage = get_storage(folder, backend)
+    with data_lock(folder):
+        return {
+            corpus: len(storage.corpus_index(corpus, rebuild=True))
+            for corpus in storage.corpora()
+        }
@@ -1,12 +1,30 @@
+import argparse
 import asyncio
+import contextlib
+import datetime
 import sys
-from common.reddit_scraper import run_keyword_scraper, run_subreddit_scraper
+import time
+from common.reddit_scraper import (
+    backfill_ids,
+    run_keyword_backfill,
+    run_keyword_scraper,
+    run_refresh,
+    run_subreddit_scraper,
+)
+from common.atomic_io import run_lock
+from common.cadence import CadenceScheduler, load_cadence, save_cadence
+from common.checkpoints import community_key, keyword_key
 from common.cleaning import deduplicate_merged_csvs
+from common.io_helpers import export_csvs
+from common.client_pool import ClientPool, borrowed_pool
+from common.pipeline import SeenPosts
+from common.reddit_client import RedditClient
+from common.storage import get_storage
 import os
 
 # Repo root: scripts → Reddit_scraper
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))
-DATA_DIR = os.path.join(BASE_DIR, "data_tmp")
+DATA_DIR = os.environ.get("REDDIT_DATA_DIR", os.path.join(BASE_DIR, "data_tmp"))
 os.makedirs(DATA_DIR, exist_ok=True)
 
 GENAI_KEYWORDS = [
@@ -22,6 +40,43 @@ GENAI_KEYWORDS = [
 
 CONSULTING_KEYWORDS = ["consulting", "consultant", "consultancy"]
 
+# Keyword jobs: label -> (keywords, merged corpus)
+KEYWORD_JOBS = {
+    "GENAI": (GENAI_KEYWORDS, "GENAI_merged.csv"),
+    "CONSULTING": (CONSULTING_KEYWORDS, "consulting_kw_merged.csv"),
+}
+
+# Keywords searched in parallel per keyword scraper, per client in the
+# credential pool (each client has its own rate-limit bucket)
+KEYWORD_CONCURRENCY = 4
+
+# Subreddits fetched at once (per client); enough to cover the whole list
+# in one wave
+SUBREDDIT_CONCURRENCY = 12
+
+# /api/info batches (100 posts each) in flight per client, for the
+# refresh queue and ID backfills
+INFO_CONCURRENCY = 4
+
+# A job still running after this long is cancelled; the others keep going
+JOB_TIMEOUT_SECS = 20 * 60
+
+# Daemon mode: merged corpora are deduplicated and exported at most this often
+DAEMON_DEDUPE_SECS = 60 * 60
+
+# Daemon mode: the scrapers' own output of every wave is appended here,
+# the terminal only gets one line per polled source
+DAEMON_LOG = os.path.join(DATA_DIR, "daemon.log")
+
+# Jaccard threshold for dropping near-duplicate posts in the dedupe run
+# (e.g. "0.8"); unset keeps exact-only dedupe
+_near_dup_env = os.environ.get("REDDIT_NEAR_DUP_THRESHOLD")
+NEAR_DUP_THRESHOLD = float(_near_dup_env) if _near_dup_env else None
+
+# "1" also fetches the comment threads of newly added posts (one request
+# per post and up to MORE_COMMENTS_BUDGET more, so off by default)
+FETCH_COMMENTS = os.environ.get("REDDIT_FETCH_COMMENTS") == "1"
+
 SUBREDDIT_COMMUNITIES = [
     "ChatGPT",
     "consulting",
@@ -38,22 +93,70 @@ SUBREDDIT_COMMUNITIES = [
 ]
 
 
-def print_global_summary(genai_stats, consulting_stats, sub_stats):
-    """Unified clean summary printed after all scrapers run."""
+def _format_job_line(label, stats, unique=True):
+    if "error" in stats:
+        return f"{label}: FAILED ({stats['error']})"
 
-    print("\n========== GLOBAL SUMMARY ==========")
+    line = f"{label}: {stats['new_posts']} new posts (raw: {stats['raw_total']}"
+    if unique:
+        line += f", unique: {stats['final_total']}"
+    line += ")"
+    if stats.get("new_comments"):
+        line += f" + {stats['new_comments']} comments"
+    if stats.get("failed_keywords"):
+        line += f" [{len(stats['failed_keywords'])} keyword(s) failed, resume next cycle]"
+    if stats.get("failed_communities"):
+        line += f" [{len(stats['failed_communities'])} subreddit(s) failed, resume next cycle]"
+    return line
 
-    # GENAI
-    print(f"GENAI: {genai_stats['new_posts']} new posts "
-          f"(raw: {genai_stats['raw_total']}, unique: {genai_stats['final_total']})")
 
-    # CONSULTING
-    print(f"CONSULTING: {consulting_stats['new_posts']} new posts "
-          f"(raw: {consulting_stats['raw_total']}, unique: {consulting_stats['final_total']})")
+def _format_refresh_line(stats):
+    line = (
+        f"Refresh: {stats['refreshed']} of {stats['due']} due posts snapshotted in "
+        f"{stats['requests']} requests ({stats['missing']} gone, {stats['queued']} still queued)"
+    )
+    if stats["failed_batches"]:
+        line += f" [{stats['failed_batches']} batch(es) failed, retried next run]"
+    return line
 
-    # SUBREDDITS
-    print(f"SUBREDDITS: {sub_stats['new_posts']} new posts "
-          f"(raw: {sub_stats['raw_total']})")
+
+def print_global_summary(
+    genai_stats, consulting_stats, sub_stats, job_overlap=None, http_stats=None,
+    pool_stats=None, refresh_stats=None,
+):
+    """Unified clean summary printed after all scrapers run."""
+
+    print("\n========== GLOBAL SUMMARY ==========")
+
+    print(_format_job_line("GENAI", genai_stats))
+    print(_format_job_line("CONSULTING", consulting_stats))
+    print(_format_job_line("SUBREDDITS", sub_stats, unique=False))
+    if refresh_stats:
+        print(_format_refresh_line(refresh_stats))
+
+    if job_overlap:
+        print("Posts fetched by more than one job:")
+        for (job_a, job_b), count in sorted(job_overlap.items()):
+            print(f"  {job_a} & {job_b}: {count}")
+
+    if http_stats:
+        print(
+            f"HTTP: {http_stats['requests']} requests, "
+            f"{http_stats['new_connections']} new connections (TLS handshakes), "
+            f"{http_stats['reused_connections']} reused, "
+            f"{http_stats['token_fetches']} token fetches"
+        )
+
+    if pool_stats:
+        print(
+            f"Rate-limit wait: {sum(c['waited'] for c in pool_stats):.1f}s pacing, "
+            f"{sum(c['backoff'] for c in pool_stats):.1f}s backing off "
+            f"({sum(c['retries'] for c in pool_stats)} retries after 429/5xx)"
+        )
+    if pool_stats and len(pool_stats) > 1:
+        print("Credential pool (listings / seconds pacing / seconds backing off):")
+        for i, client in enumerate(pool_stats, start=1):
+            print(f"  client {i}: {client['listings']} / {client['waited']:.1f}s / {client['backoff']:.1f}s")
 
     print("====================================\n")
 
@@ -61,9 +164,7 @@ def print_global_summary(genai_stats, consulting_stats, sub_stats):
     print("======== TOP 25 SUBREDDITS (GENAI) =========")
     # We extract leaderboard from GENAI file
     try:
-        import pandas as pd
-        df = pd.read_csv(os.path.join(DATA_DIR, "GENAI_merged.csv"))
-        counts = df["community"].value_counts().head(25)
+        counts = get_storage(DATA_DIR).value_counts("GENAI_merged", "community").head(25)
         for i, (sub, count) in enumerate(counts.items(), start=1):
             print(f"{i}. {sub:<25} {count} posts")
     except Exception as e:
@@ -76,70 +177,323 @@ def deduplicate_all_csvs():
     """Run deduplication across all merged CSVs and log the results."""
     print("======= DEDUPLICATION RUN =======")
     try:
-        results = deduplicate_merged_csvs(csv_folder=DATA_DIR, quiet=True)
+        results = deduplicate_merged_csvs(
+            csv_folder=DATA_DIR, quiet=True, near_dup_threshold=NEAR_DUP_THRESHOLD
+        )
         for result in results:
+            if result["skipped"]:
+                print(f"{result['filename']}: {result['new_total']} (unchanged, skipped)")
+                continue
             delta = result["old_total"] - result["new_total"]
-            print(f"{result['filename']}: {result['old_total']} -> {result['new_total']} (-{delta})")
+            note = " (appended rows only)" if result["incremental"] else ""
+            print(f"{result['filename']}: {result['old_total']} -> {result['new_total']} (-{delta}){note}")
     except Exception as e:
         print(f"Deduplication failed: {e}")
     print("=================================\n")
 
 
-async def run_all_once():
-    """Run all scrapers sequentially and return their summary dicts."""
-    genai_stats = await run_keyword_scraper(
-        label="GENAI",
-        community="all",
-        keywords=GENAI_KEYWORDS,
-        merged_filename="GENAI_merged.csv",
-        sleep_secs=10,
-    )
+def _failed_stats(label, error):
+    return {
+        "label": label,
+        "raw_total": 0,
+        "old_total": None,
+        "final_total": None,
+        "new_posts": 0,
+        "error": error,
+    }
+
+
+async def _run_job(label, job, timeout):
+    """Await one scraper with a timeout; failures become stats with an `error` key."""
+    try:
+        return await asyncio.wait_for(job, timeout)
+    except asyncio.TimeoutError:
+        print(f"[{label}] Timed out after {timeout}s")
+        return _failed_stats(label, f"timed out after {timeout}s")
+    except Exception as e:
+        print(f"[{label}] Failed: {e}")
+        return _failed_stats(label, str(e))
 
-    consulting_stats = await run_keyword_scraper(
-        label="CONSULTING",
+
+def _keyword_job(label, pool, seen, keywords=None):
+    """Scrape job for a keyword set (or just `keywords` out of it)."""
+    all_keywords, merged_filename = KEYWORD_JOBS[label]
+    keywords = keywords or all_keywords
+    return run_keyword_scraper(
+        label=label,
         community="all",
-        keywords=CONSULTING_KEYWORDS,
-        merged_filename="consulting_kw_merged.csv",
-        sleep_secs=5,
+        keywords=keywords,
+        merged_filename=merged_filename,
+        max_concurrency=KEYWORD_CONCURRENCY * len(pool),
+        incremental=True,
+        seen=seen,
+        pool=pool,
+        comments=FETCH_COMMENTS,
     )
 
-    sub_stats = await run_subreddit_scraper(
-        communities=SUBREDDIT_COMMUNITIES,
+
+def _subreddit_job(communities, pool, seen):
+    return run_subreddit_scraper(
+        communities=communities,
         per_subreddit_limit=250,
+        max_concurrency=SUBREDDIT_CONCURRENCY * len(pool),
+        incremental=True,
+        seen=seen,
+        pool=pool,
+        comments=FETCH_COMMENTS,
     )
+
+
+async def run_all_once(
+    *, concurrent=True, reddit=None, job_timeout=JOB_TIMEOUT_SECS, seen=None, pool=None
+):
+    """
+    Run all scrapers and return their summary dicts.
+
+    By default the three jobs run as parallel tasks over one shared client
+    and rate-limit bucket, each bounded by `job_timeout`; a failed or timed
+    out job is reported without discarding the others. With
+    `concurrent=False` they run one after another as before.
+
+    All jobs share one SeenPosts registry (pass `seen` to inspect it
+    afterwards), so a post is only built once per corpus per cycle.
+
+    With a client `pool` (one client and rate-limit bucket per credential)
+    each listing runs on the client with the most budget left. Without a
+    `pool` or `reddit` client, one is opened for the cycle and closed
+    afterwards.
+    """
+    async with borrowed_pool(pool, reddit) as pool:
+        if seen is None:
+            seen = SeenPosts()
+
+        jobs = {
+            "GENAI": _keyword_job("GENAI", pool, seen),
+            "CONSULTING": _keyword_job("CONSULTING", pool, seen),
+            "SUBREDDITS": _subreddit_job(SUBREDDIT_COMMUNITIES, pool, seen),
+        }
+
+        if concurrent:
+            results = await asyncio.gather(
+                *(_run_job(label, job, job_timeout) for label, job in jobs.items())
+            )
+        else:
+            results = [await _run_job(label, job, job_timeout) for label, job in jobs.items()]
+
+    genai_stats, consulting_stats, sub_stats = results
     return genai_stats, consulting_stats, sub_stats
 
 async def scheduler():
     """Main hourly loop with clean terminal + countdown refresh."""
-    # First run
-    await run_cycle()
-
-    # Ask once whether to continue hourly
-    user_choice = input("Run hourly cycles continuously? [y/N]: ").strip().lower()
-    if user_choice != "y":
-        print("Scheduler finished after single run.")
-        return
+    # One client per credential (shared HTTP session and connection pool,
+    # one OAuth token each) for every cycle
+    async with RedditClient() as client:
+        # First run
+        await run_cycle(client)
+
+        # Ask once whether to continue hourly
+        user_choice = input("Run hourly cycles continuously? [y/N]: ").strip().lower()
+        if user_choice != "y":
+            print("Scheduler finished after single run.")
+            return
+
+        # Continuous hourly loop
+        while True:
+            await countdown_minutes(60)
+            await run_cycle(client)
+
+
+async def run_cycle(client=None):
+    """
+    Execute one full scrape/dedupe/summary cycle with clean screen.
+
+    Uses `client` (a RedditClient) if given, else opens one for this cycle.
+    """
+    if client is None:
+        async with RedditClient() as client:
+            return await run_cycle(client)
 
-    # Continuous hourly loop
-    while True:
-        await countdown_minutes(60)
-        await run_cycle()
-
-
-async def run_cycle():
-    """Execute one full scrape/dedupe/summary cycle with clean screen."""
     # Clear terminal fully
     sys.stdout.write("\033c")
     sys.stdout.flush()
 
-    # Run scrapers
-    genai_stats, consulting_stats, sub_stats = await run_all_once()
+    http_before = client.stats.snapshot()
+
+    # One cycle at a time per data folder (e.g. the cron job and a local loop)
+    with run_lock(DATA_DIR):
+        # Run scrapers
+        seen = SeenPosts()
+        pool = ClientPool(client.clients)
+        genai_stats, consulting_stats, sub_stats = await run_all_once(pool=pool, seen=seen)
+
+        # Snapshot score/comments/removed state of posts ingested earlier
+        refresh_stats = await run_refresh(max_concurrency=INFO_CONCURRENCY * len(pool), pool=pool)
+
+        # Deduplicate merged CSVs
+        deduplicate_all_csvs()
 
-    # Deduplicate merged CSVs
-    deduplicate_all_csvs()
+        # Keep CSV copies for downstream users when storing in another format
+        export_csvs(DATA_DIR)
 
     # Print unified summary
-    print_global_summary(genai_stats, consulting_stats, sub_stats)
+    print_global_summary(
+        genai_stats,
+        consulting_stats,
+        sub_stats,
+        seen.job_overlap(),
+        client.stats.since(http_before),
+        pool.summary(),
+        refresh_stats,
+    )
+
+
+def _daemon_sources():
+    """Polled source name -> ("keyword", label, keyword) or ("community", community)."""
+    sources = {
+        keyword_key(label, kw): ("keyword", label, kw)
+        for label, (keywords, _) in KEYWORD_JOBS.items()
+        for kw in keywords
+    }
+    for community in SUBREDDIT_COMMUNITIES:
+        sources[community_key(community)] = ("community", community)
+    return sources
+
+
+async def _poll_wave(due, sources, pool):
+    """
+    Scrape the `due` sources together; returns {source name: stats} where
+    a keyword's stats are its own `new_posts` or its set's `error`.
+
+    Due keywords of one set share one scraper run, so each corpus still
+    has a single writer.
+    """
+    seen = SeenPosts()
+    keyword_sets = {}
+    jobs = {}
+    for name in due:
+        source = sources[name]
+        if source[0] == "keyword":
+            keyword_sets.setdefault(source[1], []).append(source[2])
+        else:
+            jobs[name] = _subreddit_job([source[1]], pool, seen)
+    for label, keywords in keyword_sets.items():
+        jobs[label] = _keyword_job(label, pool, seen, keywords)
+
+    results = await asyncio.gather(
+        *(_run_job(name, job, JOB_TIMEOUT_SECS) for name, job in jobs.items())
+    )
+    stats = dict(zip(jobs, results))
+
+    polled = {}
+    for name in due:
+        source = sources[name]
+        if source[0] == "community":
+            job_stats = stats[name]
+            if job_stats.get("failed_communities"):
+                error = job_stats["failed_communities"][source[1]]
+                job_stats = {"error": f"{error}; resuming from its cursor"}
+            polled[name] = job_stats
+            continue
+        label, kw = source[1], source[2]
+        job_stats = stats[label]
+        if "error" in job_stats:
+            polled[name] = job_stats
+        elif kw in job_stats["failed_keywords"]:
+            polled[name] = {"error": f"{job_stats['failed_keywords'][kw]}; resuming from its cursor"}
+        else:
+            polled[name] = {"new_posts": job_stats["keyword_new_posts"][kw]}
+    return polled
+
+
+async def daemon(client=None):
+    """
+    Non-interactive long-running mode (no prompt, no fixed hourly cycle).
+
+    Every keyword and every community is its own source, polled when it
+    is due: its interval follows its observed post rate (see
+    common.cadence), so busy sources are polled every few minutes and
+    quiet ones every few hours. The learned cadence is saved in the data
+    folder and survives restarts. Sources due together are polled in one
+    wave, under the data folder lock so a cron run can't interleave,
+    with the scrapers' output going to DAEMON_LOG; every wave also takes the refresh snapshots that have come due, and
+    the dedupe + CSV export pass runs at most every DAEMON_DEDUPE_SECS.
+    """
+    if client is None:
+        async with RedditClient() as client:
+            return await daemon(client)
+
+    sources = _daemon_sources()
+    cadence = CadenceScheduler(sources, load_cadence())
+    # One pool for the daemon's lifetime keeps each client's budget tracking
+    pool = ClientPool(client.clients)
+    last_dedupe = 0.0
+
+    while True:
+        await asyncio.sleep(max(0.0, cadence.next_due() - time.time()))
+        due = cadence.pop_due()
+
+        with run_lock(DATA_DIR):
+            stamp = time.strftime("%Y-%m-%d %H:%M:%S")
+            # Per-listing scraper output would drown the one line per source
+            with open(DAEMON_LOG, "a", encoding="utf-8") as log, contextlib.redirect_stdout(log):
+                print(f"========== WAVE {stamp} ==========")
+                polled = await _poll_wave(due, sources, pool)
+
+            for name, stats in polled.items():
+                if "error" in stats:
+                    interval = cadence.retry(name)
+                    print(f"[{stamp}] {name}: FAILED ({stats['error']}), retry in {interval / 60:.0f} min")
+                    continue
+                interval = cadence.record(name, stats["new_posts"])
+                print(f"[{stamp}] {name}: {stats['new_posts']} new posts, next poll in {interval / 60:.0f} min")
+            save_cadence(cadence.state())
+
+            refresh_stats = await run_refresh(max_concurrency=INFO_CONCURRENCY * len(pool), pool=pool)
+            if refresh_stats["due"]:
+                print(f"[{stamp}] {_format_refresh_line(refresh_stats)}")
+
+            if time.time() - last_dedupe >= DAEMON_DEDUPE_SECS:
+                deduplicate_all_csvs()
+                export_csvs(DATA_DIR)
+                last_dedupe = time.time()
+
+
+async def backfill(ids_path, merged_filename):
+    """Hydrate the post IDs listed in `ids_path` into one merged corpus."""
+    async with RedditClient() as client:
+        pool = ClientPool(client.clients)
+        with run_lock(DATA_DIR):
+            await backfill_ids(
+                ids_path=ids_path,
+                merged_filename=merged_filename,
+                max_concurrency=INFO_CONCURRENCY * len(pool),
+                pool=pool,
+                comments=FETCH_COMMENTS,
+            )
+
+
+async def history(since_utc, until_utc=None):
+    """Backfill every keyword job's searches from `since_utc` on, past the search cap."""
+    async with RedditClient() as client:
+        pool = ClientPool(client.clients)
+        with run_lock(DATA_DIR):
+            for label, (keywords, merged_filename) in KEYWORD_JOBS.items():
+                await run_keyword_backfill(
+                    label=label,
+                    community="all",
+                    keywords=keywords,
+                    merged_filename=merged_filename,
+                    since_utc=since_utc,
+                    until_utc=until_utc,
+                    max_concurrency=KEYWORD_CONCURRENCY * len(pool),
+                    pool=pool,
+                )
+
+
+def _utc_date(value):
+    """argparse type: YYYY-MM-DD (UTC midnight) to epoch seconds."""
+    date = datetime.datetime.strptime(value, "%Y-%m-%d")
+    return int(date.replace(tzinfo=datetime.timezone.utc).timestamp())
 
 
 async def countdown_minutes(minutes):
@@ -160,4 +514,43 @@ async def countdown_minutes(minutes):
 
 
 if __name__ == "__main__":
-    asyncio.run(run_cycle())
+    parser = argparse.ArgumentParser(description="Scrape Reddit into the merged corpora.")
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="keep running, polling each source at a cadence that follows its post rate",
+    )
+    parser.add_argument(
+        "--backfill-ids",
+        metavar="FILE",
+        help="hydrate the post IDs listed in FILE (one per line) into --corpus, then exit",
+    )
+    parser.add_argument(
+        "--corpus",
+        default="backfill_merged.csv",
+        help="merged corpus that --backfill-ids writes to (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--backfill-since",
+        metavar="YYYY-MM-DD",
+        type=_utc_date,
+        help="search every keyword job's history from this date (UTC) on, past the "
+             "1000-result search cap, then exit; resumes where an earlier run stopped. "
+             "Needs a search backend that honours cloudsearch timestamp: ranges: "
+             "reddit.com's current search ignores them, and the backfill then aborts "
+             "on its first window without recording any coverage",
+    )
+    parser.add_argument(
+        "--backfill-until",
+        metavar="YYYY-MM-DD",
+        type=_utc_date,
+        help="end date (UTC, exclusive) for --backfill-since (default: now)",
+    )
+    args = parser.parse_args()
+    if args.backfill_ids:
+        asyncio.run(backfill(args.backfill_ids, args.corpus))
+    elif args.backfill_since is not None:
+        until_utc = args.backfill_until - 1 if args.backfill_until is not None else None
+        asyncio.run(history(args.backfill_since, until_utc))
+    else:
+        asyncio.run(daemon() if args.daemon else run_cycle())
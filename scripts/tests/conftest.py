@@ -0,0 +1,12 @@
+import os
+import sys
+
+# The scripts import each other as top-level `common.*` modules, and the
+# tests reuse the benchmarks' fake Reddit
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SCRIPTS_DIR)
+sys.path.insert(0, os.path.join(SCRIPTS_DIR, "benchmarks"))
+
+# Imported before any `common` module: points REDDIT_DATA_DIR (checkpoints,
+# cursors, default corpora) at a scratch folder instead of data_tmp/
+import fake_reddit  # noqa: E402, F401
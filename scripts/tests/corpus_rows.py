@@ -0,0 +1,25 @@
+"""Synthetic corpus rows shared by the storage and dedupe tests."""
+import random
+
+import pandas as pd
+
+from common.post import POST_COLUMNS
+
+
+def random_texts(count, seed):
+    rng = random.Random(seed)
+    vocabulary = [f"word{i}" for i in range(5000)]
+    return [" ".join(rng.choices(vocabulary, k=30)) for _ in range(count)]
+
+
+def post_rows(ids, texts):
+    return pd.DataFrame({
+        "Title": [f"title {i}" for i in ids],
+        "Text": texts,
+        "Username": "someone",
+        "ID": [f"id{i}" for i in ids],
+        "community": "all",
+        "Date": "01-05-2024",
+        "Time": "12:00:00",
+        "Post URL": [f"https://reddit.com/{i}" for i in ids],
+    }, columns=POST_COLUMNS)
@@ -0,0 +1,30 @@
+"""CorpusWriter keeps its dedupe index in step with what reached the corpus."""
+import pytest
+
+import common.io_helpers as io_helpers
+import common.storage as storage_module
+from common.io_helpers import CorpusWriter
+
+from corpus_rows import post_rows, random_texts
+
+
+@pytest.mark.parametrize("backend", ["csv", "parquet", "sqlite"])
+def test_failed_append_leaves_rows_unseen(tmp_path, monkeypatch, backend):
+    monkeypatch.setattr(storage_module, "STORAGE_BACKEND", backend)
+    monkeypatch.setattr(io_helpers, "TEMP_CSV_FOLDER", str(tmp_path))
+    texts = random_texts(4, seed=5)
+    writer = CorpusWriter("kw_merged.csv")
+    writer.write(post_rows([0, 1], texts[:2]))
+
+    def failing_append(*args, **kwargs):
+        raise OSError("disk full")
+
+    with monkeypatch.context() as patched:
+        patched.setattr(type(writer.storage), "append", failing_append)
+        with pytest.raises(OSError):
+            writer.write(post_rows([2, 3], texts[2:]))
+
+    # The retry is written, and a fresh writer's index agrees with the corpus
+    assert len(writer.write(post_rows([2, 3], texts[2:]))) == 2
+    assert len(writer.write(post_rows([1], texts[1:2]))) == 0
+    assert len(CorpusWriter("kw_merged.csv").index) == len(writer.storage.read("kw_merged")) == 4
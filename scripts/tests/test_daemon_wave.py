@@ -0,0 +1,22 @@
+"""A daemon wave reports each failed source with its own error."""
+import asyncio
+import contextlib
+import io
+
+from fake_reddit import FakeReddit
+
+from common.checkpoints import community_key
+from common.client_pool import ClientPool
+from scheduler import _poll_wave
+
+
+def test_failed_subreddit_keeps_its_error():
+    # The first page request dies without a retry, like a crashed listing
+    pool = ClientPool([FakeReddit(latency=0, posts_per_listing=50, crash_at=1)])
+    sources = {community_key(c): ("community", c) for c in ("wavea", "waveb")}
+    with contextlib.redirect_stdout(io.StringIO()):
+        polled = asyncio.run(_poll_wave(list(sources), sources, pool))
+
+    errors = [stats["error"] for stats in polled.values() if "error" in stats]
+    assert errors == ["simulated crash on page request 1; resuming from its cursor"]
+    assert sum(stats.get("new_posts", 0) for stats in polled.values()) == 50
@@ -0,0 +1,36 @@
+"""data_lock keeps the threads of one process apart, even under a run's run_lock."""
+import os
+import threading
+import time
+
+from common.atomic_io import data_lock, run_lock
+
+THREADS = 8
+INCREMENTS = 20
+
+
+def test_threads_take_turns(tmp_path):
+    folder = str(tmp_path)
+    path = os.path.join(folder, "counter")
+    with open(path, "w") as f:
+        f.write("0")
+
+    def increment():
+        for _ in range(INCREMENTS):
+            with data_lock(folder):
+                with open(path) as f:
+                    count = int(f.read())
+                time.sleep(0.001)
+                # Re-entrant within the thread
+                with data_lock(folder), open(path, "w") as f:
+                    f.write(str(count + 1))
+
+    with run_lock(folder):
+        threads = [threading.Thread(target=increment) for _ in range(THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    with open(path) as f:
+        assert int(f.read()) == THREADS * INCREMENTS
@@ -0,0 +1,92 @@
+"""Near-duplicate dedupe passes over corpora that were only appended to."""
+import pytest
+
+import common.near_dupes as near_dupes
+import common.storage as storage_module
+from common.cleaning import clean_dataframe, deduplicate_merged_csvs
+from common.storage import get_storage
+
+from corpus_rows import post_rows, random_texts
+
+CORPUS = "kw_merged"
+THRESHOLD = 0.8
+
+
+def _append(storage, df):
+    """Append rows the way CorpusWriter does: dedupe against the index, append, flush."""
+    index = storage.corpus_index(CORPUS)
+    new_rows, _, _ = clean_dataframe(df, index=index)
+    storage.append(CORPUS, new_rows)
+    index.flush()
+
+
+def _dedupe(folder, threshold=THRESHOLD):
+    return deduplicate_merged_csvs(folder, quiet=True, near_dup_threshold=threshold, max_workers=1)[0]
+
+
+@pytest.fixture
+def hashed_rows(monkeypatch):
+    """Counts the texts MinHashed from here on."""
+    counter = {"rows": 0}
+    minhash_signatures = near_dupes.minhash_signatures
+
+    def counting(normalized, *args, **kwargs):
+        counter["rows"] += len(normalized)
+        return minhash_signatures(normalized, *args, **kwargs)
+
+    monkeypatch.setattr(near_dupes, "minhash_signatures", counting)
+    return counter
+
+
+@pytest.mark.parametrize("backend", ["csv", "parquet"])
+def test_near_dup_pass_reads_only_the_tail(tmp_path, monkeypatch, hashed_rows, backend):
+    monkeypatch.setattr(storage_module, "STORAGE_BACKEND", backend)
+    folder = str(tmp_path)
+    storage = get_storage(folder)
+    old_texts = random_texts(200, seed=1)
+    storage.write(CORPUS, post_rows(range(200), old_texts))
+    first = _dedupe(folder)
+    assert not first["incremental"] and first["new_total"] == 200
+
+    fresh = random_texts(3, seed=2)
+    _append(storage, post_rows(range(200, 206), [
+        old_texts[0] + " https://example.com/a",  # near-duplicate of a kept row
+        old_texts[1] + " https://example.com/b",
+        fresh[0],
+        fresh[1],
+        fresh[1] + " https://example.com/c",  # near-duplicate of another appended row
+        fresh[2],
+    ]))
+
+    # The kept rows must come from the saved signatures, not from reading the corpus
+    def no_full_read(*args, **kwargs):
+        raise AssertionError("full pass over the corpus")
+
+    hashed_rows["rows"] = 0
+    with monkeypatch.context() as patched:
+        patched.setattr(type(storage), "iter_chunks", no_full_read)
+        result = _dedupe(folder)
+
+    assert result["incremental"]
+    assert hashed_rows["rows"] == 6
+    assert (result["old_total"], result["new_total"]) == (200, 203)
+    corpus = storage.read(CORPUS)
+    assert sorted(corpus["ID"]) == sorted([f"id{i}" for i in range(200)] + ["id202", "id203", "id205"])
+
+    # The next pass builds on the trimmed tail and its saved signatures
+    _append(storage, post_rows([300], [fresh[2] + " https://example.com/d"]))
+    again = _dedupe(folder)
+    assert again["incremental"] and again["new_total"] == 203
+
+
+def test_changed_threshold_falls_back_to_a_full_pass(tmp_path, hashed_rows):
+    folder = str(tmp_path)
+    storage = get_storage(folder, "csv")
+    storage.write(CORPUS, post_rows(range(50), random_texts(50, seed=3)))
+    _dedupe(folder)
+    _append(storage, post_rows([50], random_texts(1, seed=4)))
+
+    hashed_rows["rows"] = 0
+    result = _dedupe(folder, threshold=0.9)
+    assert not result["incremental"]
+    assert hashed_rows["rows"] == 51
@@ -0,0 +1,42 @@
+"""A search that ignores the time window aborts the backfill and stops every other window."""
+import asyncio
+
+import pytest
+from fake_reddit import HISTORY_END, WINDOW_QUERY, FakeHistoryListing, FakeReddit
+
+from common.reddit_scraper import SearchWindowIgnored, run_keyword_backfill
+
+
+class IgnoringReddit(FakeReddit):
+    """Searches for IGNORED come back unfiltered, like reddit.com's search."""
+
+    IGNORED = "ignored topic"
+
+    def history(self, community, query, limit):
+        start, end, keyword = WINDOW_QUERY.match(query).groups()
+        if keyword == self.IGNORED:
+            return FakeHistoryListing(self, community, keyword, 0, HISTORY_END, limit)
+        return super().history(community, query, limit)
+
+
+def test_ignored_window_cancels_the_others():
+    async def run():
+        reddit = IgnoringReddit(latency=0.05, budget=1_000_000, posts_per_hour=lambda kw: 300)
+        with pytest.raises(SearchWindowIgnored):
+            await run_keyword_backfill(
+                label="IGNORED",
+                community="all",
+                keywords=["busy topic", "other topic", IgnoringReddit.IGNORED],
+                merged_filename="IGNORED_merged.csv",
+                since_utc=HISTORY_END - 7 * 24 * 3600,
+                until_utc=HISTORY_END,
+                max_concurrency=4,
+                reddit=reddit,
+            )
+        # Nothing keeps fetching once the backfill has raised
+        assert asyncio.all_tasks() == {asyncio.current_task()}
+        requests = reddit.requests
+        await asyncio.sleep(0.2)
+        assert reddit.requests == requests
+
+    asyncio.run(run())
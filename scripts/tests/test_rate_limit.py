@@ -0,0 +1,46 @@
+"""The rate-limit bucket keeps concurrent listings within Reddit's budget."""
+import asyncio
+
+from fake_reddit import FakeReddit
+
+from common.rate_limit import RateLimitBucket, paced_listing
+
+LISTINGS = 8
+PAGES = 5
+
+
+def test_concurrent_listings_stay_within_the_budget():
+    # 40 pages against 15 requests a second: the budget is spent and
+    # reset twice while every listing has a request in flight
+    reddit = FakeReddit(latency=0.05, posts_per_listing=PAGES * 100, budget=15, window=1.0)
+    bucket = RateLimitBucket()
+
+    async def drain(listing):
+        return sum([1 async for _ in paced_listing(listing, bucket, lambda: reddit.auth.limits)])
+
+    async def run():
+        return await asyncio.gather(
+            *(drain(reddit.listing(f"sub{i}", "new", PAGES * 100)) for i in range(LISTINGS))
+        )
+
+    assert asyncio.run(run()) == [PAGES * 100] * LISTINGS
+    assert reddit.throttled == 0
+    assert bucket.in_flight == 0
+
+
+def test_first_request_probes_the_budget():
+    reddit = FakeReddit(latency=0.05, budget=3, window=60.0)
+    bucket = RateLimitBucket()
+
+    async def request():
+        await bucket.acquire()
+        await reddit.fetch_page()
+        bucket.release(reddit.auth.limits)
+
+    async def run():
+        await asyncio.gather(*(request() for _ in range(3)))
+
+    asyncio.run(run())
+    # Seeded from the first answer, not from the default capacity of 100
+    assert reddit.throttled == 0
+    assert bucket.allowance == 0
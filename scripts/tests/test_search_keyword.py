@@ -0,0 +1,70 @@
+"""Keyword searches page through asyncpraw's search, from the top or from a cursor."""
+import asyncio
+import threading
+
+from fake_reddit import FakeListing, FakeReddit
+
+from common.checkpoints import keyword_key, load_cursors, save_cursor
+from common.io_helpers import CorpusWriter
+from common.pipeline import ListingStats
+import common.reddit_scraper as reddit_scraper
+from common.reddit_scraper import _search_keyword
+
+POSTS = 250
+
+
+def _search(label, incremental=False):
+    async def run():
+        reddit = FakeReddit(latency=0, posts_per_listing=POSTS)
+        stats = ListingStats()
+        await _search_keyword(
+            subreddit=await reddit.subreddit("all"),
+            kw="alpha",
+            label=label,
+            writer=CorpusWriter(f"{label}_merged.csv"),
+            stats=stats,
+            incremental=incremental,
+        )
+        return stats
+
+    return asyncio.run(run())
+
+
+def test_search_from_the_top():
+    assert _search("TOP").raw == POSTS
+
+
+def test_search_resumes_from_a_cursor():
+    reddit = FakeReddit(latency=0, posts_per_listing=POSTS)
+    listing = FakeListing(reddit, "all", "search:alpha", POSTS)
+    key = keyword_key("CURSOR", "alpha")
+    save_cursor(key, {
+        "after": f"t3_{listing._post_id(99)}",
+        "fetched": 100,
+        "newest": {"id": listing._post_id(0), "created_utc": 0},
+    })
+
+    stats = _search("CURSOR", incremental=True)
+
+    # The rest below the cursor, then the top down to the interrupted run's newest post
+    assert stats.raw == POSTS - 100 + POSTS
+    assert key not in load_cursors()
+
+
+def test_cursor_and_checkpoint_writes_leave_the_event_loop(monkeypatch):
+    threads = []
+
+    def on_thread(save):
+        def record(*args, **kwargs):
+            threads.append(threading.current_thread())
+            return save(*args, **kwargs)
+        return record
+
+    monkeypatch.setattr(reddit_scraper, "save_cursor", on_thread(save_cursor))
+    monkeypatch.setattr(reddit_scraper, "update_checkpoints", on_thread(reddit_scraper.update_checkpoints))
+
+    _search("THREADS", incremental=True)
+
+    # A cursor per written batch, the checkpoint, then the cursor cleared
+    assert len(threads) >= 3
+    assert threading.main_thread() not in threads
@@ -0,0 +1,15 @@
+"""Subreddit listings, one after another, on leased and paced clients."""
+import asyncio
+
+from fake_reddit import FakeReddit
+
+from common.reddit_scraper import run_subreddit_scraper
+
+
+def test_sequential_failure_skips_only_that_subreddit():
+    # The first page request dies without a retry, like a crashed listing
+    reddit = FakeReddit(latency=0, posts_per_listing=50, crash_at=1)
+    stats = asyncio.run(run_subreddit_scraper(communities=["seqa", "seqb", "seqc"], reddit=reddit))
+
+    assert list(stats["failed_communities"]) == ["seqa"]
+    assert stats["raw_total"] == 100